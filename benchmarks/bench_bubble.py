@@ -0,0 +1,136 @@
+"""
+对话框更新基准测试
+
+对比两种对话框每次说话（一个tick）的耗时，包括随后处理积压事件时的布局和重绘：
+- 旧做法：QLabel，每次 setText + setStyleSheet + adjustSize
+- 新做法：SpeechBubble，每次只 setText，用缓存的QStaticText绘制
+
+两种对话框放在同样的窗口里（上方对话框、下方固定大小的动画区域），
+分别测量普通对话（从对话库随机抽取）和重复的点击反馈两种情况，
+并统计每个tick触发的布局请求次数。
+
+用法：
+    python benchmarks/bench_bubble.py [--ticks 2000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from PyQt6.QtCore import QObject, QEvent, qInstallMessageHandler
+from PyQt6.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
+
+# 旧版talk()每次设置的样式表
+LEGACY_STYLE = ("font: bold;"
+                "font:15pt '楷体';"
+                "color:white;"
+                "background-color: white"
+                "url(:/)")
+
+
+class LayoutCounter(QObject):
+    # 统计窗口收到的布局请求
+    def __init__(self):
+        super(LayoutCounter, self).__init__()
+        self.count = 0
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.LayoutRequest:
+            self.count += 1
+        return False
+
+
+def build_window(bubble):
+    # 与宠物窗口相同的结构：对话框在上，动画区域在下
+    window = QWidget()
+    area = QWidget()
+    area.setFixedSize(256, 256)
+    vbox = QVBoxLayout()
+    vbox.addWidget(bubble)
+    vbox.addWidget(area)
+    window.setLayout(vbox)
+    window.resize(300, 300)
+    window.show()
+    return window
+
+
+def legacy_tick(label, text):
+    label.setText(text)
+    label.setStyleSheet(LEGACY_STYLE)
+    label.adjustSize()
+
+
+def bubble_tick(bubble, text):
+    bubble.setText(text)
+
+
+def measure(app, widget, tick, texts):
+    """
+    逐tick计时
+
+    Args:
+        app (QApplication): 应用
+        widget (QWidget): 对话框
+        tick (callable): tick(widget, text)
+        texts (list[str]): 每个tick显示的文本
+
+    Returns:
+        tuple: (每tick耗时中位数us, p99耗时us, 每tick布局请求数)
+    """
+    window = build_window(widget)
+    counter = LayoutCounter()
+    window.installEventFilter(counter)
+    widget.installEventFilter(counter)
+    app.processEvents()
+    counter.count = 0
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        tick(widget, text)
+        # 处理tick引起的布局和重绘
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+    window.close()
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return statistics.median(samples) * 1e6, p99 * 1e6, counter.count / len(texts)
+
+
+def quiet(mode, context, message):
+    # offscreen平台不支持部分窗口操作，忽略这类提示
+    if not message.startswith("This plugin does not support"):
+        print(message, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对话框更新基准测试")
+    parser.add_argument("--ticks", type=int, default=2000, help="每组tick数")
+    args = parser.parse_args()
+
+    qInstallMessageHandler(quiet)
+    app = QApplication(sys.argv)
+    from main import CLICK_REPLY
+    from dialog_store import DialogStore
+    from speech_bubble import SpeechBubble
+    from assets import get_assets
+    store = DialogStore(get_assets().path('dialog/dialog.txt'), watch=False)
+    random.seed(1)
+    # 普通对话：相邻两句一般不同；点击反馈：与对话交替出现，每次都是同一句
+    dialog = [store.sample() for _ in range(args.ticks)]
+    clicks = [CLICK_REPLY if i & 1 else dialog[i] for i in range(args.ticks)]
+
+    print(f"{'情况':<8} {'做法':<12} {'p50 us':>9} {'p99 us':>9} {'布局/tick':>9}")
+    for case, texts in (("对话", dialog), ("点击交替", clicks)):
+        for name, factory, tick in (("QLabel+样式表", QLabel, legacy_tick),
+                                    ("SpeechBubble", SpeechBubble, bubble_tick)):
+            p50, p99, layouts = measure(app, factory(), tick, texts)
+            print(f"{case:<8} {name:<12} {p50:>9.1f} {p99:>9.1f} {layouts:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
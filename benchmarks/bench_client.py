@@ -0,0 +1,96 @@
+"""
+故事大会窗口反复打开/关闭基准测试
+
+对比两种打开方式：
+- 每次新建：每次打开都创建新的Client并重新解码背景图片（旧做法）
+- 复用窗口：get_client() 返回同一个Client，关闭只是隐藏，背景图片进程内只解码一次
+
+统计每次打开（到窗口绘制完成）的耗时、周期结束时存活的顶层窗口数，
+以及每隔一段周期的常驻内存，用于确认多次打开/关闭后内存保持平稳。
+
+用法：
+    python benchmarks/bench_client.py [--cycles 300] [--every 50]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# 故事大会的历史记录写到临时目录，不影响用户的历史记录
+os.environ.setdefault("DESKTOP_PET_HISTORY", os.path.join(tempfile.mkdtemp(), "story_history.log"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from PyQt6.QtCore import qInstallMessageHandler
+from PyQt6.QtWidgets import QApplication
+
+
+def run(app, cycles, every, reuse):
+    """
+    反复打开和关闭故事大会窗口
+
+    Args:
+        app (QApplication): 应用
+        cycles (int): 打开/关闭次数
+        every (int): 每隔多少次记录一次内存
+        reuse (bool): 是否复用同一个窗口
+
+    Returns:
+        tuple: (打开耗时列表（秒）, 内存记录列表（MB）, 存活的顶层窗口数)
+    """
+    import talk_show
+    from assets import get_assets
+    from metrics import rss_bytes
+    assets = get_assets()
+    holder = {}
+    opens, memory = [], []
+    for i in range(cycles):
+        start = time.perf_counter()
+        if reuse:
+            client = talk_show.get_client()
+            client.present()
+        else:
+            # 旧做法：背景图片每次重新解码，上一个窗口只是失去引用
+            assets.pixmaps.clear()
+            holder["client"] = client = talk_show.Client()
+            client.show()
+        client.repaint()
+        opens.append(time.perf_counter() - start)
+        client.close()
+        app.processEvents()
+        if (i + 1) % every == 0:
+            memory.append(rss_bytes() / 2 ** 20)
+    alive = sum(1 for w in app.topLevelWidgets() if isinstance(w, talk_show.Client))
+    return opens, memory, alive
+
+
+def quiet(mode, context, message):
+    # offscreen平台不支持部分窗口操作，忽略这类提示
+    if not message.startswith("This plugin does not support"):
+        print(message, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="故事大会窗口反复打开/关闭基准测试")
+    parser.add_argument("--cycles", type=int, default=300, help="打开/关闭次数")
+    parser.add_argument("--every", type=int, default=50, help="每隔多少次记录一次内存")
+    args = parser.parse_args()
+
+    qInstallMessageHandler(quiet)
+    app = QApplication(sys.argv)
+    # 先加载故事生成器，两种做法都不计入语料加载
+    import talk_show
+    talk_show.get_story_generator()
+
+    for name, reuse in (("每次新建", False), ("复用窗口", True)):
+        opens, memory, alive = run(app, args.cycles, args.every, reuse)
+        opens_ms = [t * 1000 for t in opens]
+        print(f"{name}: 首次打开 {opens_ms[0]:.2f} ms，之后中位数 {statistics.median(opens_ms[1:]):.3f} ms，"
+              f"最大 {max(opens_ms[1:]):.2f} ms，存活窗口 {alive}")
+        print("  常驻内存(MB): " + " ".join(f"{m:.1f}" for m in memory))
+
+
+if __name__ == '__main__':
+    main()
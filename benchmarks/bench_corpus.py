@@ -0,0 +1,122 @@
+"""
+大型故事语料基准测试
+
+生成每个类别数百万条元素的合成语料，分别以JSON（全部读入内存）和
+内存映射语料（story_corpus.py转换）两种方式启动故事生成器，比较启动耗时、常驻内存和生成吞吐量。
+
+用法：
+    python benchmarks/bench_corpus.py [--elements 1000000] [--workdir /tmp/corpus-bench]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+# 合成语料使用的模板与类别
+TEMPLATES = [
+    "在{place}，{character}遇到了{event}。",
+    "{character}离开{place}以后，{event}发生了。",
+]
+CATEGORIES = ["character", "place", "event"]
+
+
+def rss_bytes():
+    """
+    当前进程的常驻内存
+
+    Returns:
+        int: 字节数
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def write_text_corpus(path, elements):
+    # 流式写出 [类别] 分段的纯文本语料，避免基准本身占用大量内存
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[templates]\n")
+        for template in TEMPLATES:
+            f.write(template + "\n")
+        for category in CATEGORIES:
+            f.write(f"[{category}]\n")
+            for i in range(elements):
+                f.write(f"{category}第{i}号\n")
+
+
+def write_json_corpus(path, elements):
+    # 对照组：同样内容的JSON语料
+    data = {"templates": TEMPLATES,
+            "elements": {c: [f"{c}第{i}号" for i in range(elements)] for c in CATEGORIES}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def run_child(path, stories):
+    # 子进程：打开语料、创建生成器并生成stories个故事，输出一行JSON
+    rss_start = rss_bytes()
+    start = time.perf_counter()
+    from story_corpus import open_corpus
+    from talk_show import LocalStoryGenerator
+    import_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    templates, elements = open_corpus(path)
+    generator = LocalStoryGenerator(templates, elements)
+    startup_seconds = time.perf_counter() - start
+    rss_startup = rss_bytes()
+    start = time.perf_counter()
+    generator.generate_stories(stories, seed=1)
+    generate_seconds = time.perf_counter() - start
+    print(json.dumps({
+        "corpus": os.path.basename(path),
+        "import_ms": import_seconds * 1000,
+        "startup_ms": startup_seconds * 1000,
+        "rss_startup_mb": (rss_startup - rss_start) / 1024 / 1024,
+        "rss_delta_mb": (rss_bytes() - rss_start) / 1024 / 1024,
+        "stories_per_s": stories / generate_seconds,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="大型故事语料基准测试")
+    parser.add_argument("--elements", type=int, default=1000000, help="每个类别的元素数")
+    parser.add_argument("--stories", type=int, default=100000, help="启动后生成的故事数")
+    parser.add_argument("--workdir", default="/tmp/desktop-pet-corpus-bench", help="合成语料的存放目录")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args.child, args.stories)
+        return
+
+    from story_corpus import convert
+    os.makedirs(args.workdir, exist_ok=True)
+    text_path = os.path.join(args.workdir, "corpus.txt")
+    json_path = os.path.join(args.workdir, "corpus.json")
+    mapped_path = os.path.join(args.workdir, "corpus.corpus")
+    write_text_corpus(text_path, args.elements)
+    write_json_corpus(json_path, args.elements)
+    start = time.perf_counter()
+    convert(text_path, mapped_path)
+    print(f"转换 {len(CATEGORIES)} x {args.elements:,} 条元素耗时 {time.perf_counter() - start:.1f} 秒，"
+          f"语料文件 {os.path.getsize(mapped_path) / 1024 / 1024:.1f} MB")
+
+    # 启动增量：打开语料并创建生成器后的RSS增量；生成后增量包含内存映射中被读到的页面
+    print(f"{'语料':<16} {'启动ms':>10} {'启动增量MB':>10} {'生成后增量MB':>12} {'故事/秒':>10}")
+    for path in (json_path, mapped_path):
+        output = subprocess.run([sys.executable, __file__, "--child", path, "--stories", str(args.stories)],
+                                capture_output=True, text=True, check=True).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{r['corpus']:<16} {r['startup_ms']:>10.1f} {r['rss_startup_mb']:>10.1f} {r['rss_delta_mb']:>12.1f} "
+              f"{r['stories_per_s']:>10,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+批量导出基准测试
+
+用 talk_show.py 的批量导出生成N个故事，对比不同进程数的吞吐量和加速比，检查：
+- 相同种子在不同进程数下输出的文件逐字节相同
+- 主进程的峰值内存不随N增长（比较N和N/10两次导出）
+
+每次导出在独立的子进程中运行，峰值内存为该子进程（写文件的主进程）的最大常驻内存。
+加速比受限于机器的CPU核数，单核机器上多进程不会更快。
+
+用法：
+    python benchmarks/bench_export.py [--count 1000000] [--workers 1,2,4] [--gzip]
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def run_child(count, workers, output):
+    # 子进程：导出并输出耗时和峰值内存
+    sys.path.insert(0, SRC_DIR)
+    from talk_show import export_stories
+    start = time.perf_counter()
+    size = export_stories(count, output, workers=workers, seed=1)
+    elapsed = time.perf_counter() - start
+    try:
+        import resource
+        # Linux下ru_maxrss的单位是KB
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        peak = 0
+    print(json.dumps({"seconds": elapsed, "bytes": size, "peak_mb": peak}))
+
+
+def export(count, workers, output):
+    """
+    在子进程中导出
+
+    Returns:
+        dict: 耗时、字节数、峰值内存和输出文件的SHA-256
+    """
+    result = subprocess.run([sys.executable, __file__, "--child", str(count), str(workers), output],
+                            capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    digest = hashlib.sha256()
+    with open(output, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    report["sha256"] = digest.hexdigest()
+    return report
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        run_child(int(sys.argv[2]), int(sys.argv[3]), sys.argv[4])
+        return
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, cpus} if cpus > 1 else {1, 2})
+    parser = argparse.ArgumentParser(description="批量导出基准测试")
+    parser.add_argument("--count", type=int, default=1000000, help="故事数")
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)), help="进程数，逗号分隔")
+    parser.add_argument("--gzip", action="store_true", help="导出为.jsonl.gz")
+    args = parser.parse_args()
+
+    suffix = ".jsonl.gz" if args.gzip else ".jsonl"
+    directory = tempfile.mkdtemp()
+    print(f"CPU核数: {cpus}，故事数: {args.count}")
+    print(f"{'进程数':>6} {'秒':>7} {'故事/秒':>9} {'加速比':>6} {'MB':>7} {'峰值内存MB':>10}")
+    digests = set()
+    base = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        output = os.path.join(directory, f"stories-{workers}{suffix}")
+        report = export(args.count, workers, output)
+        os.remove(output)
+        digests.add(report["sha256"])
+        rate = args.count / report["seconds"]
+        base = base or rate
+        print(f"{workers:>6} {report['seconds']:>7.2f} {rate:>9.0f} {rate / base:>6.2f} "
+              f"{report['bytes'] / 2 ** 20:>7.1f} {report['peak_mb']:>10.1f}")
+    print(f"不同进程数的输出{'相同' if len(digests) == 1 else '不同'}")
+
+    small = export(args.count // 10, 1, os.path.join(directory, "small" + suffix))
+    large = export(args.count, 1, os.path.join(directory, "large" + suffix))
+    print(f"峰值内存：{args.count // 10} 个故事 {small['peak_mb']:.1f} MB，{args.count} 个故事 {large['peak_mb']:.1f} MB")
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
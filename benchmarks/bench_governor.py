@@ -0,0 +1,69 @@
+"""
+动画帧率调节基准测试
+
+实际运行宠物，分别在全速和伪造的遮挡状态下播放固定时长，对比进程CPU占用。
+结果与机器负载有关，只用于观察；帧预算是否正确由 check_governor.py 在虚拟时间中检查。
+
+用法：
+    python benchmarks/bench_governor.py [--seconds 3]
+"""
+import os
+import sys
+import time
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from PyQt6.QtCore import QTimer, qInstallMessageHandler
+from PyQt6.QtWidgets import QApplication
+
+from playback import FakePlaybackSignals
+
+
+def quiet(mode, context, message):
+    # offscreen平台不支持部分窗口属性，忽略相应的提示
+    if "This plugin does not support" not in message:
+        print(message)
+
+
+def measure_cpu(app, seconds):
+    """
+    实际运行宠物，对比全速和伪造遮挡时的CPU占用
+
+    Args:
+        app (QApplication): 应用
+        seconds (float): 每组运行时长
+    """
+    from main import DesktopPet
+    signals = FakePlaybackSignals()
+    pet = DesktopPet(tray=False, playback_signals=signals)
+    # 只保留动画播放
+    pet.stopJobs()
+    print(f"{'状态':<10} {'CPU%':>7} {'帧预算':>12}")
+    for name, hidden in (("全速", False), ("被遮挡", True)):
+        signals.is_hidden = hidden
+        # 伪造的时钟不前进，“刚操作过”的判断需要让它越过全速保持时长
+        signals.advance(pet.governor.policy.active_seconds)
+        pet.governor.refresh()
+        pet.image.reschedule()
+        QTimer.singleShot(int(seconds * 1000), app.quit)
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        app.exec()
+        usage = (time.process_time() - cpu) / (time.perf_counter() - wall) * 100
+        print(f"{name:<10} {usage:>7.2f} {str(pet.governor.budget.max_fps or '全速'):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="动画帧率调节基准测试")
+    parser.add_argument("--seconds", type=float, default=3, help="每组运行时长（秒）")
+    args = parser.parse_args()
+
+    qInstallMessageHandler(quiet)
+    app = QApplication(sys.argv)
+    measure_cpu(app, args.seconds)
+
+
+if __name__ == '__main__':
+    main()
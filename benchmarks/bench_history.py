@@ -0,0 +1,121 @@
+"""
+故事历史记录基准测试
+
+在已有 10 / 1万 / 10万 / 100万 条历史的情况下测量：
+- StoryHistory.append：写入日志和偏移索引的耗时
+- Client.add_line：追加一个条目到历史记录和文本框（文本框最多保留HISTORY_VIEW_LIMIT条）
+- 旧做法：直接调用Client文本框的append，文本框中保留全部条目（只测到10万条，更多条目时构建过慢）
+两种做法的窗口都处于显示状态，每次追加后处理事件，计入排版和重绘的耗时
+- 追加后文本框中的段落数，旧做法另外统计填充文本框增加的常驻内存
+- 搜索常见关键词（取最近的50个命中，只读取日志末尾）、只在最早条目中出现的关键词（需要向前扫描整个日志）
+  和翻到最早一页的耗时
+
+历史记录写在临时目录中，运行结束后删除。
+
+用法：
+    python benchmarks/bench_history.py [--sizes 10,10000,100000,1000000] [--ops 500]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from PyQt6.QtWidgets import QApplication
+
+# 旧做法只测到这个条目数
+LEGACY_LIMIT = 100000
+# 模拟条目的文本
+SAMPLE_TEXT = "故事生成器: 关于'小兔子'的故事：小兔子是一个勇敢的人，总是喜欢冒险。有一天，小兔子遇到了一个难题……"
+
+
+def per_op(func, ops):
+    # 逐次计时，返回中位数（微秒）
+    samples = []
+    for i in range(ops):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def fill(history, size):
+    # 预先写入size条历史，最早的一条带有唯一的关键词
+    history.append("用户: 独一无二的开头")
+    for i in range(size - 1):
+        history.append(SAMPLE_TEXT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="故事历史记录基准测试")
+    parser.add_argument("--sizes", default="10,10000,100000,1000000", help="已有条目数，逗号分隔")
+    parser.add_argument("--ops", type=int, default=500, help="每组追加次数")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    import talk_show
+    from story_history import StoryHistory
+    from metrics import rss_bytes
+    generator = talk_show.LocalStoryGenerator()
+
+    print(f"{'已有条目':>10} {'history us':>11} {'add_line us':>12} {'旧append us':>12} "
+          f"{'常见词ms':>8} {'搜索ms':>8} {'翻到最早ms':>10} {'日志MB':>8} {'段落数':>6} {'旧段落数/内存':>14}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        directory = tempfile.mkdtemp()
+        try:
+            history = StoryHistory(os.path.join(directory, "history.log"))
+            fill(history, size)
+            append_us = per_op(lambda i: history.append(SAMPLE_TEXT), args.ops)
+
+            client = talk_show.Client(generator=generator, history=history)
+            client.show()
+            app.processEvents()
+            add_us = per_op(lambda i: (client.add_line(SAMPLE_TEXT), app.processEvents()), args.ops)
+            blocks = client.content.document().blockCount()
+
+            start = time.perf_counter()
+            hits = history.search("小兔子")
+            recent_ms = (time.perf_counter() - start) * 1000
+            assert len(hits) == 50 and hits[0] == len(history) - 1, hits[:3]
+
+            start = time.perf_counter()
+            hits = history.search("独一无二")
+            search_ms = (time.perf_counter() - start) * 1000
+            assert hits == [0], hits
+
+            start = time.perf_counter()
+            client.show_range(0, talk_show.HISTORY_PAGE)
+            first_ms = (time.perf_counter() - start) * 1000
+            client.close()
+            client.deleteLater()
+            log_mb = os.path.getsize(history.path) / 2 ** 20
+            history.close()
+
+            legacy = legacy_blocks = "-"
+            if size <= LEGACY_LIMIT:
+                rss = rss_bytes()
+                window = talk_show.Client(generator=generator, history=StoryHistory(os.path.join(directory, "legacy.log")))
+                for _ in range(size):
+                    window.content.append(SAMPLE_TEXT)
+                window.show()
+                app.processEvents()
+                legacy_us = per_op(lambda i: (window.content.append(SAMPLE_TEXT), app.processEvents()), args.ops)
+                legacy = f"{legacy_us:.1f}"
+                legacy_blocks = f"{window.content.document().blockCount()}/{(rss_bytes() - rss) / 2 ** 20:.0f}MB"
+                window.close()
+                window.history.close()
+                window.deleteLater()
+            print(f"{size:>10} {append_us:>11.1f} {add_us:>12.1f} {legacy:>12} "
+                  f"{recent_ms:>8.2f} {search_ms:>8.1f} {first_ms:>10.2f} {log_mb:>8.1f} {blocks:>6} {legacy_blocks:>14}")
+            app.processEvents()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
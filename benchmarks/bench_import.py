@@ -0,0 +1,80 @@
+"""
+启动导入耗时检查
+
+用 python -X importtime 在新进程中导入 main 模块，解析每个模块的自身耗时和累计耗时，
+列出最慢的模块，并检查：
+- main 的累计导入耗时不超过预算
+- 故事大会相关模块（talk_show、story_corpus、sampling、socket）没有在启动时被导入
+
+超出预算或导入了延迟加载的模块时以状态码1退出，可以直接用于CI。
+
+用法：
+    python benchmarks/bench_import.py [--budget-ms 150] [--top 15] [--runs 5]
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+# 默认预算（毫秒）：main模块的累计导入耗时
+DEFAULT_BUDGET_MS = 150
+# 启动时不应导入的模块，第一次打开故事大会时才加载
+DEFERRED_MODULES = ["talk_show", "story_corpus", "sampling", "socket"]
+
+
+def import_profile(module="main"):
+    """
+    在新进程中导入模块并解析 -X importtime 的输出
+
+    Args:
+        module (str): 要导入的模块
+
+    Returns:
+        dict: 模块名 -> (自身耗时us, 累计耗时us)
+    """
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(own), int(cumulative))
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查main模块的导入耗时和延迟加载")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="导入耗时预算（毫秒）")
+    parser.add_argument("--top", type=int, default=15, help="列出累计耗时最长的模块数")
+    parser.add_argument("--runs", type=int, default=5, help="重复次数，取中位数")
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    totals = [p["main"][1] / 1000 for p in profiles]
+    # 按中位数那一次的结果列出最慢的模块
+    profile = profiles[sorted(range(args.runs), key=lambda i: totals[i])[args.runs // 2]]
+
+    print(f"{'累计ms':>8} {'自身ms':>8}  模块")
+    slowest = sorted(profile.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    for name, (own, cumulative) in slowest:
+        print(f"{cumulative / 1000:>8.1f} {own / 1000:>8.1f}  {name}")
+
+    failed = False
+    total = statistics.median(totals)
+    print(f"\nmain 累计导入耗时（中位数）: {total:.1f} ms，预算 {args.budget_ms:.0f} ms")
+    if total > args.budget_ms:
+        print("超出预算")
+        failed = True
+    imported = [name for name in DEFERRED_MODULES if name in profile]
+    if imported:
+        print(f"启动时导入了应延迟加载的模块: {', '.join(imported)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
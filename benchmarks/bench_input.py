@@ -0,0 +1,141 @@
+"""
+拖动与连续点击基准测试
+
+在事件循环运行的情况下，用1ms定时器持续向宠物发送合成的鼠标事件，统计固定时长内的CPU占用：
+- 拖动：模拟高回报率鼠标（默认每秒1000个移动事件），对比每个事件都移动窗口的旧做法
+  与按显示帧合并移动的新做法，并记录实际移动窗口的次数和最终位置是否正确
+- 连续点击：模拟每秒20次的快速点击，对比每次点击都重新设置对话框和点击动画的旧做法
+  与复用正在播放的点击动画的新做法，并记录动画切换次数
+
+两种做法都经过同样的事件分发，旧做法通过替换宠物实例上的判断方法模拟。
+offscreen平台下移动窗口几乎没有开销，真实桌面上每次移动还要经过窗口管理器和合成器，
+节省的CPU会比这里测得的更多。
+
+用法：
+    python benchmarks/bench_input.py [--seconds 3] [--rate 1000] [--clicks 20]
+"""
+import os
+import sys
+import time
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from PyQt6.QtCore import Qt, QEvent, QPoint, QPointF, QTimer, QThreadPool
+from PyQt6.QtGui import QMouseEvent
+from PyQt6.QtWidgets import QApplication
+
+LEFT = Qt.MouseButton.LeftButton
+NO_MODIFIER = Qt.KeyboardModifier.NoModifier
+
+
+def mouse_event(kind, global_pos, button, buttons):
+    return QMouseEvent(kind, QPointF(100, 150), QPointF(global_pos), button, buttons, NO_MODIFIER)
+
+
+def run_for(app, seconds, tick):
+    """
+    运行事件循环，期间每1ms调用一次tick
+
+    Args:
+        app (QApplication): 应用
+        seconds (float): 运行时长
+        tick (callable): 定时调用的函数，参数为已运行的秒数
+
+    Returns:
+        float: CPU占用百分比
+    """
+    timer = QTimer()
+    timer.setTimerType(Qt.TimerType.PreciseTimer)
+    start = time.perf_counter()
+    timer.timeout.connect(lambda: tick(time.perf_counter() - start))
+    timer.start(1)
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    app.exec()
+    timer.stop()
+    return (time.process_time() - cpu) / (time.perf_counter() - wall) * 100
+
+
+def bench_drag(app, pet, seconds, rate, legacy):
+    # 拖动：legacy为True时把帧间隔视为0，每个移动事件都立即移动窗口（旧做法）
+    if legacy:
+        pet.frameInterval = lambda: 0.0
+    else:
+        pet.__dict__.pop("frameInterval", None)
+    origin = pet.pos() + QPoint(100, 150)
+    state = {"sent": 0, "last": origin}
+    QApplication.sendEvent(pet, mouse_event(QEvent.Type.MouseButtonPress, origin, LEFT, LEFT))
+    QThreadPool.globalInstance().waitForDone()
+    moves_before = pet.move_metric.value
+
+    def tick(elapsed):
+        target = int(elapsed * rate)
+        while state["sent"] < target:
+            i = state["sent"]
+            position = origin + QPoint(i % 300, (i * 7) % 200)
+            state["last"] = position
+            QApplication.sendEvent(pet, mouse_event(QEvent.Type.MouseMove, position, Qt.MouseButton.NoButton, LEFT))
+            state["sent"] += 1
+
+    cpu = run_for(app, seconds, tick)
+    QApplication.sendEvent(pet, mouse_event(QEvent.Type.MouseButtonRelease, state["last"],
+                                            LEFT, Qt.MouseButton.NoButton))
+    moves = pet.move_metric.value - moves_before
+    final_ok = pet.pos() == state["last"] - pet.mouse_drag_pos
+    return cpu, state["sent"], moves, final_ok
+
+
+def bench_clicks(app, pet, seconds, clicks, legacy):
+    # 连续点击：legacy为True时不判断点击动画是否正在播放，每次点击都重新设置对话框和动画（旧做法）
+    if legacy:
+        pet.isClickReplyShowing = lambda: False
+    else:
+        pet.__dict__.pop("isClickReplyShowing", None)
+    origin = pet.pos() + QPoint(100, 150)
+    state = {"sent": 0}
+    switches_before = pet.swap_latency.summary()["count"]
+
+    def tick(elapsed):
+        target = int(elapsed * clicks)
+        while state["sent"] < target:
+            QApplication.sendEvent(pet, mouse_event(QEvent.Type.MouseButtonPress, origin, LEFT, LEFT))
+            QApplication.sendEvent(pet, mouse_event(QEvent.Type.MouseButtonRelease, origin,
+                                                    LEFT, Qt.MouseButton.NoButton))
+            state["sent"] += 1
+
+    cpu = run_for(app, seconds, tick)
+    return cpu, state["sent"], pet.swap_latency.summary()["count"] - switches_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="拖动与连续点击基准测试")
+    parser.add_argument("--seconds", type=float, default=3, help="每组运行时长（秒）")
+    parser.add_argument("--rate", type=int, default=1000, help="每秒鼠标移动事件数")
+    parser.add_argument("--clicks", type=int, default=20, help="每秒点击次数")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    from main import DesktopPet
+    pet = DesktopPet(tray=False)
+    # 停止定时动作，只保留输入处理和动画播放
+    pet.stopJobs()
+    app.processEvents()
+    QThreadPool.globalInstance().waitForDone()
+    print(f"显示帧间隔: {pet.frameInterval() * 1000:.1f} ms")
+
+    print(f"{'拖动':<10} {'CPU%':>7} {'事件数':>8} {'窗口移动':>8} {'最终位置':>8}")
+    for name, legacy in (("逐事件移动", True), ("按帧合并", False)):
+        cpu, sent, moves, final_ok = bench_drag(app, pet, args.seconds, args.rate, legacy)
+        print(f"{name:<10} {cpu:>7.1f} {sent:>8} {moves:>8} {'正确' if final_ok else '错误':>8}")
+
+    print(f"\n{'连续点击':<10} {'CPU%':>7} {'点击数':>8} {'动画切换':>8}")
+    for name, legacy in (("每次重建", True), ("复用动画", False)):
+        cpu, sent, switches = bench_clicks(app, pet, args.seconds, args.clicks, legacy)
+        print(f"{name:<10} {cpu:>7.1f} {sent:>8} {switches:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+多宠物模式基准测试
+
+在offscreen平台下分别运行1到100个宠物，统计常驻内存（RSS）和固定时长内的CPU时间，
+验证共享时钟、动画缓存和对话语料后资源占用随宠物数量亚线性增长。
+
+用法：
+    python benchmarks/bench_multi_pet.py [--counts 1,10,50,100] [--seconds 10]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def rss_bytes():
+    """
+    当前进程的常驻内存
+
+    Returns:
+        int: 字节数，无法读取/proc时使用ru_maxrss近似
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_child(count, seconds):
+    # 子进程：创建count个宠物，运行seconds秒后输出一行JSON
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, SRC_DIR)
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    from animation import shared_clock
+    from multi_pet import PetHost
+
+    rss_start = rss_bytes()
+    start = time.perf_counter()
+    host = PetHost()
+    host.spawn(count)
+    spawn_seconds = time.perf_counter() - start
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    clock_wakeups = shared_clock().wakeups
+    job_wakeups = host.scheduler.wakeups
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec()
+    result = {
+        "pets": count,
+        "spawn_ms": spawn_seconds * 1000,
+        "rss_mb": rss_bytes() / 1024 / 1024,
+        "rss_delta_mb": (rss_bytes() - rss_start) / 1024 / 1024,
+        "cpu_percent": (time.process_time() - cpu_start) / (time.perf_counter() - wall_start) * 100,
+        "frame_wakeups_per_s": (shared_clock().wakeups - clock_wakeups) / seconds,
+        "job_wakeups_per_s": (host.scheduler.wakeups - job_wakeups) / seconds,
+        "cache": host.animation_cache.stats(),
+    }
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多宠物模式基准测试")
+    parser.add_argument("--counts", default="1,10,50,100", help="宠物数量列表，逗号分隔")
+    parser.add_argument("--seconds", type=float, default=10, help="每组运行时长（秒）")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args.child, args.seconds)
+        return
+
+    results = []
+    for count in (int(c) for c in args.counts.split(",")):
+        output = subprocess.run([sys.executable, __file__, "--child", str(count), "--seconds", str(args.seconds)],
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'宠物数':>6} {'创建ms':>9} {'RSS MB':>8} {'增量MB':>8} {'CPU%':>7} {'帧唤醒/s':>9} {'任务唤醒/s':>10}")
+    for r in results:
+        print(f"{r['pets']:>6} {r['spawn_ms']:>9.1f} {r['rss_mb']:>8.1f} {r['rss_delta_mb']:>8.1f} "
+              f"{r['cpu_percent']:>7.2f} {r['frame_wakeups_per_s']:>9.1f} {r['job_wakeups_per_s']:>10.2f}")
+    first, last = results[0], results[-1]
+    scale = last["pets"] / first["pets"]
+    print(f"宠物数量 x{scale:.0f}: RSS x{last['rss_mb'] / first['rss_mb']:.2f}, "
+          f"CPU x{last['cpu_percent'] / max(first['cpu_percent'], 1e-6):.2f}")
+
+
+if __name__ == '__main__':
+    main()
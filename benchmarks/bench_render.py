@@ -0,0 +1,126 @@
+"""
+动画重绘基准测试
+
+在与宠物相同的无边框半透明窗口中播放内置的待机GIF，逐帧切换并处理事件，对比：
+- 整帧重绘：每次切换帧都重绘整个动画区域（旧做法）
+- 变化区域：只重绘与上一帧不同的矩形，与上一帧相同的帧不重绘
+
+统计每帧的绘制耗时（paintEvent）、包含窗口合成在内的每帧耗时和CPU时间、平均重绘面积和跳过的帧数。
+offscreen平台下窗口合成只是内存拷贝，真实桌面上半透明窗口还要经过合成器，节省会更多。
+
+用法：
+    python benchmarks/bench_render.py [--rounds 20] [--size 200]
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+from PyQt6.QtCore import Qt, QRect, QSize, qInstallMessageHandler
+from PyQt6.QtWidgets import QApplication, QVBoxLayout, QWidget
+
+from animation import AnimationPlayer, decode_animation
+
+
+def quiet(mode, context, message):
+    # offscreen平台不支持部分窗口属性，忽略相应的提示
+    if "This plugin does not support" not in message:
+        print(message)
+
+
+def pet_window(size):
+    """
+    与宠物窗口相同设置的半透明无边框窗口
+
+    Returns:
+        tuple: (窗口, 播放控件)
+    """
+    window = QWidget()
+    window.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint)
+    window.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
+    layout = QVBoxLayout(window)
+    player = AnimationPlayer(window)
+    layout.addWidget(player)
+    window.resize(size.width() + 100, size.height() + 100)
+    return window, player
+
+
+def run(app, path, size, rounds, legacy):
+    """
+    播放一个GIF若干轮
+
+    Args:
+        app (QApplication): 应用
+        path (str): GIF路径
+        size (QSize): 帧尺寸
+        rounds (int): 播放轮数
+        legacy (bool): 是否整帧重绘
+
+    Returns:
+        dict: 每帧绘制耗时、每帧总耗时、每帧CPU时间（毫秒）、平均重绘面积比例和跳过的帧数
+    """
+    animation = decode_animation(path, size)
+    if legacy:
+        animation.damage_rects = [(QRect(0, 0, size.width(), size.height()),)] * len(animation)
+    window, player = pet_window(size)
+    paint = [0.0]
+    original = player.paintEvent
+
+    def timed_paint(event):
+        start = time.perf_counter()
+        original(event)
+        paint[0] += time.perf_counter() - start
+
+    player.paintEvent = timed_paint
+    player.setAnimation(animation)
+    window.show()
+    app.processEvents()
+    frames = rounds * len(animation)
+    area = sum(sum(r.width() * r.height() for r in animation.damage(i)) for i in range(len(animation)))
+    skipped = sum(1 for i in range(len(animation)) if not animation.damage(i)) * rounds
+    paint[0] = 0.0
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for _ in range(frames):
+        player.nextFrame()
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return {
+        "paint_ms": paint[0] / frames * 1000,
+        "frame_ms": elapsed / frames * 1000,
+        "cpu_ms": cpu / frames * 1000,
+        "area": area / (len(animation) * size.width() * size.height()),
+        "skipped": skipped,
+        "frames": frames,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="动画重绘基准测试")
+    parser.add_argument("--rounds", type=int, default=20, help="每个GIF播放的轮数")
+    parser.add_argument("--size", type=int, default=200, help="帧边长（像素），宠物默认为200")
+    args = parser.parse_args()
+
+    qInstallMessageHandler(quiet)
+    app = QApplication(sys.argv)
+    size = QSize(args.size, args.size)
+    paths = sorted(glob.glob(os.path.join(SRC_DIR, "images", "idle_animation", "*.gif")))
+    print(f"{'动画':<14} {'做法':<8} {'绘制 ms':>8} {'每帧 ms':>8} {'CPU ms':>8} {'重绘面积':>8} {'跳过':>10}")
+    for path in paths:
+        for name, legacy in (("整帧重绘", True), ("变化区域", False)):
+            result = run(app, path, size, args.rounds, legacy)
+            print(f"{os.path.basename(path):<14} {name:<8} {result['paint_ms']:>8.3f} {result['frame_ms']:>8.3f} "
+                  f"{result['cpu_ms']:>8.3f} {result['area']:>8.0%} {result['skipped']:>4}/{result['frames']:<5}")
+
+
+if __name__ == '__main__':
+    main()
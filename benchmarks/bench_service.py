@@ -0,0 +1,171 @@
+"""
+故事服务压力测试
+
+在子进程中启动故事服务（或连接已经运行的服务），用asyncio在本进程中建立1到1000个并发连接，
+每个连接保持固定数量的在途请求（流水线深度），在固定时长内持续发送生成请求，
+统计吞吐量（请求数/秒）和延迟分布（p50/p99/p99.9/最大值）。
+
+用法：
+    python benchmarks/bench_service.py [--connections 1,10,100,1000] [--pipeline 1] [--seconds 3]
+    python benchmarks/bench_service.py --unix /tmp/story.sock          # 使用Unix套接字
+    python benchmarks/bench_service.py --connect 127.0.0.1:8765        # 测试已经运行的服务
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from collections import deque
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+# 每个请求的内容：随机故事和带主题的故事交替
+REQUESTS = [
+    b'{"n": 1}\n',
+    '{"input": "小兔子在森林里冒险", "n": 1}\n'.encode("utf-8"),
+]
+
+
+def percentile(ordered, p):
+    # 最近秩百分位数，ordered已排序
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def start_server(unix):
+    """
+    在子进程中启动故事服务
+
+    Args:
+        unix (str): Unix套接字路径，为None时使用系统分配端口的TCP
+
+    Returns:
+        tuple: (子进程, 地址)
+    """
+    command = [sys.executable, os.path.join(SRC_DIR, "story_service.py")]
+    command += ["--unix", unix] if unix else ["--port", "0"]
+    env = dict(os.environ, DESKTOP_PET_METRICS="0")
+    process = subprocess.Popen(command, cwd=SRC_DIR, env=env, stdout=subprocess.PIPE, text=True)
+    # 服务启动后第一行输出监听地址
+    address = process.stdout.readline().strip().split(": ", 1)[-1]
+    return process, address
+
+
+async def open_connection(address):
+    if ":" in address:
+        host, port = address.rsplit(":", 1)
+        return await asyncio.open_connection(host, int(port))
+    return await asyncio.open_unix_connection(address)
+
+
+async def connection(address, pipeline, deadline, latencies, index):
+    """
+    一个连接：保持pipeline个在途请求，直到截止时间
+
+    Args:
+        address (str): 服务地址
+        pipeline (int): 在途请求数
+        deadline (float): 截止时间（perf_counter）
+        latencies (list): 收集每个请求的延迟（秒）
+        index (int): 连接序号，用于设置连接种子
+
+    Returns:
+        int: 出错的响应数
+    """
+    reader, writer = await open_connection(address)
+    writer.write(json.dumps({"op": "seed", "seed": index}).encode("utf-8") + b"\n")
+    await reader.readline()
+    sent = deque()
+    errors = 0
+    i = 0
+    while True:
+        while len(sent) < pipeline and time.perf_counter() < deadline:
+            writer.write(REQUESTS[i & 1])
+            sent.append(time.perf_counter())
+            i += 1
+        if not sent:
+            break
+        await writer.drain()
+        line = await reader.readline()
+        if not line:
+            break
+        latencies.append(time.perf_counter() - sent.popleft())
+        if b'"error"' in line:
+            errors += 1
+    writer.close()
+    return errors
+
+
+async def run_level(address, connections, pipeline, seconds):
+    """
+    以指定并发数运行一轮
+
+    Returns:
+        dict: 吞吐量和延迟
+    """
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + seconds
+    errors = await asyncio.gather(*(connection(address, pipeline, deadline, latencies, i)
+                                    for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "connections": connections,
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "p999_ms": percentile(latencies, 99.9) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def raise_file_limit(needed):
+    # 1000个连接需要更多的文件描述符
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="故事服务压力测试")
+    parser.add_argument("--connections", default="1,10,100,1000", help="并发连接数，逗号分隔")
+    parser.add_argument("--pipeline", type=int, default=1, help="每个连接的在途请求数")
+    parser.add_argument("--seconds", type=float, default=3, help="每轮时长（秒）")
+    parser.add_argument("--unix", help="启动服务时使用该Unix套接字")
+    parser.add_argument("--connect", help="连接已经运行的服务（host:port 或 Unix套接字路径）")
+    parser.add_argument("--output", help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.connections.split(",")]
+    raise_file_limit(max(levels) * 2 + 64)
+    process = None
+    address = args.connect
+    if address is None:
+        process, address = start_server(args.unix)
+    print(f"服务地址: {address}，流水线深度: {args.pipeline}")
+    results = []
+    try:
+        print(f"{'连接数':>6} {'请求数':>9} {'请求/秒':>10} {'p50 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'最大 ms':>8} {'错误':>5}")
+        for connections in levels:
+            result = asyncio.run(run_level(address, connections, args.pipeline, args.seconds))
+            results.append(result)
+            print(f"{connections:>6} {result['requests']:>9} {result['rps']:>10.0f} {result['p50_ms']:>8.2f} "
+                  f"{result['p99_ms']:>8.2f} {result['p999_ms']:>9.2f} {result['max_ms']:>8.2f} {result['errors']:>5}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+启动基准测试：首帧耗时
+
+分别在冷启动（没有资源清单，首次运行后在后台生成）和热启动（使用上次生成的资源清单）
+两种情况下启动DesktopPet，测量从进入子进程到宠物动画第一次绘制完成的耗时，
+并通过审计钩子统计首帧之前资源目录的扫描次数（os.listdir/os.scandir，不含模块导入）
+和打开的资源文件数。
+
+注意：冷启动会删除 src/asset_manifest.json，运行结束后清单会重新生成。
+
+用法：
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+# 统计这些资源目录下的文件系统访问
+RESOURCE_DIRS = tuple(os.path.join(SRC_DIR, d) for d in ("images", "dialog", "story", "atlas"))
+
+
+def run_child():
+    # 子进程：启动一个宠物，第一次绘制动画后输出一行JSON并退出
+    start = time.perf_counter()
+    counts = {"listdir": 0, "open": 0}
+    first_frame = []
+
+    def audit(event, args):
+        if first_frame or event not in ("os.listdir", "os.scandir", "open"):
+            return
+        path = args[0]
+        if not isinstance(path, str) or not os.path.abspath(path).startswith(RESOURCE_DIRS):
+            return
+        counts["open" if event == "open" else "listdir"] += 1
+
+    sys.addaudithook(audit)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, SRC_DIR)
+    from PyQt6.QtCore import QObject, QEvent, QThreadPool
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    from main import DesktopPet
+
+    class FirstPaint(QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Type.Paint and not first_frame:
+                first_frame.append(time.perf_counter())
+                app.quit()
+            return False
+
+    pet = DesktopPet(tray=False)
+    watcher = FirstPaint()
+    pet.image.installEventFilter(watcher)
+    pet.image.update()
+    app.exec()
+    # 等待后台生成资源清单，下一次即为热启动
+    QThreadPool.globalInstance().waitForDone()
+    print(json.dumps({
+        "ttff_ms": (first_frame[0] - start) * 1000,
+        "listdir": counts["listdir"],
+        "open": counts["open"],
+        "manifest": pet.assets.loaded,
+    }))
+
+
+def run(runs, cold):
+    """
+    多次启动子进程
+
+    Args:
+        runs (int): 启动次数
+        cold (bool): 每次启动前是否删除资源清单
+
+    Returns:
+        list[dict]: 每次的测量结果
+    """
+    sys.path.insert(0, SRC_DIR)
+    from assets import MANIFEST_NAME
+    manifest = os.path.join(SRC_DIR, MANIFEST_NAME)
+    results = []
+    for _ in range(runs):
+        if cold and os.path.exists(manifest):
+            os.remove(manifest)
+        output = subprocess.run([sys.executable, __file__, "--child"],
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="冷/热启动首帧耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每种情况的启动次数")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child()
+        return
+
+    print(f"{'情况':<6} {'首帧ms(中位数)':>14} {'最小ms':>8} {'目录扫描':>8} {'打开资源':>8}")
+    for name, cold in (("冷启动", True), ("热启动", False)):
+        results = run(args.runs, cold)
+        ttff = [r["ttff_ms"] for r in results]
+        print(f"{name:<6} {statistics.median(ttff):>14.1f} {min(ttff):>8.1f} "
+              f"{results[-1]['listdir']:>8} {results[-1]['open']:>8}")
+
+
+if __name__ == '__main__':
+    main()
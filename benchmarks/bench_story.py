@@ -0,0 +1,75 @@
+"""
+故事生成吞吐量基准测试
+
+对比逐个占位符查找替换的旧实现与编译模板后的批量接口generate_stories，
+批量接口在单核上需达到每秒10万个故事。
+
+用法：
+    python benchmarks/bench_story.py [--count 200000] [--target 100000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from talk_show import LocalStoryGenerator
+
+
+def legacy_fill(template, elements):
+    # 旧实现：每次查找第一个占位符并切片重建整个字符串（不含500ms的响应时间控制）
+    story = template
+    while "{" in story and "}" in story:
+        start = story.find("{")
+        end = story.find("}")
+        placeholder = story[start+1:end]
+        if placeholder in elements:
+            story = story[:start] + random.choice(elements[placeholder]) + story[end+1:]
+        else:
+            story = story[:start] + "未知" + story[end+1:]
+    return story
+
+
+def measure(func, count):
+    # 返回每秒生成的故事数
+    start = time.perf_counter()
+    func(count)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="故事生成吞吐量基准测试")
+    parser.add_argument("--count", type=int, default=200000, help="每组生成的故事数")
+    parser.add_argument("--target", type=float, default=100000, help="批量接口的最低吞吐量（故事/秒）")
+    args = parser.parse_args()
+
+    generator = LocalStoryGenerator()
+    templates, elements = generator.templates, generator.elements
+
+    def legacy(count):
+        for _ in range(count):
+            legacy_fill(random.choice(templates), elements)
+
+    def single(count):
+        for _ in range(count):
+            generator.fill(random.choice(generator.compiled))
+
+    def batch(count):
+        generator.generate_stories(count, seed=42)
+
+    results = [
+        ("旧实现逐个替换", measure(legacy, args.count // 4)),
+        ("编译模板逐个生成", measure(single, args.count)),
+        ("generate_stories批量生成", measure(batch, args.count)),
+    ]
+    for name, rate in results:
+        print(f"{name:<24} {rate:>12,.0f} 故事/秒")
+    if results[-1][1] < args.target:
+        print(f"未达标：批量接口低于 {args.target:,.0f} 故事/秒")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+动画帧率调节检查
+
+用虚拟时钟驱动播放控件，向帧率调节器输入伪造的信号（用户操作、空闲时长、窗口遮挡、进程CPU时间），
+逐段统计实际的帧率，检查是否落在策略给出的帧预算内：
+- 用户刚操作过、未空闲时全速播放
+- 空闲后不超过空闲帧率；用户一操作，下一帧在一个原生帧延时内到来并恢复全速
+- 用户在其他窗口中操作（系统空闲时长）时取消空闲降帧，但不进入操作期
+- 窗口被遮挡时不超过遮挡帧率
+- CPU超出预算时按比例降帧（不低于下限），CPU回落后逐步恢复全速
+- 降帧时动画速度不变：当前帧与按经过时间推算的帧一致
+
+全部在虚拟时间中进行，不依赖真实时间和机器负载，约一秒内完成；任一检查失败时以非零状态码退出，
+可以单独在CI中运行。实际运行宠物时的CPU占用见 bench_governor.py。
+
+用法：
+    python benchmarks/check_governor.py
+"""
+import os
+import sys
+from collections import Counter
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from PyQt6 import sip
+from PyQt6.QtCore import QSize, qInstallMessageHandler
+from PyQt6.QtGui import QColor, QImage
+from PyQt6.QtWidgets import QApplication
+
+from animation import Animation, AnimationPlayer
+from playback import CPU_WINDOW, EVALUATE_INTERVAL, FakePlaybackSignals, PlaybackGovernor, PlaybackPolicy
+from scheduler import Scheduler, VirtualClock
+
+# 测试动画：FRAMES帧，每帧DELAY_MS毫秒，即25帧/秒
+FRAMES = 20
+DELAY_MS = 40
+# 虚拟时间的步长（秒）
+STEP = 0.005
+
+
+def quiet(mode, context, message):
+    # offscreen平台不支持部分窗口属性，忽略相应的提示
+    if "This plugin does not support" not in message:
+        print(message)
+
+
+def test_animation():
+    # 每帧颜色不同的小动画
+    frames = []
+    for i in range(FRAMES):
+        image = QImage(16, 16, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(QColor(i * 10, 0, 0))
+        frames.append(image)
+    return Animation(frames, [DELAY_MS] * FRAMES, QSize(16, 16))
+
+
+class Harness:
+    """
+    用虚拟时钟驱动的播放控件和帧率调节器
+    """
+
+    def __init__(self):
+        self.clock = VirtualClock()
+        self.scheduler = Scheduler(self.clock, coalesce_window=0)
+        # 虚拟时间按步长前进，到期时间落在当前步内即执行
+        self.scheduler.tolerance = STEP / 2
+        self.signals = FakePlaybackSignals(self.clock)
+        self.policy = PlaybackPolicy()
+        self.governor = PlaybackGovernor(self.policy, self.signals)
+        self.player = AnimationPlayer(clock=self.scheduler)
+        self.player.setGovernor(self.governor)
+        self.player.setAnimation(test_animation())
+        # 每次切换的时间和当时帧预算的原因
+        self.switches = []
+        self.reasons = []
+        original = self.player.nextFrame
+
+        def counted():
+            self.switches.append(self.clock.now())
+            original()
+            self.reasons.append(self.governor.budget.reason)
+
+        # 时钟任务在schedule时绑定回调，替换后重新开始播放
+        self.player.nextFrame = counted
+        self.player.start()
+        # 播放开始的时间，用于检查动画速度
+        self.origin = self.clock.now()
+
+    def run(self, seconds, cpu_usage=0.0):
+        """
+        让虚拟时间前进
+
+        Args:
+            seconds (float): 秒数
+            cpu_usage (float): 这段时间内的进程CPU占用（占一个核心的比例）
+
+        Returns:
+            tuple: (这段时间内的帧率, 这段时间内最常见的帧预算原因)
+        """
+        start = self.clock.now()
+        before = len(self.switches)
+        while self.clock.now() < start + seconds - 1e-9:
+            self.signals.advance(STEP, STEP * cpu_usage)
+            self.scheduler.run_due()
+        reasons = Counter(self.reasons[before:])
+        reason = reasons.most_common(1)[0][0] if reasons else self.governor.budget.reason
+        return (len(self.switches) - before) / seconds, reason
+
+    def expected_frame(self):
+        # 按最近一次切换时经过的时间推算应显示的帧
+        return int(round((self.switches[-1] - self.origin) * 1000 / DELAY_MS, 6)) % FRAMES
+
+    def close(self):
+        # 先销毁播放控件，避免解释器退出时回调已经析构的调度器
+        self.player.stop()
+        sip.delete(self.player)
+
+
+def check_budgets():
+    """
+    帧预算检查
+
+    空闲和CPU预算按时间变化，调节器最多晚EVALUATE_INTERVAL秒发现，这两类阶段先运行一小段再统计
+
+    Returns:
+        bool: 全部通过时返回True
+    """
+    h = Harness()
+    policy = h.policy
+    full = 1000 / DELAY_MS
+    results = []
+
+    def check(name, measured, low, high):
+        fps, reason = measured
+        ok = low - 1e-6 <= fps <= high + 1e-6
+        results.append(ok)
+        print(f"{name:<22} {fps:>8.2f} {f'{low:.3g}-{high:.3g}':>12} {reason:>8} {'通过' if ok else '失败':>6}")
+
+    def check_frame(name):
+        ok = h.player.frame_index == h.expected_frame()
+        results.append(ok)
+        print(f"{name:<22} 第{h.player.frame_index}帧 / 应为第{h.expected_frame()}帧 {'通过' if ok else '失败':>6}")
+
+    print(f"{'阶段':<22} {'帧/秒':>8} {'预算':>12} {'原因':>8} {'结果':>6}")
+    check("刚操作过", h.run(policy.active_seconds), full * 0.95, full)
+    check("未空闲", h.run(policy.idle_after - policy.active_seconds), full * 0.95, full)
+    h.run(EVALUATE_INTERVAL)
+    check("空闲", h.run(20), 0, policy.idle_fps)
+    check_frame("空闲时动画进度")
+
+    # 在其他窗口中操作：下一次计算帧预算后全速（原因为full而不是active），再过idle_after秒重新空闲
+    h.signals.notify_system_input()
+    h.run(EVALUATE_INTERVAL + 1 / policy.idle_fps)
+    check("其他窗口操作后", h.run(policy.idle_after - 1), full * 0.95, full)
+    h.run(1 + EVALUATE_INTERVAL)
+    check("再次空闲", h.run(10), 0, policy.idle_fps)
+
+    # 用户操作：下一帧在一个原生帧延时内到来
+    input_at = h.clock.now()
+    before = len(h.switches)
+    h.governor.notify_input()
+    h.run(DELAY_MS / 1000)
+    woke = h.switches[before] - input_at if len(h.switches) > before else float("inf")
+    ok = woke <= DELAY_MS / 1000 + 1e-9
+    results.append(ok)
+    print(f"{'操作后第一帧':<22} {woke * 1000:>6.1f}ms {f'<={DELAY_MS}ms':>12} {'':>8} {'通过' if ok else '失败':>6}")
+    check("操作后", h.run(policy.active_seconds - DELAY_MS / 1000), full * 0.95, full)
+
+    h.signals.is_hidden = True
+    h.governor.refresh()
+    check("被遮挡", h.run(10), 0, policy.hidden_fps)
+    h.signals.is_hidden = False
+    h.governor.notify_input()
+    h.run(policy.active_seconds)
+
+    # CPU超出预算：占用为预算的4倍，第一个统计窗口后降到全速的1/4，之后降到下限
+    usage = policy.cpu_budget * 4
+    h.run(CPU_WINDOW + EVALUATE_INTERVAL, cpu_usage=usage)
+    # 第一个统计窗口的起点最多比操作期结束早EVALUATE_INTERVAL秒，混入的低占用使上限最多高出相应比例；
+    # 统计的是整帧数，短时间内再允许多出一帧
+    seconds = CPU_WINDOW - EVALUATE_INTERVAL
+    high = full * 0.25 * (CPU_WINDOW + EVALUATE_INTERVAL) / CPU_WINDOW + 1 / seconds
+    check("CPU超预算", h.run(seconds, cpu_usage=usage), full * 0.25 * 0.9, high)
+    h.run(EVALUATE_INTERVAL, cpu_usage=usage)
+    check("CPU持续超预算", h.run(10, cpu_usage=usage), policy.min_fps * 0.9, policy.min_fps)
+    # CPU回落：每个统计窗口帧率上限翻倍，直到取消限制
+    h.run(CPU_WINDOW * 5 + EVALUATE_INTERVAL)
+    check("CPU回落后", h.run(5), full * 0.95, full)
+    check_frame("结束时动画进度")
+    h.close()
+    return all(results)
+
+
+def main():
+    qInstallMessageHandler(quiet)
+    app = QApplication(sys.argv)
+    if not check_budgets():
+        print("\n帧预算检查未通过")
+        sys.exit(1)
+    print("\n帧预算检查通过")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+"""
+宠物热点路径基准测试套件
+
+在Qt的offscreen平台下运行，覆盖：
+- startup：DesktopPet从启动到第一帧绘制（独立子进程，热启动）
+- random_act：每个GIF的randomAct切换耗时（缓存未命中/命中）
+- talk：talk()吞吐量
+- drag：高事件频率下mousePressEvent/mouseMoveEvent的处理耗时
+- story：关闭500ms节奏控制后generate_story的吞吐量
+- client：故事大会Client窗口的构建耗时，以及复用窗口重新打开的耗时
+
+结果以JSON输出，可保存为基线；与基线对比时，任一指标变差超过阈值即以状态码1退出。
+指标名以 _ms/_us 结尾表示越小越好，以 _per_s 结尾表示越大越好。
+基线与机器相关，更换机器后需要用 --update-baseline 重新生成。
+
+用法：
+    python benchmarks/suite.py                          # 运行并与基线对比
+    python benchmarks/suite.py --update-baseline        # 运行并保存为基线
+    python benchmarks/suite.py --only talk,story --output result.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import platform
+import statistics
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+# 默认基线文件
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+# 默认回归阈值：比基线差25%以上视为回归
+DEFAULT_THRESHOLD = 0.25
+# 固定随机种子，保证每次运行的操作序列相同
+SEED = 20240501
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# 故事大会的历史记录写到临时目录，不影响用户的历史记录
+os.environ.setdefault("DESKTOP_PET_HISTORY", os.path.join(tempfile.mkdtemp(), "story_history.log"))
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# 注册的测试项：名称 -> 函数
+CASES = {}
+
+
+def case(name):
+    """
+    注册测试项
+
+    测试项函数接收参数对象，返回 指标名 -> 数值 的字典
+
+    Args:
+        name (str): 测试项名称
+    """
+    def register(func):
+        CASES[name] = func
+        return func
+    return register
+
+
+def timed(func, repeat):
+    """
+    重复执行并计时
+
+    Args:
+        func (callable): 被测函数
+        repeat (int): 次数
+
+    Returns:
+        list[float]: 每次的耗时（秒）
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, p):
+    # 最近秩百分位数
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+_app = None
+
+
+def application():
+    # 整个套件共用一个QApplication，保存引用避免被回收
+    global _app
+    if _app is None:
+        from PyQt6.QtWidgets import QApplication
+        _app = QApplication.instance() or QApplication(sys.argv)
+    return _app
+
+
+def new_pet():
+    # 创建一个不带托盘的宠物，并等待首帧后的初始化完成
+    from PyQt6.QtCore import QThreadPool
+    from main import DesktopPet
+    app = application()
+    pet = DesktopPet(tray=False)
+    pet.stopJobs()
+    app.processEvents()
+    QThreadPool.globalInstance().waitForDone()
+    return pet
+
+
+@case("startup")
+def bench_startup(args):
+    from bench_startup import run
+    ttff = [r["ttff_ms"] for r in run(args.runs, cold=False)]
+    return {"first_frame_ms": statistics.median(ttff)}
+
+
+@case("random_act")
+def bench_random_act(args):
+    from PyQt6.QtCore import QThreadPool
+    pet = new_pet()
+    pool = QThreadPool.globalInstance()
+    results = {}
+    for path in sorted(set(pet.idle_animations + [pet.click_animation_gif])):
+        name = os.path.splitext(os.path.basename(path))[0]
+        cold, warm = [], []
+        for _ in range(args.runs):
+            pet.animation_cache.clear()
+            pet.next_animation = path
+            start = time.perf_counter()
+            pet.randomAct()
+            cold.append(time.perf_counter() - start)
+            # 等待randomAct发起的预取完成，避免干扰下一次测量
+            pool.waitForDone()
+            pet.animation_cache.get(path, pet.image.sizeHint())
+            pet.next_animation = path
+            start = time.perf_counter()
+            pet.randomAct()
+            warm.append(time.perf_counter() - start)
+            pool.waitForDone()
+        results[f"{name}_miss_ms"] = statistics.median(cold) * 1000
+        results[f"{name}_hit_ms"] = statistics.median(warm) * 1000
+    pet.close()
+    return results
+
+
+@case("talk")
+def bench_talk(args):
+    pet = new_pet()
+    count = 2000 * args.scale
+    random.seed(SEED)
+    start = time.perf_counter()
+    for i in range(count):
+        # 交替普通对话和点击反馈两种状态
+        pet.talk_condition = i & 1
+        pet.talk()
+    elapsed = time.perf_counter() - start
+    pet.close()
+    return {"talk_per_s": count / elapsed}
+
+
+@case("drag")
+def bench_drag(args):
+    from PyQt6.QtCore import Qt, QEvent, QPointF
+    from PyQt6.QtGui import QMouseEvent
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QThreadPool
+    app = application()
+    pet = new_pet()
+    left = Qt.MouseButton.LeftButton
+    origin = QPointF(pet.pos()) + QPointF(100, 150)
+    presses, moves = [], []
+    for _ in range(args.runs):
+        press = QMouseEvent(QEvent.Type.MouseButtonPress, QPointF(100, 150), origin,
+                            left, left, Qt.KeyboardModifier.NoModifier)
+        start = time.perf_counter()
+        QApplication.sendEvent(pet, press)
+        presses.append(time.perf_counter() - start)
+        QThreadPool.globalInstance().waitForDone()
+        # 模拟1000Hz鼠标的一秒拖动
+        for i in range(1000):
+            position = origin + QPointF(i % 200, (i * 7) % 120)
+            move = QMouseEvent(QEvent.Type.MouseMove, QPointF(100, 150), position,
+                               Qt.MouseButton.NoButton, left, Qt.KeyboardModifier.NoModifier)
+            start = time.perf_counter()
+            QApplication.sendEvent(pet, move)
+            moves.append(time.perf_counter() - start)
+        release = QMouseEvent(QEvent.Type.MouseButtonRelease, QPointF(100, 150), origin,
+                              left, Qt.MouseButton.NoButton, Qt.KeyboardModifier.NoModifier)
+        QApplication.sendEvent(pet, release)
+        # 处理拖动期间积压的移动和重绘
+        start = time.perf_counter()
+        app.processEvents()
+        moves[-1] += time.perf_counter() - start
+    pet.close()
+    return {
+        "press_ms": statistics.median(presses) * 1000,
+        "move_p50_us": percentile(moves, 50) * 1e6,
+        "move_p99_us": percentile(moves, 99) * 1e6,
+        "moves_per_s": len(moves) / sum(moves),
+    }
+
+
+@case("story")
+def bench_story(args):
+    from talk_show import LocalStoryGenerator
+    generator = LocalStoryGenerator()
+    random.seed(SEED)
+    count = 20000 * args.scale
+    results = {}
+    for name, user_input in (("plain", ""), ("themed", "小兔子在森林里冒险")):
+        start = time.perf_counter()
+        for _ in range(count):
+            generator.generate_story(user_input, pace=False)
+        results[f"{name}_per_s"] = count / (time.perf_counter() - start)
+    return results
+
+
+@case("client")
+def bench_client(args):
+    application()
+    import talk_show
+    clients = []
+
+    def build():
+        client = talk_show.Client()
+        clients.append(client)
+
+    def reopen():
+        client = talk_show.get_client()
+        client.present()
+        client.repaint()
+        client.close()
+
+    first = timed(build, 1)[0]
+    samples = timed(build, args.runs)
+    for client in clients:
+        client.close()
+        client.deleteLater()
+    reopens = timed(reopen, args.runs + 1)[1:]
+    return {"first_ms": first * 1000, "construct_ms": statistics.median(samples) * 1000,
+            "reopen_ms": statistics.median(reopens) * 1000}
+
+
+def lower_is_better(metric):
+    """
+    指标方向
+
+    Args:
+        metric (str): 指标名
+
+    Returns:
+        bool: 越小越好时返回True
+    """
+    return not metric.endswith("_per_s")
+
+
+def compare(results, baseline, threshold):
+    """
+    与基线对比
+
+    Args:
+        results (dict): 本次结果
+        baseline (dict): 基线文件内容
+        threshold (float): 默认回归阈值，基线文件的thresholds中可按 测试项.指标 单独设置
+
+    Returns:
+        list[tuple]: (指标, 基线值, 本次值, 变化比例, 是否回归)
+    """
+    thresholds = baseline.get("thresholds", {})
+    rows = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            key = f"{name}.{metric}"
+            base = baseline.get("results", {}).get(name, {}).get(metric)
+            if not base:
+                continue
+            change = (value - base) / base
+            worse = change if lower_is_better(metric) else -change
+            rows.append((key, base, value, change, worse > thresholds.get(key, threshold)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="宠物热点路径基准测试套件")
+    parser.add_argument("--only", help="只运行这些测试项，逗号分隔：" + ",".join(CASES))
+    parser.add_argument("--runs", type=int, default=7, help="每个测量的重复次数")
+    parser.add_argument("--scale", type=int, default=1, help="吞吐量测试的工作量倍数")
+    parser.add_argument("--output", help="把结果写入JSON文件")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基线文件")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="默认回归阈值（比例）")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(CASES)
+    random.seed(SEED)
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        results[name] = CASES[name](args)
+        print(f"{name}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    from PyQt6.QtCore import QT_VERSION_STR
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "scale": args.scale,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.update_baseline:
+        previous = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                previous = json.load(f)
+        # 保留手工设置的阈值，只合并本次运行的测试项
+        report["thresholds"] = previous.get("thresholds", {})
+        report["results"] = dict(previous.get("results", {}), **results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"已更新基线: {args.baseline}", file=sys.stderr)
+        return
+    if not os.path.exists(args.baseline):
+        print("没有基线文件，使用 --update-baseline 生成", file=sys.stderr)
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold)
+    print(f"\n{'指标':<36} {'基线':>12} {'本次':>12} {'变化':>8}", file=sys.stderr)
+    for key, base, value, change, regressed in rows:
+        mark = "  回归" if regressed else ""
+        print(f"{key:<36} {base:>12.3f} {value:>12.3f} {change:>+8.1%}{mark}", file=sys.stderr)
+    if any(row[-1] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -40,12 +40,42 @@ if (-not (Get-Command pyinstaller -ErrorAction SilentlyContinue)) {
 # Change to source directory
 Push-Location -Path $src_dir
 
+# Build pre-scaled animation atlases (only changed GIFs are recompiled)
+Write-Host ""
+Write-Host "Building animation atlases..."
+python atlas.py
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "ERROR: Atlas build failed!" -ForegroundColor Red
+    Pop-Location
+    exit 1
+}
+
+# Convert the story corpus to the memory-mapped format
+Write-Host ""
+Write-Host "Converting story corpus..."
+python story_corpus.py story/story_corpus.json story/story_corpus.corpus
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "ERROR: Story corpus conversion failed!" -ForegroundColor Red
+    Pop-Location
+    exit 1
+}
+
+# Generate the asset manifest so the packaged app starts without scanning directories
+Write-Host ""
+Write-Host "Generating asset manifest..."
+python assets.py
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "ERROR: Asset manifest generation failed!" -ForegroundColor Red
+    Pop-Location
+    exit 1
+}
+
 # Run PyInstaller
 Write-Host ""
 Write-Host "Running PyInstaller..."
 Write-Host "This may take a few minutes..."
 
-pyinstaller --name="$exe_name" --onefile --noconsole --distpath="$output_dir" --add-data="images/idle_animation;images/idle_animation" --add-data="images/click;images/click" --add-data="images/talk_background.jpg;images" --add-data="images/favicon.ico;images" --add-data="dialog/dialog.txt;dialog" --exclude-module="torch" --exclude-module="transformers" --exclude-module="numpy" --exclude-module="sympy" --exclude-module="pytorch" --hidden-import="PyQt6.QtCore" --hidden-import="PyQt6.QtGui" --hidden-import="PyQt6.QtWidgets" --hidden-import="PyQt6.sip" --hidden-import="PyQt6.Qt" main.py
+pyinstaller --name="$exe_name" --onefile --noconsole --distpath="$output_dir" --add-data="images/idle_animation;images/idle_animation" --add-data="images/click;images/click" --add-data="images/talk_background.jpg;images" --add-data="images/favicon.ico;images" --add-data="dialog/dialog.txt;dialog" --add-data="atlas;atlas" --add-data="story;story" --add-data="asset_manifest.json;." --exclude-module="torch" --exclude-module="transformers" --exclude-module="numpy" --exclude-module="sympy" --exclude-module="pytorch" --hidden-import="PyQt6.QtCore" --hidden-import="PyQt6.QtGui" --hidden-import="PyQt6.QtWidgets" --hidden-import="PyQt6.sip" --hidden-import="PyQt6.Qt" main.py
 
 $exit_code = $LASTEXITCODE
 
@@ -0,0 +1,689 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from PyQt6 import sip
+from PyQt6.QtGui import QImage, QImageReader, QPainter, QRegion
+from PyQt6.QtCore import QRect, QSize, QObject, QThreadPool, pyqtSignal
+from PyQt6.QtWidgets import QWidget
+
+from scheduler import QtScheduler
+from metrics import get_registry
+
+# 常量定义
+# 解码缓存默认内存预算（字节）
+DEFAULT_CACHE_BUDGET = 64 * 1024 * 1024
+# 帧延时缺省值（毫秒），GIF未声明延时时使用
+DEFAULT_FRAME_DELAY = 100
+# 帧延时下限（毫秒），与主流浏览器对0延时GIF的处理保持一致
+MIN_FRAME_DELAY = 20
+# 延迟统计保留的最近样本数
+LATENCY_SAMPLES = 1024
+# 动画时钟的合并窗口（秒）：相差不超过该值的帧切换在同一次唤醒中完成
+FRAME_COALESCE_WINDOW = 0.01
+# 帧间变化区域的检测粒度（像素）：按该边长的方块比较相邻两帧，变化的方块合并为重绘矩形
+DAMAGE_TILE = 16
+# 变化区域超过帧面积的该比例时整帧重绘，不再拆成多个矩形
+DAMAGE_FULL_RATIO = 0.75
+# 每帧最多的重绘矩形数，超过时重绘外接矩形
+DAMAGE_MAX_RECTS = 4
+
+# 进程内共享的动画时钟
+_shared_clock = None
+# 解码的帧数，按时间求比率即为每秒解码帧数
+FRAMES_DECODED = get_registry().counter("frames_decoded_total", "从GIF解码的动画帧数")
+# 与上一帧完全相同、没有重绘的帧数
+FRAMES_SKIPPED = get_registry().counter("frames_skipped_total", "与上一帧相同而跳过重绘的动画帧数")
+# 帧切换时重绘的像素数，与帧数之比即为每帧平均重绘面积
+PIXELS_PAINTED = get_registry().counter("frame_pixels_painted_total", "动画帧切换时重绘的像素数")
+
+
+def shared_clock():
+    """
+    获取进程内共享的动画时钟
+
+    所有播放控件默认共用这一个时钟，多个宠物同时播放时帧切换合并为同一次唤醒
+
+    Returns:
+        QtScheduler: 动画时钟
+    """
+    global _shared_clock
+    if _shared_clock is None:
+        _shared_clock = QtScheduler(coalesce_window=FRAME_COALESCE_WINDOW)
+        _shared_clock.lateness = get_registry().histogram(
+            "timer_jitter_seconds", "任务实际执行时间与到期时间的偏差", {"scheduler": "frames"})
+    return _shared_clock
+
+
+def frame_damage(previous, current, tile=DAMAGE_TILE):
+    """
+    计算两帧之间发生变化的区域
+
+    按tile高的横带比较，不同的横带再逐行比较，只有不同的行才按tile宽的小段比较；
+    横带中相邻的变化小段合并为一个矩形，左右边界相同的矩形跨横带合并。
+    只操作QImage的像素数据，可以在非GUI线程中调用
+
+    Args:
+        previous (QImage): 上一帧
+        current (QImage): 当前帧，与上一帧尺寸和格式相同
+        tile (int): 检测粒度（像素）
+
+    Returns:
+        tuple[QRect]: 需要重绘的矩形，帧坐标；两帧相同时为空，变化面积超过DAMAGE_FULL_RATIO时为整帧
+    """
+    if previous is current:
+        return ()
+    width, height = current.width(), current.height()
+    full = (QRect(0, 0, width, height),)
+    if previous.size() != current.size() or previous.format() != current.format():
+        return full
+    size = current.sizeInBytes()
+    old = previous.constBits().asstring(size)
+    new = current.constBits().asstring(size)
+    if old == new:
+        return ()
+    stride = current.bytesPerLine()
+    depth = current.depth() // 8
+    row_bytes = width * depth
+    columns = [(x, min(width, x + tile)) for x in range(0, width, tile)]
+    rects = []
+    area = 0
+    above = {}
+    for top in range(0, height, tile):
+        bottom = min(height, top + tile)
+        if old[top * stride:bottom * stride] == new[top * stride:bottom * stride]:
+            above = {}
+            continue
+        changed = [False] * len(columns)
+        for y in range(top, bottom):
+            start = y * stride
+            if old[start:start + row_bytes] == new[start:start + row_bytes]:
+                continue
+            for i, (left, right) in enumerate(columns):
+                if not changed[i]:
+                    a, b = start + left * depth, start + right * depth
+                    changed[i] = old[a:b] != new[a:b]
+        # 合并横带中相邻的变化小段；与上一条横带中左右边界相同的矩形向下延伸
+        spans = {}
+        i = 0
+        while i < len(columns):
+            if not changed[i]:
+                i += 1
+                continue
+            j = i
+            while j + 1 < len(columns) and changed[j + 1]:
+                j += 1
+            left, right = columns[i][0], columns[j][1]
+            rect = above.get((left, right))
+            if rect is None:
+                rect = QRect(left, top, right - left, bottom - top)
+                rects.append(rect)
+            else:
+                rect.setBottom(bottom - 1)
+            spans[(left, right)] = rect
+            area += (right - left) * (bottom - top)
+            i = j + 1
+        above = spans
+    # 矩形太多时逐个绘制的开销超过少混合的像素，改为重绘外接矩形
+    if len(rects) > DAMAGE_MAX_RECTS:
+        bounds = QRect(rects[0])
+        for rect in rects:
+            bounds = bounds.united(rect)
+        rects, area = [bounds], bounds.width() * bounds.height()
+    if area > width * height * DAMAGE_FULL_RATIO:
+        return full
+    return tuple(rects)
+
+
+class Animation:
+    """
+    已解码并缩放好的动画
+
+    保存动画的全部帧（QImage，预乘ARGB32格式，可直接绘制）及每帧的显示时长。
+    每帧相对上一帧（第一帧相对最后一帧）的变化区域在第一次用到时计算并缓存，
+    经预取器加载的动画在工作线程中预先算好
+    """
+
+    def __init__(self, frames, delays, size, nbytes=None):
+        """
+        初始化动画
+
+        Args:
+            frames (list[QImage]): 已缩放的帧
+            delays (list[int]): 每帧显示时长（毫秒）
+            size (QSize): 帧尺寸
+            nbytes (int): 帧占用的字节数，默认按各帧大小累加
+        """
+        self.frames = frames
+        self.delays = delays
+        self.size = size
+        if nbytes is None:
+            nbytes = sum(frame.sizeInBytes() for frame in frames)
+        self.nbytes = nbytes
+        # 一轮的总时长（毫秒）
+        self.duration = sum(delays)
+        self.damage_rects = [None] * len(frames)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def damage(self, index):
+        """
+        切换到第index帧时需要重绘的区域
+
+        Args:
+            index (int): 帧序号
+
+        Returns:
+            tuple[QRect]: 帧坐标中的矩形，与上一帧相同时为空
+        """
+        rects = self.damage_rects[index]
+        if rects is None:
+            rects = self.damage_rects[index] = frame_damage(self.frames[index - 1], self.frames[index])
+        return rects
+
+    def compute_damage(self):
+        """
+        预先计算全部帧的变化区域
+        """
+        for index in range(len(self.frames)):
+            self.damage(index)
+
+
+def decode_animation(path, size):
+    """
+    解码动画文件并缩放到目标尺寸
+
+    使用QImageReader逐帧读取，只操作QImage，因此可以在非GUI线程中调用
+
+    Args:
+        path (str): 动画文件路径
+        size (QSize): 目标尺寸
+
+    Returns:
+        Animation: 解码后的动画，读取失败时帧列表为空
+    """
+    reader = QImageReader(path)
+    reader.setScaledSize(size)
+    frames = []
+    delays = []
+    while True:
+        image = reader.read()
+        if image.isNull():
+            break
+        frames.append(image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied))
+        delay = reader.nextImageDelay()
+        delays.append(max(delay, MIN_FRAME_DELAY) if delay > 0 else DEFAULT_FRAME_DELAY)
+    FRAMES_DECODED.inc(len(frames))
+    return Animation(frames, delays, QSize(size))
+
+
+class AnimationCache:
+    """
+    已解码动画的LRU缓存
+
+    以 (路径, 目标尺寸) 为键缓存解码后的帧，超过内存预算时淘汰最久未使用的动画，
+    避免定时切换动作时反复解码同一个GIF
+
+    Examples:
+        >>> cache = AnimationCache(budget=32 * 1024 * 1024)
+        >>> animation = cache.get('images/click/click.gif', QSize(200, 200))
+        >>> cache.stats()['misses']
+        1
+    """
+
+    def __init__(self, budget=DEFAULT_CACHE_BUDGET, loader=decode_animation):
+        """
+        初始化缓存
+
+        Args:
+            budget (int): 内存预算（字节）
+            loader (callable): 缓存未命中时调用的解码函数，签名为 loader(path, size)
+        """
+        self.budget = budget
+        self.loader = loader
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(path, size):
+        """
+        生成缓存键
+
+        Args:
+            path (str): 动画文件路径
+            size (QSize): 目标尺寸
+
+        Returns:
+            tuple: (规范化路径, 宽, 高)
+        """
+        return (os.path.normcase(os.path.abspath(path)), size.width(), size.height())
+
+    def lookup(self, path, size):
+        """
+        只查询缓存，不触发解码
+
+        Args:
+            path (str): 动画文件路径
+            size (QSize): 目标尺寸
+
+        Returns:
+            Animation: 命中时返回动画，否则返回None
+        """
+        key = self.key(path, size)
+        with self._lock:
+            animation = self._entries.get(key)
+            if animation is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return animation
+
+    def get(self, path, size):
+        """
+        获取动画，未命中时解码并放入缓存
+
+        Args:
+            path (str): 动画文件路径
+            size (QSize): 目标尺寸
+
+        Returns:
+            Animation: 解码后的动画
+        """
+        animation = self.lookup(path, size)
+        if animation is None:
+            animation = self.loader(path, size)
+            self.put(path, size, animation)
+        return animation
+
+    def put(self, path, size, animation):
+        """
+        放入缓存，并按LRU顺序淘汰超出预算的动画
+
+        单个动画超过预算时不缓存
+
+        Args:
+            path (str): 动画文件路径
+            size (QSize): 目标尺寸
+            animation (Animation): 解码后的动画
+        """
+        if animation.nbytes > self.budget:
+            return
+        key = self.key(path, size)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[key] = animation
+            self._bytes += animation.nbytes
+            self._evict(self.budget)
+
+    def trim(self, limit):
+        """
+        把缓存占用压缩到指定字节数以内
+
+        Args:
+            limit (int): 保留的字节数上限
+        """
+        with self._lock:
+            self._evict(limit)
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _evict(self, limit):
+        # 从最久未使用的一端开始淘汰，调用方需持有锁
+        while self._bytes > limit and self._entries:
+            _, animation = self._entries.popitem(last=False)
+            self._bytes -= animation.nbytes
+            self.evictions += 1
+
+    def stats(self):
+        """
+        缓存统计信息
+
+        Returns:
+            dict: 命中数、未命中数、淘汰数、条目数、占用字节数和预算
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "budget": self.budget,
+            }
+
+
+class AnimationPrefetcher(QObject):
+    """
+    动画预取器
+
+    在线程池中提前解码下一个要播放的动画并放入缓存，
+    定时器触发时GUI线程只需从缓存中取出已解码的帧
+    """
+
+    # 预取完成信号，参数为动画路径；由工作线程发出，经队列连接回到GUI线程
+    ready = pyqtSignal(str)
+
+    def __init__(self, cache, size, parent=None, pool=None):
+        """
+        初始化预取器
+
+        Args:
+            cache (AnimationCache): 存放预取结果的缓存
+            size (QSize): 目标尺寸
+            parent (QObject): 父对象
+            pool (QThreadPool): 线程池，默认使用全局线程池
+        """
+        super(AnimationPrefetcher, self).__init__(parent)
+        self.cache = cache
+        self.size = QSize(size)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def prefetch(self, path):
+        """
+        提交预取任务，同一路径同时只会有一个任务在执行
+
+        Args:
+            path (str): 动画文件路径
+        """
+        with self._lock:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+        self.pool.start(lambda: self._load(path))
+
+    def _load(self, path):
+        # 在工作线程中执行：解码（或映射图集）后放入缓存，并算好各帧的变化区域
+        try:
+            self.cache.get(path, self.size).compute_damage()
+        finally:
+            with self._lock:
+                self._pending.discard(path)
+        # 退出程序时预取器可能已随宠物销毁，此时不再通知
+        if not sip.isdeleted(self):
+            self.ready.emit(path)
+
+    def isPending(self, path):
+        """
+        是否仍在预取中
+
+        Args:
+            path (str): 动画文件路径
+
+        Returns:
+            bool: 任务尚未完成时返回True
+        """
+        with self._lock:
+            return path in self._pending
+
+
+class LatencyRecorder:
+    """
+    延迟统计
+
+    保留最近的若干个样本，按需计算分位数
+    """
+
+    def __init__(self, maxlen=LATENCY_SAMPLES):
+        """
+        初始化延迟统计
+
+        Args:
+            maxlen (int): 保留的样本数
+        """
+        self.samples = deque(maxlen=maxlen)
+
+    def record(self, seconds):
+        """
+        记录一个样本
+
+        Args:
+            seconds (float): 耗时（秒）
+        """
+        self.samples.append(seconds)
+
+    def percentile(self, p):
+        """
+        计算分位数
+
+        Args:
+            p (float): 分位（0-100）
+
+        Returns:
+            float: 分位数对应的耗时（毫秒），没有样本时返回0
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[index] * 1000
+
+    def summary(self):
+        """
+        常用分位数汇总
+
+        Returns:
+            dict: 样本数及p50、p99、最大值（毫秒）
+        """
+        return {
+            "count": len(self.samples),
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": max(self.samples) * 1000 if self.samples else 0.0,
+        }
+
+
+class AnimationPlayer(QWidget):
+    """
+    动画播放控件
+
+    播放已解码的Animation，用于替代 QLabel + QMovie 的组合；
+    帧已经提前缩放好，播放时只需按延时切换并绘制。
+    帧切换由动画时钟驱动，播放控件本身作为时钟任务的间隔策略，按当前帧的延时安排下一次切换。
+    切换帧时只重绘与上一帧不同的矩形，与上一帧相同的帧不重绘；在半透明窗口上
+    每次重绘都要重新混合整个区域，只重绘变化部分可以省下大部分绘制开销。
+    设置了帧率调节器（playback.PlaybackGovernor）时，帧间隔不短于调节器给出的帧预算，
+    切换时按实际经过的时间跳过中间的帧，降帧时动画速度不变
+    """
+
+    def __init__(self, parent=None, clock=None):
+        """
+        初始化播放控件
+
+        Args:
+            parent (QWidget): 父窗口部件
+            clock (QtScheduler): 动画时钟，默认使用进程内共享的时钟
+        """
+        super(AnimationPlayer, self).__init__(parent)
+        self.animation = None
+        self.frame_index = 0
+        self.dirty = None
+        # 帧率调节器，以及当前帧开始显示的时间（动画时钟的时间）
+        self.governor = None
+        self.switched_at = 0.0
+        self.clock = clock or shared_clock()
+        self.job_name = f"frame-{id(self)}"
+        # 控件销毁时从时钟中移除，避免回调已销毁的对象
+        clock, name = self.clock, self.job_name
+        self.destroyed.connect(lambda: clock.cancel(name))
+
+    def setAnimation(self, animation):
+        """
+        设置要播放的动画，从第一帧开始
+
+        Args:
+            animation (Animation): 解码后的动画
+        """
+        self.stop()
+        self.animation = animation
+        self.frame_index = 0
+        self.updateGeometry()
+        self.update()
+
+    def setGovernor(self, governor):
+        """
+        设置帧率调节器
+
+        Args:
+            governor (PlaybackGovernor): 帧率调节器，None表示始终按动画自身的帧延时播放
+        """
+        if self.governor is not None:
+            self.governor.detach(self)
+        self.governor = governor
+        self.switched_at = self.clock.clock.now()
+        if governor is not None:
+            governor.attach(self)
+
+    def start(self):
+        """
+        开始播放
+        """
+        if self.animation is not None and len(self.animation) > 1:
+            self.switched_at = self.clock.clock.now()
+            self.clock.schedule(self.job_name, self.nextFrame, self, self.next_delay(True))
+
+    def reschedule(self):
+        """
+        帧预算提高时由调节器调用：按当前帧自身的延时重新安排下一次切换
+        """
+        if not self.isPlaying():
+            return
+        elapsed = self.clock.clock.now() - self.switched_at
+        remaining = self.animation.delays[self.frame_index] / 1000 - elapsed
+        self.clock.schedule(self.job_name, self.nextFrame, self, max(0.0, remaining))
+
+    def stop(self):
+        """
+        停止播放，保持当前帧
+        """
+        self.clock.cancel(self.job_name)
+
+    def isPlaying(self):
+        """
+        是否正在播放
+
+        Returns:
+            bool: 正在播放时返回True
+        """
+        return self.job_name in self.clock.jobs
+
+    def nextFrame(self):
+        """
+        切换到下一帧，由动画时钟调用
+        """
+        if self.animation is None or not len(self.animation):
+            return
+        steps = self.framesDue() if self.governor is not None else 1
+        self.frame_index = (self.frame_index + steps) % len(self.animation)
+        if steps > 1:
+            # 跳过了中间的帧，变化区域不再是相邻两帧之差，整帧重绘
+            self.dirty = None
+            self.update()
+            return
+        rects = self.animation.damage(self.frame_index)
+        if not rects:
+            FRAMES_SKIPPED.inc()
+            return
+        top = self.frameTop()
+        region = QRegion()
+        region.setRects([rect.translated(0, top) for rect in rects])
+        PIXELS_PAINTED.inc(sum(rect.width() * rect.height() for rect in rects))
+        self.dirty = (region, rects)
+        self.update(region)
+
+    def framesDue(self):
+        """
+        按距上次切换经过的时间计算应当前进的帧数，至少前进一帧
+
+        Returns:
+            int: 帧数
+        """
+        elapsed = self.clock.clock.now() - self.switched_at
+        delays = self.animation.delays
+        count = len(delays)
+        # 先跳过整轮，再逐帧扣除显示时长
+        loops = int(elapsed * 1000 // self.animation.duration)
+        consumed = loops * self.animation.duration / 1000
+        steps = loops * count
+        index = self.frame_index
+        while True:
+            delay = delays[index] / 1000
+            if steps and consumed + delay > elapsed:
+                break
+            consumed += delay
+            steps += 1
+            index = (index + 1) % count
+        # 保留不足一帧的余量，降帧时动画进度与经过的时间一致
+        self.switched_at += consumed
+        return steps
+
+    def next_delay(self, succeeded):
+        """
+        时钟任务的间隔策略：当前帧的显示时长，有帧率调节器时不短于帧预算的最短帧间隔
+
+        Args:
+            succeeded (bool): 本次切换是否成功
+
+        Returns:
+            float: 等待秒数
+        """
+        delay = self.animation.delays[self.frame_index] / 1000
+        if self.governor is not None:
+            delay = max(delay, self.governor.frame_interval())
+        return delay
+
+    def currentFrame(self):
+        """
+        当前帧
+
+        Returns:
+            QImage: 当前帧，没有动画时返回None
+        """
+        if self.animation is None or not len(self.animation):
+            return None
+        return self.animation.frames[self.frame_index]
+
+    def frameTop(self):
+        """
+        帧在控件中的纵向位置，与QLabel默认对齐方式一致：水平靠左、垂直居中
+
+        Returns:
+            int: 帧顶部的y坐标
+        """
+        return (self.height() - self.animation.size.height()) // 2
+
+    def sizeHint(self):
+        if self.animation is not None:
+            return QSize(self.animation.size)
+        return super(AnimationPlayer, self).sizeHint()
+
+    def paintEvent(self, event):
+        frame = self.currentFrame()
+        if frame is None:
+            return
+        top = self.frameTop()
+        painter = QPainter(self)
+        region = event.region()
+        if self.dirty is not None and region == self.dirty[0]:
+            # 帧切换引起的更新：逐个矩形绘制，不使用多矩形裁剪
+            painter.setClipping(False)
+            for rect in self.dirty[1]:
+                painter.drawImage(rect.translated(0, top), frame, rect)
+        else:
+            painter.drawImage(0, top, frame)
+        self.dirty = None
+        painter.end()
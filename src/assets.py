@@ -0,0 +1,355 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from PyQt6.QtGui import QImageReader, QPixmap
+from PyQt6.QtCore import QThreadPool
+
+# 常量定义
+# 资源清单文件名（位于资源根目录）
+MANIFEST_NAME = "asset_manifest.json"
+MANIFEST_VERSION = 1
+# 清单收录的资源目录（相对资源根目录）
+ASSET_DIRS = ["images", "dialog", "story"]
+# 需要记录帧数和尺寸的图片扩展名
+IMAGE_SUFFIXES = (".gif", ".png", ".jpg", ".jpeg", ".ico")
+# 计算内容哈希时每次读取的字节数
+HASH_CHUNK = 1 << 20
+
+
+def resource_path(relative_path):
+    """
+    获取资源文件的绝对路径，支持PyInstaller打包
+
+    Args:
+        relative_path (str): 相对路径
+
+    Returns:
+        str: 绝对路径
+
+    Examples:
+        >>> resource_path('images/talk_background.jpg')
+        'e:/desktop-pet/src/images/talk_background.jpg'
+    """
+    try:
+        # PyInstaller创建临时文件夹，将路径存储在_MEIPASS中
+        base_path = sys._MEIPASS
+    except Exception:
+        # 如果不是打包后的exe，使用当前文件所在目录
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, relative_path)
+
+
+def describe(path, stat=None):
+    """
+    生成单个资源的清单条目
+
+    Args:
+        path (str): 文件路径
+        stat (os.stat_result): 已获取的文件状态，避免重复stat
+
+    Returns:
+        dict: size、mtime、sha256，图片另有frames、width、height
+    """
+    stat = stat or os.stat(path)
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            sha.update(chunk)
+    entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": sha.hexdigest()}
+    if path.lower().endswith(IMAGE_SUFFIXES):
+        reader = QImageReader(path)
+        size = reader.size()
+        entry["frames"] = max(1, reader.imageCount())
+        entry["width"] = size.width()
+        entry["height"] = size.height()
+    return entry
+
+
+class AssetService:
+    """
+    资源服务
+
+    统一解析资源路径，并维护一份持久化的资源清单（路径、大小、修改时间、内容哈希、
+    帧数和尺寸）。启动时只读取清单：判断文件是否存在不访问文件系统，
+    列出目录只需对目录本身做一次stat，不再扫描目录。
+    清单缺失或过期时先按原方式访问文件系统，再在后台重建清单
+
+    Examples:
+        >>> assets = get_assets()
+        >>> assets.list('images/idle_animation', ('.gif',))
+        ['e:/desktop-pet/src/images/idle_animation/default.gif', ...]
+        >>> assets.entry('images/click/click.gif')['frames']
+        12
+    """
+
+    def __init__(self, root=None, manifest_path=None):
+        """
+        初始化资源服务并读取清单
+
+        Args:
+            root (str): 资源根目录，默认为resource_path('')
+            manifest_path (str): 清单路径，默认为资源根目录下的asset_manifest.json
+        """
+        self.root = root or resource_path("")
+        self.manifest_path = manifest_path or os.path.join(self.root, MANIFEST_NAME)
+        self.files = {}
+        self.dirs = {}
+        self._lock = threading.Lock()
+        self._refreshing = False
+        # 已解码的图片，同一资源在进程内只解码一次
+        self.pixmaps = {}
+        self.loaded = self.load()
+        # 打包后的资源不会变化，且解压时修改时间会被重置，直接信任随包生成的清单
+        self.trusted = self.loaded and getattr(sys, "frozen", False)
+        # 运行中发现清单与文件不一致时置位，由refresh重建
+        self.stale = not self.loaded
+
+    def path(self, relative_path):
+        """
+        资源的绝对路径
+
+        Args:
+            relative_path (str): 相对资源根目录的路径
+
+        Returns:
+            str: 绝对路径
+        """
+        return os.path.join(self.root, relative_path)
+
+    def pixmap(self, relative_path):
+        """
+        获取已解码的图片，第一次调用时解码并缓存，只能在GUI线程中调用
+
+        Args:
+            relative_path (str): 相对路径
+
+        Returns:
+            QPixmap: 图片，文件不存在时为空图片（也会被缓存）
+
+        Examples:
+            >>> get_assets().pixmap('images/talk_background.jpg').size()
+            PyQt6.QtCore.QSize(600, 337)
+        """
+        pixmap = self.pixmaps.get(relative_path)
+        if pixmap is None:
+            pixmap = QPixmap(self.path(relative_path))
+            self.pixmaps[relative_path] = pixmap
+        return pixmap
+
+    def load(self):
+        """
+        读取清单
+
+        Returns:
+            bool: 清单存在且版本一致时返回True
+        """
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != MANIFEST_VERSION:
+            return False
+        self.files = data.get("files", {})
+        self.dirs = data.get("dirs", {})
+        return True
+
+    def save(self):
+        """
+        写入清单（先写临时文件再替换）
+
+        Returns:
+            bool: 写入成功时返回True，资源目录只读时返回False
+        """
+        with self._lock:
+            data = {"version": MANIFEST_VERSION, "files": self.files, "dirs": self.dirs}
+        temp = self.manifest_path + ".tmp"
+        try:
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(temp, self.manifest_path)
+            return True
+        except OSError as e:
+            print(f"写入资源清单失败: {e}")
+            return False
+
+    def exists(self, relative_path):
+        """
+        资源是否存在
+
+        打包后的程序直接查清单，不访问文件系统；未打包时资源可能随时增删，
+        以文件系统为准，与清单不一致时标记清单过期
+
+        Args:
+            relative_path (str): 相对路径
+
+        Returns:
+            bool: 存在时返回True
+        """
+        if self.trusted:
+            return relative_path in self.files
+        exists = os.path.exists(self.path(relative_path))
+        if self.loaded and exists != (relative_path in self.files):
+            self.stale = True
+        return exists
+
+    def entry(self, relative_path):
+        """
+        获取资源的清单条目，用一次stat校验大小和修改时间
+
+        校验不通过时重新生成该条目；打包后的程序直接使用清单中的条目
+
+        Args:
+            relative_path (str): 相对路径
+
+        Returns:
+            dict: 清单条目，文件不存在时返回None
+        """
+        if self.trusted and relative_path in self.files:
+            return self.files[relative_path]
+        path = self.path(relative_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                if self.files.pop(relative_path, None) is not None:
+                    self.stale = True
+            return None
+        entry = self.files.get(relative_path)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+            return entry
+        entry = describe(path, stat)
+        with self._lock:
+            self.files[relative_path] = entry
+            self.stale = True
+        return entry
+
+    def mtime(self, relative_path):
+        """
+        资源的修改时间，只做一次stat，不计算哈希
+
+        Args:
+            relative_path (str): 相对路径
+
+        Returns:
+            int: 纳秒时间戳，文件不存在时返回None
+        """
+        if self.trusted and relative_path in self.files:
+            return self.files[relative_path]["mtime"]
+        try:
+            return os.stat(self.path(relative_path)).st_mtime_ns
+        except OSError:
+            return None
+
+    def list(self, relative_dir, suffixes=None):
+        """
+        列出目录下的资源
+
+        目录的修改时间与清单一致时直接使用清单，否则扫描目录
+
+        Args:
+            relative_dir (str): 相对目录
+            suffixes (tuple[str]): 只保留这些扩展名（小写），默认不过滤
+
+        Returns:
+            list[str]: 按文件名排序的绝对路径
+        """
+        directory = self.path(relative_dir)
+        prefix = relative_dir.rstrip("/") + "/"
+        if self.trusted and relative_dir in self.dirs:
+            mtime = self.dirs[relative_dir]
+        else:
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                return []
+        if self.dirs.get(relative_dir) == mtime:
+            names = [key[len(prefix):] for key in self.files
+                     if key.startswith(prefix) and "/" not in key[len(prefix):]]
+        else:
+            names = [name for name in os.listdir(directory)
+                     if os.path.isfile(os.path.join(directory, name))]
+            self.stale = True
+        if suffixes:
+            names = [name for name in names if name.lower().endswith(suffixes)]
+        return [os.path.join(directory, name) for name in sorted(names)]
+
+    def refresh(self):
+        """
+        扫描资源目录重建清单并写入磁盘
+
+        大小和修改时间未变的文件沿用旧条目，不重新计算哈希
+
+        Returns:
+            int: 清单中的文件数
+        """
+        files = {}
+        dirs = {}
+        for top in ASSET_DIRS:
+            for directory, subdirs, names in os.walk(self.path(top)):
+                subdirs.sort()
+                relative_dir = os.path.relpath(directory, self.root).replace(os.sep, "/")
+                dirs[relative_dir] = os.stat(directory).st_mtime_ns
+                for name in sorted(names):
+                    path = os.path.join(directory, name)
+                    key = f"{relative_dir}/{name}"
+                    stat = os.stat(path)
+                    entry = self.files.get(key)
+                    if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime_ns:
+                        entry = describe(path, stat)
+                    files[key] = entry
+        with self._lock:
+            self.files = files
+            self.dirs = dirs
+            self.loaded = True
+            self.stale = False
+        self.save()
+        return len(files)
+
+    def refresh_async(self, pool=None):
+        """
+        清单缺失或过期时在线程池中重建清单，已在重建时忽略
+
+        Args:
+            pool (QThreadPool): 线程池，默认使用全局线程池
+        """
+        with self._lock:
+            if not self.stale or self._refreshing:
+                return
+            self._refreshing = True
+        (pool or QThreadPool.globalInstance()).start(self._refresh_in_background)
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except OSError as e:
+            print(f"重建资源清单失败: {e}")
+        finally:
+            self._refreshing = False
+
+
+_assets = None
+
+
+def get_assets():
+    """
+    获取全局资源服务，第一次调用时读取清单
+
+    Returns:
+        AssetService: 资源服务
+    """
+    global _assets
+    if _assets is None:
+        _assets = AssetService()
+    return _assets
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="扫描资源目录，生成资源清单")
+    parser.add_argument("--root", help="资源根目录，默认为本文件所在目录")
+    args = parser.parse_args()
+    service = AssetService(args.root)
+    print(f"资源清单: {service.manifest_path}，共{service.refresh()}个文件")
@@ -0,0 +1,269 @@
+import os
+import sys
+import mmap
+import struct
+import hashlib
+import argparse
+from PyQt6.QtGui import QImage
+from PyQt6.QtCore import QSize
+
+from animation import Animation, decode_animation
+from assets import resource_path
+
+# 常量定义
+# 需要编译成图集的动画目录（相对资源根目录）
+ATLAS_SOURCE_DIRS = ["images/idle_animation", "images/click"]
+# 图集输出目录（相对资源根目录）
+ATLAS_DIR = "atlas"
+# 图集文件扩展名
+ATLAS_SUFFIX = ".atlas"
+# 默认编译尺寸，与宠物显示尺寸一致
+ATLAS_DEFAULT_SIZE = (200, 200)
+
+# 图集文件格式（小端）：
+#   文件头   magic(8s) version(I) width(I) height(I) stride(I)
+#            frame_count(I) slot_count(I) byte_order(I) source_size(Q) source_sha256(32s)
+#   帧索引   frame_count * (slot(I) delay(I))，相同画面的帧共用一个slot
+#   像素数据 按 ATLAS_ALIGN 对齐，slot_count 个 height*stride 字节的预乘ARGB32画面
+# 像素不压缩：帧直接引用映射内存，加载时不解码、不分配，多个进程共享同一份页面缓存。
+# 代价是文件较大，只有相同画面的帧会合并；内置动画按200x200编译后约为源GIF的4倍（2~7倍）
+ATLAS_MAGIC = b"PETATLAS"
+ATLAS_VERSION = 1
+ATLAS_ALIGN = 64
+HEADER = struct.Struct("<8sIIIIIIIQ32s")
+FRAME_ENTRY = struct.Struct("<II")
+# QImage的ARGB32按本机字节序存放32位整数，记录字节序以防跨平台误用
+BYTE_ORDER = 1 if sys.byteorder == "little" else 2
+
+
+def atlas_path(source, size, root=None):
+    """
+    计算源动画对应的图集文件路径
+
+    Args:
+        source (str): 源GIF路径
+        size (QSize): 编译尺寸
+        root (str): 资源根目录，默认为resource_path('')
+
+    Returns:
+        str: 图集路径，如 atlas/idle_animation/default.200x200.atlas
+
+    Examples:
+        >>> atlas_path('images/click/click.gif', QSize(200, 200))
+        'e:/desktop-pet/src/atlas/click/click.200x200.atlas'
+    """
+    root = root or resource_path("")
+    group = os.path.basename(os.path.dirname(os.path.abspath(source)))
+    name = os.path.splitext(os.path.basename(source))[0]
+    filename = f"{name}.{size.width()}x{size.height()}{ATLAS_SUFFIX}"
+    return os.path.join(root, ATLAS_DIR, group, filename)
+
+
+def _digest(path):
+    # 源文件内容哈希，用于判断是否需要重新编译
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.digest()
+
+
+def _read_header(path):
+    # 读取图集文件头，格式不符时返回None
+    try:
+        with open(path, "rb") as f:
+            data = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(data) != HEADER.size:
+        return None
+    header = HEADER.unpack(data)
+    if header[0] != ATLAS_MAGIC or header[1] != ATLAS_VERSION or header[7] != BYTE_ORDER:
+        return None
+    return header
+
+
+def is_stale(source, target, size):
+    """
+    判断图集是否需要重新编译
+
+    图集不存在、格式版本/尺寸不符或源文件内容发生变化时需要重新编译
+
+    Args:
+        source (str): 源GIF路径
+        target (str): 图集路径
+        size (QSize): 编译尺寸
+
+    Returns:
+        bool: 需要重新编译时返回True
+    """
+    header = _read_header(target)
+    if header is None:
+        return True
+    if (header[2], header[3]) != (size.width(), size.height()):
+        return True
+    if header[8] != os.path.getsize(source):
+        return True
+    return header[9] != _digest(source)
+
+
+def compile_atlas(source, target, size):
+    """
+    把GIF编译成预缩放的图集文件
+
+    相同输入总是产生逐字节相同的输出：文件中不记录时间戳等易变信息。
+    像素以未压缩的ARGB32存放以便直接映射，文件约为源GIF的数倍大小（见文件格式说明）
+
+    Args:
+        source (str): 源GIF路径
+        target (str): 图集路径
+        size (QSize): 编译尺寸
+
+    Returns:
+        int: 写入的字节数；旧图集正被映射而无法替换时保留旧图集，返回0
+    """
+    animation = decode_animation(source, size)
+    if not len(animation):
+        raise ValueError(f"无法解码动画: {source}")
+    stride = animation.frames[0].bytesPerLine()
+    slots = {}
+    pixels = []
+    entries = []
+    for frame, delay in zip(animation.frames, animation.delays):
+        data = frame.constBits().asstring(frame.sizeInBytes())
+        slot = slots.get(data)
+        if slot is None:
+            slot = slots[data] = len(pixels)
+            pixels.append(data)
+        entries.append(FRAME_ENTRY.pack(slot, delay))
+    header = HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, size.width(), size.height(), stride,
+                         len(entries), len(pixels), BYTE_ORDER,
+                         os.path.getsize(source), _digest(source))
+    head = header + b"".join(entries)
+    head += b"\0" * (-len(head) % ATLAS_ALIGN)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # 先写临时文件再替换，避免运行中的宠物映射到写了一半的文件
+    temp = target + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(head)
+        for data in pixels:
+            f.write(data)
+    try:
+        os.replace(temp, target)
+    except PermissionError:
+        # Windows下正在运行的宠物映射着旧图集时不能替换；保留旧图集，运行时按源文件大小校验，不会用错
+        os.remove(temp)
+        print(f"图集正在使用中，保留旧图集: {target}")
+        return 0
+    return len(head) + sum(len(data) for data in pixels)
+
+
+def load_atlas(path):
+    """
+    以内存映射方式打开图集
+
+    帧直接引用映射内存，不做解码和缩放；页面由操作系统按需读入
+
+    Args:
+        path (str): 图集路径
+
+    Returns:
+        Animation: 图集中的动画，文件无效时返回None
+    """
+    header = _read_header(path)
+    if header is None:
+        return None
+    _, _, width, height, stride, frame_count, slot_count, _, _, _ = header
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    offset = HEADER.size + frame_count * FRAME_ENTRY.size
+    offset += -offset % ATLAS_ALIGN
+    slot_bytes = height * stride
+    if len(mapping) != offset + slot_count * slot_bytes:
+        view.release()
+        mapping.close()
+        return None
+    images = []
+    for slot in range(slot_count):
+        start = offset + slot * slot_bytes
+        images.append(QImage(view[start:start + slot_bytes], width, height, stride,
+                             QImage.Format.Format_ARGB32_Premultiplied))
+    frames = []
+    delays = []
+    for i in range(frame_count):
+        slot, delay = FRAME_ENTRY.unpack_from(mapping, HEADER.size + i * FRAME_ENTRY.size)
+        frames.append(images[slot])
+        delays.append(delay)
+    animation = Animation(frames, delays, QSize(width, height), nbytes=slot_count * slot_bytes)
+    # 帧引用映射内存，映射需与动画同生命周期
+    animation.mapping = mapping
+    return animation
+
+
+def load_animation(path, size):
+    """
+    加载动画：优先使用图集，图集缺失或与源文件大小不符时回退到解码GIF
+
+    可作为AnimationCache的loader使用
+
+    Args:
+        path (str): 源GIF路径
+        size (QSize): 目标尺寸
+
+    Returns:
+        Animation: 动画
+    """
+    target = atlas_path(path, size)
+    header = _read_header(target)
+    # 运行时只做廉价校验（尺寸与源文件大小），内容哈希留给编译步骤
+    if header is not None and (header[2], header[3]) == (size.width(), size.height()):
+        try:
+            if header[8] == os.path.getsize(path):
+                animation = load_atlas(target)
+                if animation is not None:
+                    return animation
+        except OSError:
+            pass
+    return decode_animation(path, size)
+
+
+def build_all(size, force=False, root=None):
+    """
+    编译所有动画目录下的GIF
+
+    Args:
+        size (QSize): 编译尺寸
+        force (bool): 是否忽略缓存强制重新编译
+        root (str): 资源根目录
+
+    Returns:
+        list[tuple]: (源路径, 图集路径, 是否重新编译；无法替换旧图集时为False)
+    """
+    root = root or resource_path("")
+    results = []
+    for directory in ATLAS_SOURCE_DIRS:
+        source_dir = os.path.join(root, directory)
+        if not os.path.isdir(source_dir):
+            continue
+        for name in sorted(os.listdir(source_dir)):
+            if not name.lower().endswith(".gif"):
+                continue
+            source = os.path.join(source_dir, name)
+            target = atlas_path(source, size, root)
+            rebuilt = force or is_stale(source, target, size)
+            if rebuilt:
+                rebuilt = compile_atlas(source, target, size) > 0
+            results.append((source, target, rebuilt))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="把宠物动画编译成预缩放的图集")
+    parser.add_argument("--size", default="%dx%d" % ATLAS_DEFAULT_SIZE, help="编译尺寸，如200x200")
+    parser.add_argument("--force", action="store_true", help="强制重新编译全部图集")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    for source, target, rebuilt in build_all(QSize(width, height), args.force):
+        state = "编译" if rebuilt else "跳过"
+        print(f"{state}: {os.path.relpath(source)} -> {os.path.relpath(target)}")
@@ -0,0 +1,388 @@
+import os
+import codecs
+import math
+import random
+import threading
+import zlib
+from array import array
+from bisect import bisect_right
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QThreadPool, QTimer, QFileSystemWatcher, pyqtSignal
+
+# 常量定义
+# 建立索引时每次读取的字节数
+READ_CHUNK = 1 << 20
+# 变化检测的分块大小（字节）：文件变化后从第一个内容不同的块开始重建索引
+CHECK_BLOCK = 1 << 16
+# 检测编码时读取的字节数
+ENCODING_PROBE = 1 << 16
+# 文件变化后等待多久再重建索引（毫秒），合并编辑器的连续写入
+RELOAD_DELAY_MS = 300
+# 未建好索引时按随机字节位置抽样，单次读取的字节数
+FALLBACK_READ = 4096
+# 行内权重分隔符：“文本<TAB>权重”
+WEIGHT_SEPARATOR = b"\t"
+# 兼容旧版本的默认编码
+LEGACY_ENCODING = "gbk"
+
+
+class DialogIndex:
+    """
+    对话文件的行偏移索引
+
+    只记录非空行的起止位置（以及可选的权重前缀和），不保存文本本身
+    """
+
+    def __init__(self):
+        self.starts = array("Q")
+        self.ends = array("Q")
+        # 各行权重的前缀和；所有行都没有权重时为None，按均匀分布抽样
+        self.cumulative = None
+        self.weights = array("d")
+        self.weighted = False
+        # 建立索引时文件的大小和各块的CRC，用于判断下次需要从哪里开始重建
+        self.size = 0
+        self.blocks = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def truncate(self, offset):
+        """
+        丢弃起点不早于offset的行，以及跨过offset的最后一行
+
+        Args:
+            offset (int): 文件中第一个发生变化的位置
+
+        Returns:
+            int: 需要从这个位置开始重新扫描
+        """
+        keep = bisect_right(self.starts, offset)
+        # 最后一行可能跨过变化位置，一并重新扫描
+        if keep and self.ends[keep - 1] >= offset:
+            keep -= 1
+        del self.starts[keep:]
+        del self.ends[keep:]
+        del self.weights[keep:]
+        self.weighted = any(w != 1.0 for w in self.weights)
+        return self.ends[keep - 1] + 1 if keep else 0
+
+    def add(self, start, end, line):
+        """
+        加入一行，跳过空行并解析行尾的权重
+
+        Args:
+            start (int): 行首位置
+            end (int): 行尾位置（不含换行符）
+            line (bytes): 行内容
+        """
+        text = line.strip()
+        if not text:
+            return
+        weight = 1.0
+        separator = text.rfind(WEIGHT_SEPARATOR)
+        if separator != -1:
+            try:
+                weight = float(text[separator + 1:])
+            except ValueError:
+                weight = 1.0
+            else:
+                # nan、inf和负数按无法解析处理，否则会破坏权重前缀和
+                if not math.isfinite(weight) or weight < 0:
+                    weight = 1.0
+                elif weight == 0:
+                    return
+                else:
+                    self.weighted = True
+        self.starts.append(start)
+        self.ends.append(end)
+        self.weights.append(weight)
+
+    def finish(self):
+        """
+        扫描结束后计算权重前缀和
+        """
+        if not self.weighted:
+            self.cumulative = None
+            return
+        total = 0.0
+        cumulative = array("d")
+        for weight in self.weights:
+            total += weight
+            cumulative.append(total)
+        self.cumulative = cumulative
+
+
+def detect_encoding(path):
+    """
+    检测对话文件编码
+
+    有UTF-8 BOM或前64KB是合法UTF-8时按UTF-8读取，否则按旧版本使用的GBK读取
+
+    Args:
+        path (str): 文件路径
+
+    Returns:
+        str: 编码名
+    """
+    with open(path, "rb") as f:
+        head = f.read(ENCODING_PROBE)
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return LEGACY_ENCODING
+
+
+def block_checksums(path, size):
+    """
+    计算文件各块的CRC
+
+    Args:
+        path (str): 文件路径
+        size (int): 文件大小
+
+    Returns:
+        list[int]: 每CHECK_BLOCK字节一个CRC
+    """
+    blocks = []
+    with open(path, "rb") as f:
+        for _ in range(0, size, CHECK_BLOCK):
+            blocks.append(zlib.crc32(f.read(CHECK_BLOCK)))
+    return blocks
+
+
+def scan_lines(path, index, offset, size):
+    """
+    从offset开始扫描文件，把每一行加入索引
+
+    GBK和UTF-8的多字节字符都不会包含换行符和制表符的字节，可以直接按字节切分
+
+    Args:
+        path (str): 文件路径
+        index (DialogIndex): 要追加的索引
+        offset (int): 开始位置，必须是行首
+        size (int): 文件大小
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        pending = b""
+        line_start = offset
+        position = offset
+        while position < size:
+            chunk = f.read(min(READ_CHUNK, size - position))
+            if not chunk:
+                break
+            data = pending + chunk
+            base = position - len(pending)
+            cursor = 0
+            while True:
+                newline = data.find(b"\n", cursor)
+                if newline == -1:
+                    break
+                index.add(line_start, base + newline, data[cursor:newline])
+                cursor = newline + 1
+                line_start = base + cursor
+            pending = data[cursor:]
+            position += len(chunk)
+        if pending:
+            index.add(line_start, line_start + len(pending), pending)
+
+
+class DialogStore(QObject):
+    """
+    对话语料
+
+    在线程池中为对话文件建立行偏移索引，抽样时只读取被选中的一行，
+    启动耗时和内存与文件行数无关；可选的行内权重（“文本<TAB>权重”）用于加权抽样。
+    监视文件变化，只从第一个发生变化的位置开始重建索引，重建同样在线程池中完成
+
+    Examples:
+        >>> store = DialogStore('dialog/dialog.txt')
+        >>> store.sample()
+        '给岁月以文明，而不是给文明以岁月。'
+    """
+
+    # 索引（重新）建立完成，参数为有效行数
+    reindexed = pyqtSignal(int)
+
+    def __init__(self, path, encoding=None, watch=True, parent=None, pool=None):
+        """
+        初始化对话语料，索引在后台建立
+
+        Args:
+            path (str): 对话文件路径
+            encoding (str): 文件编码，默认自动检测（UTF-8或GBK）
+            watch (bool): 是否监视文件变化并自动重建索引
+            parent (QObject): 父对象
+            pool (QThreadPool): 线程池，默认使用全局线程池
+        """
+        super(DialogStore, self).__init__(parent)
+        self.path = path
+        self.encoding = encoding
+        self.pool = pool or QThreadPool.globalInstance()
+        self._index = None
+        self._lock = threading.Lock()
+        self._building = False
+        self._dirty = False
+        self.watcher = None
+        if watch:
+            self.watcher = QFileSystemWatcher([path], self)
+            self.watcher.fileChanged.connect(self.on_file_changed)
+            self.reload_timer = QTimer(self)
+            self.reload_timer.setSingleShot(True)
+            self.reload_timer.timeout.connect(self.reload)
+        self.reload()
+
+    def __len__(self):
+        index = self._index
+        return len(index) if index is not None else 0
+
+    def isReady(self):
+        """
+        索引是否已建立
+
+        Returns:
+            bool: 已建立时返回True
+        """
+        return self._index is not None
+
+    def on_file_changed(self, path):
+        """
+        文件变化时延迟重建索引
+
+        有的编辑器以替换文件的方式保存，监视会被移除，需要重新加入
+
+        Args:
+            path (str): 发生变化的文件
+        """
+        if os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+        self.reload_timer.start(RELOAD_DELAY_MS)
+
+    def reload(self):
+        """
+        在线程池中（重新）建立索引，正在建立时合并为下一次
+        """
+        with self._lock:
+            if self._building:
+                self._dirty = True
+                return
+            self._building = True
+        self.pool.start(self._build)
+
+    def _build(self):
+        # 在工作线程中执行：增量或全量建立索引，完成后替换引用
+        while True:
+            try:
+                index = self._rebuild(self._index)
+            except OSError as e:
+                print(f"读取对话文件失败: {e}")
+                index = None
+            with self._lock:
+                if index is not None:
+                    self._index = index
+                if not self._dirty:
+                    self._building = False
+                    break
+                self._dirty = False
+        # 建立索引期间对象可能已被销毁，不再发出信号
+        if index is not None and not sip.isdeleted(self):
+            self.reindexed.emit(len(index))
+
+    def _rebuild(self, previous):
+        # 对比块CRC找到第一个变化的位置，复制旧索引中之前的行，只扫描之后的部分
+        if self.encoding is None:
+            self.encoding = detect_encoding(self.path)
+        size = os.path.getsize(self.path)
+        blocks = block_checksums(self.path, size)
+        index = DialogIndex()
+        offset = 0
+        if previous is not None:
+            changed = 0
+            while (changed < len(blocks) and changed < len(previous.blocks)
+                   and blocks[changed] == previous.blocks[changed]):
+                changed += 1
+            first_change = min(changed * CHECK_BLOCK, size, previous.size)
+            if first_change == size == previous.size:
+                return previous
+            index.starts = array("Q", previous.starts)
+            index.ends = array("Q", previous.ends)
+            index.weights = array("d", previous.weights)
+            offset = index.truncate(first_change)
+        scan_lines(self.path, index, offset, size)
+        index.finish()
+        index.size = size
+        index.blocks = blocks
+        return index
+
+    def sample(self, rng=random):
+        """
+        随机抽取一行对话
+
+        索引建立前按随机字节位置抽取所在行（行越长越容易被抽中），
+        索引建立后按行均匀或按权重抽取
+
+        Args:
+            rng (random.Random): 随机数生成器
+
+        Returns:
+            str: 对话文本，文件为空或无法读取时返回空字符串
+        """
+        index = self._index
+        try:
+            if index is None:
+                return self._sample_unindexed(rng)
+            if not len(index):
+                return ""
+            if index.cumulative is not None:
+                i = bisect_right(index.cumulative, rng.random() * index.cumulative[-1])
+                i = min(i, len(index) - 1)
+            else:
+                i = int(rng.random() * len(index))
+            return self._read(index.starts[i], index.ends[i], index.weighted)
+        except OSError:
+            return ""
+
+    def _read(self, start, end, weighted):
+        # 读取一行并去掉权重
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            line = f.read(end - start).strip()
+        if weighted:
+            separator = line.rfind(WEIGHT_SEPARATOR)
+            if separator != -1:
+                line = line[:separator].rstrip()
+        return self._decode(line)
+
+    def _decode(self, line):
+        return line.decode(self.encoding or LEGACY_ENCODING, errors="replace").lstrip("﻿")
+
+    def _sample_unindexed(self, rng):
+        # 索引建立前的临时抽样：随机定位到文件中某个位置，取其后的第一个完整行
+        size = os.path.getsize(self.path)
+        if not size:
+            return ""
+        if self.encoding is None:
+            self.encoding = detect_encoding(self.path)
+        with open(self.path, "rb") as f:
+            for _ in range(8):
+                position = int(rng.random() * size)
+                f.seek(position)
+                data = f.read(FALLBACK_READ)
+                newline = data.find(b"\n")
+                if newline == -1 or newline == len(data) - 1:
+                    # 已经在最后一行，从文件开头取第一行
+                    f.seek(0)
+                    data = f.read(FALLBACK_READ)
+                else:
+                    data = data[newline + 1:]
+                line = data.split(b"\n", 1)[0].strip()
+                if line:
+                    separator = line.rfind(WEIGHT_SEPARATOR)
+                    if separator != -1:
+                        line = line[:separator].rstrip()
+                    return self._decode(line)
+        return ""
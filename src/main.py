@@ -2,46 +2,90 @@ import os
 import sys
 import random
 import time
-from PyQt6.QtGui import *
-from PyQt6.QtCore import Qt, QTimer, QPoint, QSize
-from PyQt6.QtWidgets import *
+import threading
+from PyQt6.QtGui import QAction, QCursor, QIcon
+from PyQt6.QtCore import Qt, QEvent, QPoint, QSize, QThreadPool, QTimer
+from PyQt6.QtWidgets import QApplication, QMenu, QMessageBox, QSystemTrayIcon, QVBoxLayout, QWidget
 
-# 添加当前目录到Python路径，确保可以导入talk_show模块
+# 添加当前目录到Python路径，确保可以导入同目录下的模块
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
-def resource_path(relative_path):
+from animation import AnimationCache, AnimationPlayer, AnimationPrefetcher, LatencyRecorder, DEFAULT_CACHE_BUDGET
+from atlas import load_animation
+from speech_bubble import SpeechBubble
+from playback import PlaybackGovernor
+from scheduler import QtScheduler, Interval
+from dialog_store import DialogStore
+from assets import get_assets
+from metrics import get_registry, rss_bytes, start_exporter
+
+# 宠物动画尺寸
+PET_SIZE = QSize(200, 200)
+# 隐藏（挂起）时动画缓存保留的字节数
+SUSPEND_CACHE_FLOOR = 8 * 1024 * 1024
+# 动作切换间隔（秒）
+ACTION_INTERVAL = 5
+# 对话切换间隔（秒）
+TALK_INTERVAL = 5
+# 待机动画目录（相对资源根目录）
+IDLE_ANIMATION_DIR = 'images/idle_animation'
+# 首帧绘制后等待多久再在后台预热故事大会（毫秒），避开启动时的繁忙阶段
+STORY_WARMUP_DELAY_MS = 3000
+# 无法获取屏幕刷新率时使用的刷新率（Hz）
+DEFAULT_REFRESH_RATE = 60
+# 点击宠物时的回复
+CLICK_REPLY = "咬你哦！"
+
+def load_idle_animations(assets=None):
     """
-    获取资源文件的绝对路径，支持PyInstaller打包
-    
+    列出待机动画文件
+
+    有资源清单时直接从清单中读取，不扫描目录
+
     Args:
-        relative_path (str): 相对路径
-    
+        assets (AssetService): 资源服务，默认使用全局资源服务
+
     Returns:
-        str: 绝对路径
-    
-    Examples:
-        >>> resource_path('images/default.gif')
-        'e:/desktop-pet/src/images/default.gif'
+        list[str]: 动画文件路径
     """
-    try:
-        # PyInstaller创建临时文件夹，将路径存储在_MEIPASS中
-        base_path = sys._MEIPASS
-    except Exception:
-        # 如果不是打包后的exe，使用当前文件所在目录的父目录
-        base_path = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(base_path, relative_path)
-    
+    return (assets or get_assets()).list(IDLE_ANIMATION_DIR, ('.gif',))
+
+
+_talk_show = None
+_talk_show_lock = threading.Lock()
 
-# 导入故事大会功能
-try:
-    from talk_show import Client
-    TALK_SHOW_AVAILABLE = True
-except ImportError as e:
-    print(f"导入talk_show模块失败: {e}")
-    TALK_SHOW_AVAILABLE = False
-    Client = None
+
+def load_talk_show():
+    """
+    导入故事大会模块
+
+    故事大会依赖的模块和故事生成器不在启动时加载，第一次打开故事大会
+    或空闲预热时才导入；导入失败时只提示一次
+
+    Returns:
+        module: talk_show模块，导入失败时返回None
+    """
+    global _talk_show
+    with _talk_show_lock:
+        if _talk_show is None:
+            try:
+                import talk_show
+                _talk_show = talk_show
+            except ImportError as e:
+                print(f"导入talk_show模块失败: {e}")
+                _talk_show = False
+        return _talk_show or None
+
+
+def warm_up_talk_show():
+    """
+    预热故事大会：导入模块并创建全局故事生成器，在线程池中执行
+    """
+    talk_show = load_talk_show()
+    if talk_show is not None:
+        talk_show.get_story_generator()
 
 
 class DesktopPet(QWidget):
@@ -65,19 +109,62 @@ class DesktopPet(QWidget):
         Args:
             parent (QWidget): 父窗口部件
             kwargs (dict): 额外参数
+                - cache_budget (int): 动画解码缓存的内存预算（字节）
+                - animation_cache (AnimationCache): 共享的动画缓存，多宠物模式下由宿主传入
+                - scheduler (Scheduler): 共享的调度器
+                - assets (AssetService): 资源服务，默认使用全局资源服务
+                - idle_animations (list[str]): 共享的待机动画列表
+                - dialog (DialogStore): 共享的对话语料
+                - tray (bool): 是否创建托盘图标，默认为True
+                - group (list[DesktopPet]): 托盘“显示”/“隐藏”作用的宠物，默认只有自己；
+                  多宠物时由宿主传入共享的宠物列表，没有托盘的宠物隐藏后也能从这里恢复
+                - position (QPoint): 初始位置，默认显示在屏幕中央
+                - playback_policy (PlaybackPolicy): 动画降帧策略，默认按遮挡、空闲和CPU预算降帧
+                - playback_signals: 降帧信号源，默认从宠物窗口和进程读取，测试时可传入FakePlaybackSignals
         """
         super(DesktopPet, self).__init__(parent)
+        self.options = kwargs
+        # 已解码动画缓存，避免定时切换时反复解码GIF；有预编译图集时直接映射图集
+        self.animation_cache = kwargs.get('animation_cache') or \
+            AnimationCache(kwargs.get('cache_budget', DEFAULT_CACHE_BUDGET), load_animation)
+        # 在线程池中提前解码下一个动画
+        self.prefetcher = AnimationPrefetcher(self.animation_cache, PET_SIZE, self)
+        # 动画切换耗时统计
+        self.swap_latency = LatencyRecorder()
+        # 运行指标，DESKTOP_PET_METRICS=0 时为空操作
+        self.metrics = get_registry()
+        self.switch_metric = self.metrics.histogram("animation_switch_seconds", "动画切换耗时")
+        self.drag_metric = self.metrics.counter("drag_events_total", "拖动宠物时处理的鼠标移动事件数")
+        cache = self.animation_cache
+        self.metrics.gauge("decoded_frame_bytes", "动画缓存中已解码帧占用的字节数",
+                           function=lambda: cache.stats()["bytes"])
+        self.metrics.gauge("resident_memory_bytes", "进程常驻内存", function=rss_bytes)
+        # 调度任务名，共享调度器时用于区分不同的宠物
+        self.action_job = f"action-{id(self)}"
+        self.talk_job = f"talk-{id(self)}"
+        # 资源服务：路径解析和资源清单，启动时不扫描资源目录
+        self.assets = kwargs.get('assets') or get_assets()
         # 初始化图片和资源路径成员变量
-        self.idle_animation_dir = resource_path('images/idle_animation')
-        self.default_pet_gif = resource_path('images/idle_animation/default.gif')
-        self.click_animation_gif = resource_path('images/click/click.gif')
-        self.dialog_file_path = resource_path('dialog/dialog.txt')
-        self.favicon_path = resource_path('images/favicon.ico')
+        self.default_pet_gif = self.assets.path('images/idle_animation/default.gif')
+        self.click_animation_gif = self.assets.path('images/click/click.gif')
+        self.dialog_file_path = self.assets.path('dialog/dialog.txt')
+        self.favicon_path = self.assets.path('images/favicon.ico')
         
+        # 拖动状态：鼠标移动只记录目标位置，每个显示帧最多移动一次窗口
+        self.is_follow_mouse = False
+        self.pending_move = None
+        self.last_move_time = 0.0
+        self.move_timer = QTimer(self)
+        self.move_timer.setSingleShot(True)
+        self.move_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.move_timer.timeout.connect(self.applyMove)
+        self.move_metric = self.metrics.counter("window_moves_total", "拖动时实际移动窗口的次数")
+        # 当前播放的动画路径，连续点击时复用正在播放的点击动画
+        self.current_animation = None
+        # 首帧绘制前只做显示宠物必需的工作，托盘、点击动画和故事大会在首帧之后初始化
+        self.first_painted = False
         # 窗体初始化
         self.init()
-        # 托盘化初始
-        self.initPall()
         # 宠物静态gif图加载
         self.initPetImage()
         # 宠物正常待机，实现随机切换动作
@@ -100,7 +187,7 @@ class DesktopPet(QWidget):
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
         
         # 设置窗口图标
-        if os.path.exists(self.favicon_path):
+        if self.assets.exists('images/favicon.ico'):
             self.setWindowIcon(QIcon(self.favicon_path))
 
         # 重绘组件、刷新
@@ -119,14 +206,22 @@ class DesktopPet(QWidget):
         quit_action = QAction('退出', self, triggered=self.quit)
         # 设置这个点击选项的图片
         quit_action.setIcon(QIcon(icons))
-        # 菜单项显示，点击后调用showing函数
-        showing = QAction(u'显示', self, triggered=self.showwin)
+        # 菜单项显示，点击后显示托盘管理的所有宠物
+        showing = QAction(u'显示', self, triggered=self.showGroup)
+        # 菜单项隐藏，点击后托盘管理的所有宠物进入低功耗挂起状态
+        hiding = QAction(u'隐藏', self, triggered=self.suspendGroup)
+        # 菜单项运行指标，查看当前的运行指标
+        metrics_action = QAction(u'运行指标', self, triggered=self.showMetrics)
         # 新建一个菜单项控件
         self.tray_icon_menu = QMenu(self)
         # 在菜单栏添加一个无子菜单的菜单项‘退出’
         self.tray_icon_menu.addAction(quit_action)
         # 在菜单栏添加一个无子菜单的菜单项‘显示’
         self.tray_icon_menu.addAction(showing)
+        # 在菜单栏添加一个无子菜单的菜单项‘隐藏’
+        self.tray_icon_menu.addAction(hiding)
+        # 在菜单栏添加一个无子菜单的菜单项‘运行指标’
+        self.tray_icon_menu.addAction(metrics_action)
         # QSystemTrayIcon类为应用程序在系统托盘中提供一个图标
         self.tray_icon = QSystemTrayIcon(self)
         # 设置托盘化图标
@@ -141,28 +236,23 @@ class DesktopPet(QWidget):
         宠物静态gif图加载
         
         初始化宠物的UI组件，包括：
-        - 对话框标签
+        - 对话框
         - 图片显示标签
         - 布局设置
         - 加载动画和对话资源
         """
-        # 对话框定义
-        self.talkLabel = QLabel(self)
-        # 对话框样式设计
-        self.talkLabel.setStyleSheet("font:15pt '楷体';border-width: 1px;color:blue;")
-        # 定义显示图片部分
-        self.image = QLabel(self)
-        # QMovie是一个可以存放动态视频的类，一般是配合QLabel使用的,可以用来存放GIF动态图
-        self.movie = QMovie(self.default_pet_gif)
-        # 设置标签大小
-        self.movie.setScaledSize(QSize(200, 200))
-        # 将Qmovie在定义的image中显示
-        self.image.setMovie(self.movie)
-        self.movie.start()
+        # 对话框定义：样式只解析一次，更换文本时只重绘对话框
+        self.talkLabel = SpeechBubble(self)
+        # 定义显示图片部分，播放缓存中已解码、已缩放的帧
+        self.image = AnimationPlayer(self)
+        self.playAnimation(self.default_pet_gif)
         self.resize(300, 300)
 
         # 调用自定义的randomPosition，会使得宠物出现位置随机
-        self.randomPosition()
+        if self.options.get('position') is not None:
+            self.move(self.options['position'])
+        else:
+            self.randomPosition()
 
         # 布局设置
         vbox = QVBoxLayout()
@@ -172,48 +262,104 @@ class DesktopPet(QWidget):
         #加载布局：前面设置好的垂直布局
         self.setLayout(vbox)
 
+        # 第一次绘制动画后再初始化其余部分
+        self.image.installEventFilter(self)
         # 展示
         self.show()
+        # 被遮挡、用户空闲或CPU超出预算时降低动画帧率，用户一有操作立即恢复全速
+        self.governor = PlaybackGovernor(self.options.get('playback_policy'),
+                                         self.options.get('playback_signals'), self)
+        self.governor.watch(self.windowHandle())
+        self.image.setGovernor(self.governor)
         # 将宠物正常待机状态的动图放入idle_animations列表中
-        self.idle_animations = []
-        idle_dir = self.idle_animation_dir
-        for i in os.listdir(idle_dir):
-            self.idle_animations.append(os.path.join(idle_dir, i))
-        # 将宠物正常待机状态的对话放入pet2中
-        self.dialog = []
-        # 读取目录下dialog文件
-        dialog_path = self.dialog_file_path
-        with open(dialog_path, "r", encoding="gbk") as f:
-            text = f.read()
-            # 以\n 即换行符为分隔符，分割放进dialog中
-            self.dialog = text.split("\n")
+        self.idle_animations = self.options.get('idle_animations') or load_idle_animations(self.assets)
+        # 提前解码下一个待机动画
+        self.prepareNextAnimation()
+        # 对话语料在后台建立行索引，抽样时只读取选中的一行，文件修改后自动重建
+        self.dialog = self.options.get('dialog') or DialogStore(self.dialog_file_path, parent=self)
+
+    def eventFilter(self, watched, event):
+        """
+        监听动画控件的第一次绘制
+
+        Args:
+            watched (QObject): 被监听的对象
+            event (QEvent): 事件对象
+
+        Returns:
+            bool: 始终返回False，不拦截事件
+        """
+        if watched is self.image and event.type() == QEvent.Type.Paint and not self.first_painted:
+            self.first_painted = True
+            self.image.removeEventFilter(self)
+            # 等本次绘制完成后再执行
+            QTimer.singleShot(0, self.initDeferred)
+        return False
+
+    def initDeferred(self):
+        """
+        首帧绘制后的初始化
+
+        - 创建托盘图标和菜单
+        - 在后台预取点击动画
+        - 资源清单缺失或过期时在后台重建
+        - 启动指标导出
+        - 空闲一段时间后在后台预热故事大会
+        """
+        if self.options.get('tray', True):
+            self.initPall()
+        self.prefetcher.prefetch(self.click_animation_gif)
+        self.assets.refresh_async()
+        # 按环境变量把指标导出到文件或本地套接字
+        start_exporter(self.scheduler, self)
+        QTimer.singleShot(STORY_WARMUP_DELAY_MS, self.warmUpStory)
+
+    def warmUpStory(self):
+        """
+        在线程池中预热故事大会，第一次打开时无需等待导入和语料加载
+        """
+        if not self.suspended:
+            QThreadPool.globalInstance().start(warm_up_talk_show)
 
     def petNormalAction(self):
         """
         宠物正常待机动作
         
-        初始化定时器，设置宠物的正常待机状态，包括：
-        - 随机动作切换定时器（每5秒）
-        - 对话切换定时器（每5秒）
-        """
-        # 每隔一段时间做个动作
-        # 定时器设置
-        self.timer = QTimer()
-        # 时间到了自动执行
-        self.timer.timeout.connect(self.randomAct)
-        # 动作时间切换设置
-        self.timer.start(5000)
+        初始化调度器，设置宠物的正常待机状态，包括：
+        - 随机动作切换任务（每5秒）
+        - 对话切换任务（每5秒）
+        两个任务由同一个调度器管理，到期时间接近时合并为一次唤醒
+        """
+        # 调度器：整个宠物共用一个定时器，多宠物模式下所有宠物共用宿主的调度器
+        self.scheduler = self.options.get('scheduler') or QtScheduler(self)
+        if self.scheduler.lateness is None:
+            self.scheduler.lateness = self.metrics.histogram(
+                "timer_jitter_seconds", "任务实际执行时间与到期时间的偏差", {"scheduler": "jobs"})
         # 宠物状态设置为正常
         self.condition = 0
-        # 每隔一段时间切换对话
-        self.talkTimer = QTimer()
-        self.talkTimer.timeout.connect(self.talk)
-        self.talkTimer.start(5000)
+        # 是否处于隐藏挂起状态
+        self.suspended = False
+        # 每隔一段时间做个动作、切换对话
+        self.startJobs()
         # 对话状态设置为常态
         self.talk_condition = 0
         # 宠物对话框
         self.talk()   
 
+    def startJobs(self):
+        """
+        在调度器中注册动作切换和对话切换任务
+        """
+        self.scheduler.schedule(self.action_job, self.randomAct, Interval(ACTION_INTERVAL))
+        self.scheduler.schedule(self.talk_job, self.talk, Interval(TALK_INTERVAL))
+
+    def stopJobs(self):
+        """
+        从调度器中移除本宠物的任务
+        """
+        self.scheduler.cancel(self.action_job)
+        self.scheduler.cancel(self.talk_job)
+
     def randomAct(self):
         """
         随机动作切换
@@ -224,30 +370,55 @@ class DesktopPet(QWidget):
         """
         # condition记录宠物状态，宠物状态为0时，代表正常待机
         if not self.condition:
-            # 随机选择装载在idle_animations里面的gif图进行展示，实现随机切换
-            self.movie = QMovie(random.choice(self.idle_animations))
-            # 宠物大小
-            self.movie.setScaledSize(QSize(200, 200))
-            # 将动画添加到label中
-            self.image.setMovie(self.movie)
-            # 开始播放动画
-            self.movie.start()
+            # 播放上一轮随机选中并已预取的待机动画，再为下一轮选择并预取
+            self.playAnimation(self.next_animation)
+            self.prepareNextAnimation()
         # condition不为0，转为切换特有的动作，实现宠物的点击反馈
         # 这里可以通过else-if语句往下拓展做更多的交互功能
         elif self.condition == 1:
             # 读取特殊状态图片路径
-            self.movie = QMovie(self.click_animation_gif)
-            # 宠物大小
-            self.movie.setScaledSize(QSize(200, 200))
-            # 将动画添加到label中
-            self.image.setMovie(self.movie)
-            # 开始播放动画
-            self.movie.start()
+            self.playAnimation(self.click_animation_gif)
             # 宠物状态设置为正常待机
             self.condition = 0
             self.talk_condition = 0
             
 
+    def prepareNextAnimation(self):
+        """
+        随机选择下一个待机动画，并在后台线程中预取
+
+        预取在当前5秒窗口内完成，定时器触发时只需交换已解码的帧
+        """
+        # 随机选择装载在idle_animations里面的gif图，实现随机切换
+        self.next_animation = random.choice(self.idle_animations)
+        self.prefetcher.prefetch(self.next_animation)
+
+    def playAnimation(self, path):
+        """
+        播放指定动画
+
+        优先从解码缓存中取帧，预取尚未完成或已被淘汰时才在GUI线程中同步解码
+
+        Args:
+            path (str): 动画文件路径
+        """
+        start_time = time.perf_counter()
+        self.image.setAnimation(self.animation_cache.get(path, PET_SIZE))
+        self.image.start()
+        self.current_animation = path
+        elapsed = time.perf_counter() - start_time
+        self.swap_latency.record(elapsed)
+        self.switch_metric.observe(elapsed)
+
+    def swapLatency(self):
+        """
+        动画切换耗时统计
+
+        Returns:
+            dict: 样本数及p50、p99、最大值（毫秒）
+        """
+        return self.swap_latency.summary()
+
     def talk(self):
         """
         宠物对话框行为处理
@@ -258,32 +429,22 @@ class DesktopPet(QWidget):
         """
         if not self.talk_condition:
             # talk_condition为0则选取加载在dialog中的语句
-            self.talkLabel.setText(random.choice(self.dialog))
-            # 设置样式
-            self.talkLabel.setStyleSheet(
-                "font: bold;"
-                "font:15pt '楷体';"
-                "color:white;"
-                "background-color: white"
-                "url(:/)"
-            )
-            # 根据内容自适应大小
-            self.talkLabel.adjustSize()
+            self.talkLabel.setText(self.dialog.sample())
         else:
             # talk_condition为1显示为别点我，这里同样可以通过if-else-if来拓展对应的行为
-            self.talkLabel.setText("咬你哦！")
-            self.talkLabel.setStyleSheet(
-                "font: bold;"
-                "font:15pt '楷体';"
-                "color:white;"
-                "background-color: white"
-                "url(:/)"
-            )
-            self.talkLabel.adjustSize()
-            # self.talkLabel.
+            self.talkLabel.setText(CLICK_REPLY)
             # 设置为正常状态
             self.talk_condition = 0
 
+    def showMetrics(self):
+        """
+        显示当前的运行指标
+        """
+        if not self.metrics.enabled:
+            QMessageBox.information(self, "运行指标", "运行指标已关闭（DESKTOP_PET_METRICS=0）。")
+            return
+        QMessageBox.information(self, "运行指标", self.metrics.to_text())
+
     def quit(self):
         """
         退出操作，关闭程序
@@ -295,9 +456,49 @@ class DesktopPet(QWidget):
         """
         显示宠物
         
-        通过设置窗体透明度为1来显示宠物
+        从挂起状态恢复：重新显示窗口，继续播放当前动画并重新注册调度任务。
+        当前动画的帧一直由播放控件持有，恢复时无需重新解码
         """
         self.setWindowOpacity(1)
+        if not self.suspended:
+            return
+        self.suspended = False
+        self.show()
+        self.image.start()
+        self.startJobs()
+        # 挂起期间缓存可能被裁剪，重新预取下一个动画
+        self.prepareNextAnimation()
+
+    def showGroup(self):
+        """
+        显示托盘管理的所有宠物
+        """
+        for pet in self.options.get('group') or [self]:
+            pet.showwin()
+
+    def suspendGroup(self):
+        """
+        隐藏托盘管理的所有宠物
+        """
+        for pet in self.options.get('group') or [self]:
+            pet.suspend()
+
+    def suspend(self):
+        """
+        隐藏宠物并进入低功耗挂起状态
+
+        停止动画播放并移除调度任务，隐藏窗口，挂起期间不再有定时唤醒和重绘。
+        共用动画缓存的宠物（group）全部挂起后，才把缓存裁剪到 SUSPEND_CACHE_FLOOR 以内，
+        避免淘汰其他宠物正在播放的帧
+        """
+        if self.suspended:
+            return
+        self.suspended = True
+        self.image.stop()
+        self.stopJobs()
+        if all(pet.suspended for pet in self.options.get('group') or [self]):
+            self.animation_cache.trim(SUSPEND_CACHE_FLOOR)
+        self.hide()
 
     def randomPosition(self):
         """
@@ -318,18 +519,21 @@ class DesktopPet(QWidget):
     def mousePressEvent(self, event):
         """
         鼠标左键按下时, 宠物将和鼠标位置绑定
+
+        点击动画和回复已经在显示时（连续快速点击），不再重新设置对话框和动画
         
         Args:
             event (QMouseEvent): 鼠标事件对象
         """
-        # 更改宠物状态为点击
-        self.condition = 1
-        # 更改宠物对话状态
-        self.talk_condition = 1
-        # 即可调用对话状态改变
-        self.talk()
-        # 即刻加载宠物点击动画
-        self.randomAct()
+        if not self.isClickReplyShowing():
+            # 更改宠物状态为点击
+            self.condition = 1
+            # 更改宠物对话状态
+            self.talk_condition = 1
+            # 即可调用对话状态改变
+            self.talk()
+            # 即刻加载宠物点击动画
+            self.randomAct()
         if event.button() == Qt.MouseButton.LeftButton:
             self.is_follow_mouse = True
         # globalPosition() 事件触发点相对于桌面的位置
@@ -339,9 +543,22 @@ class DesktopPet(QWidget):
         # 拖动时鼠标图形的设置
         self.setCursor(QCursor(Qt.CursorShape.OpenHandCursor))
 
+    def isClickReplyShowing(self):
+        """
+        点击动画和点击回复是否正在显示
+
+        Returns:
+            bool: 正在显示时返回True
+        """
+        return (self.current_animation == self.click_animation_gif and self.image.isPlaying()
+                and self.talkLabel.text() == CLICK_REPLY)
+
     def mouseMoveEvent(self, event):
         """
         鼠标移动时调用，实现宠物随鼠标移动
+
+        高回报率鼠标的移动事件远多于屏幕刷新次数，这里只记录目标位置，
+        距上次移动不足一个显示帧时推迟到下一帧再移动窗口
         
         Args:
             event (QMouseEvent): 鼠标事件对象
@@ -349,16 +566,49 @@ class DesktopPet(QWidget):
         # 如果鼠标左键按下，且处于绑定状态
         if event.buttons() & Qt.MouseButton.LeftButton and self.is_follow_mouse:
             # 宠物随鼠标进行移动
-            self.move(event.globalPosition().toPoint() - self.mouse_drag_pos)
+            self.pending_move = event.globalPosition().toPoint() - self.mouse_drag_pos
+            self.drag_metric.inc()
+            if not self.move_timer.isActive():
+                remaining = self.frameInterval() - (time.perf_counter() - self.last_move_time)
+                if remaining <= 0:
+                    self.applyMove()
+                else:
+                    self.move_timer.start(max(1, int(remaining * 1000)))
         event.accept()
 
+    def frameInterval(self):
+        """
+        显示帧间隔
+
+        Returns:
+            float: 秒数，按宠物所在屏幕的刷新率计算
+        """
+        screen = self.screen()
+        rate = screen.refreshRate() if screen is not None else 0
+        return 1.0 / (rate if rate > 0 else DEFAULT_REFRESH_RATE)
+
+    def applyMove(self):
+        """
+        把窗口移动到最近一次记录的目标位置
+        """
+        if self.pending_move is None:
+            return
+        self.move(self.pending_move)
+        self.pending_move = None
+        self.last_move_time = time.perf_counter()
+        self.move_metric.inc()
+
     def mouseReleaseEvent(self, event):
         """
         鼠标释放调用，取消绑定
+
+        立即应用尚未执行的移动，保证宠物停在鼠标释放的位置
         
         Args:
             event (QMouseEvent): 鼠标事件对象
         """
+        self.move_timer.stop()
+        self.applyMove()
         self.is_follow_mouse = False
         # 鼠标图形设置为箭头
         self.setCursor(QCursor(Qt.CursorShape.ArrowCursor))
@@ -378,7 +628,7 @@ class DesktopPet(QWidget):
         宠物右键点击交互
         
         显示右键菜单，包含以下选项：
-        - 隐藏：通过设置透明度隐藏宠物
+        - 隐藏：隐藏宠物并进入低功耗挂起状态，可从托盘“显示”恢复
         - 故事大会：打开故事生成功能
         - 退出：关闭程序
         
@@ -397,16 +647,18 @@ class DesktopPet(QWidget):
         action = menu.exec(self.mapToGlobal(event.pos()))
         # 点击事件为退出
         if action == quitAction:
-            qApp.quit()
+            QApplication.quit()
         # 点击事件为隐藏
         if action == hide:
-            # 通过设置透明度方式隐藏宠物
-            self.setWindowOpacity(0)
+            # 挂起宠物：停止动画和定时器并隐藏窗口
+            self.suspend()
         # 点击事件为故事大会
         if action == question_answer:
-            if TALK_SHOW_AVAILABLE and Client:
-                self.client = Client()
-                self.client.show()
+            talk_show = load_talk_show()
+            if talk_show is not None:
+                # 复用同一个窗口，关闭后再次打开不重建
+                self.client = talk_show.get_client()
+                self.client.present()
             else:
                 QMessageBox.warning(self, "提示", "故事大会功能当前不可用。")
 
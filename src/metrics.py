@@ -0,0 +1,550 @@
+import os
+import sys
+import json
+import time
+import threading
+from bisect import bisect_left
+from PyQt6.QtCore import QObject
+
+from scheduler import Interval
+
+# 常量定义
+# 设置为0时所有指标都是空操作，需在导入本模块前设置
+METRICS_ENV = "DESKTOP_PET_METRICS"
+# 定期把指标写入该文件，扩展名为.prom时使用Prometheus文本格式，否则为JSON
+METRICS_FILE_ENV = "DESKTOP_PET_METRICS_FILE"
+# 本地套接字名（Linux下为Unix套接字，Windows下为命名管道）
+METRICS_SOCKET_ENV = "DESKTOP_PET_METRICS_SOCKET"
+# 写入指标文件的间隔（秒）
+EXPORT_INTERVAL = 10
+# 指标名前缀
+METRIC_PREFIX = "desktop_pet_"
+# 默认直方图桶上界（秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def rss_bytes():
+    """
+    当前进程的常驻内存
+
+    Returns:
+        int: 字节数，无法获取时返回0
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return 0
+    try:
+        import resource
+        # 其他平台只能取得峰值
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    except ImportError:
+        return 0
+
+
+def format_labels(labels):
+    # Prometheus标签格式：{job="talk",pet="1"}
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """
+    单调递增计数器
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=None):
+        """
+        初始化计数器
+
+        Args:
+            name (str): 指标名
+            help_text (str): 说明
+            labels (dict): 标签
+        """
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """
+        增加计数
+
+        Args:
+            amount (int): 增量
+        """
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return {"value": self.value}
+
+    def samples(self):
+        yield self.name, self.labels, self.value
+
+
+class Gauge:
+    """
+    瞬时值，可以直接设置，也可以在读取时调用函数取值
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=None, function=None):
+        """
+        初始化瞬时值
+
+        Args:
+            name (str): 指标名
+            help_text (str): 说明
+            labels (dict): 标签
+            function (callable): 读取时调用的取值函数
+        """
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.function = function
+        self.value = 0
+
+    def set(self, value):
+        """
+        设置当前值
+
+        Args:
+            value (float): 当前值
+        """
+        self.value = value
+
+    def read(self):
+        """
+        读取当前值
+
+        Returns:
+            float: 当前值，取值函数出错时返回上一次的值
+        """
+        if self.function is not None:
+            try:
+                self.value = self.function()
+            except Exception as e:
+                print(f"读取指标{self.name}失败: {e}")
+        return self.value
+
+    def snapshot(self):
+        return {"value": self.read()}
+
+    def samples(self):
+        yield self.name, self.labels, self.read()
+
+
+class Histogram:
+    """
+    固定桶直方图
+
+    每次记录只做一次二分查找和两次加法，分位数按桶上界估计
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=None, buckets=DEFAULT_BUCKETS):
+        """
+        初始化直方图
+
+        Args:
+            name (str): 指标名
+            help_text (str): 说明
+            labels (dict): 标签
+            buckets (tuple[float]): 递增的桶上界，最后隐含一个+Inf桶
+        """
+        self.name = name
+        self.help = help_text
+        self.labels = labels or {}
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """
+        记录一个观测值
+
+        Args:
+            value (float): 观测值
+        """
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        """
+        估计分位数
+
+        Args:
+            q (float): 0到1之间的分位
+
+        Returns:
+            float: 所在桶的上界，落在+Inf桶时返回最大的有限上界，没有样本时返回0
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            yield self.name + "_bucket", dict(self.labels, le=str(bound)), cumulative
+        yield self.name + "_count", self.labels, self.count
+        yield self.name + "_sum", self.labels, self.sum
+
+
+class NullMetric:
+    """
+    空操作指标，关闭指标后所有记录调用都直接返回
+    """
+
+    kind = "null"
+    value = 0
+    count = 0
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+    def read(self):
+        return 0
+
+
+NULL_METRIC = NullMetric()
+
+
+class Registry:
+    """
+    指标注册表
+
+    按 (名称, 标签) 保存指标，同名同标签的指标只创建一次。
+    关闭时只返回空操作指标，埋点处的开销只剩一次方法调用
+
+    Examples:
+        >>> registry = Registry()
+        >>> registry.counter("drag_events_total", "拖动事件数").inc()
+        >>> print(registry.to_prometheus())
+    """
+
+    def __init__(self, enabled=True):
+        """
+        初始化注册表
+
+        Args:
+            enabled (bool): 是否记录指标
+        """
+        self.enabled = enabled
+        self.metrics = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        if not self.enabled:
+            return NULL_METRIC
+        name = METRIC_PREFIX + name
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            metric = self.metrics.get(key)
+            if metric is None:
+                metric = self.metrics[key] = cls(name, help_text, labels, **kwargs)
+        return metric
+
+    def counter(self, name, help_text, labels=None):
+        """
+        获取或创建计数器
+
+        Args:
+            name (str): 指标名（不含前缀）
+            help_text (str): 说明
+            labels (dict): 标签
+
+        Returns:
+            Counter: 计数器，关闭时为空操作指标
+        """
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=None, function=None):
+        """
+        获取或创建瞬时值，已存在时替换取值函数
+
+        Args:
+            name (str): 指标名（不含前缀）
+            help_text (str): 说明
+            labels (dict): 标签
+            function (callable): 读取时调用的取值函数
+
+        Returns:
+            Gauge: 瞬时值，关闭时为空操作指标
+        """
+        metric = self._get(Gauge, name, help_text, labels, function=function)
+        if function is not None and metric is not NULL_METRIC:
+            metric.function = function
+        return metric
+
+    def histogram(self, name, help_text, labels=None, buckets=DEFAULT_BUCKETS):
+        """
+        获取或创建直方图
+
+        Args:
+            name (str): 指标名（不含前缀）
+            help_text (str): 说明
+            labels (dict): 标签
+            buckets (tuple[float]): 桶上界
+
+        Returns:
+            Histogram: 直方图，关闭时为空操作指标
+        """
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def snapshot(self):
+        """
+        所有指标的当前值
+
+        Returns:
+            dict: 运行时长和各指标的值
+        """
+        with self._lock:
+            metrics = list(self.metrics.values())
+        data = {"uptime_seconds": time.time() - self.started, "metrics": {}}
+        for metric in metrics:
+            entry = dict(metric.snapshot(), type=metric.kind)
+            if metric.labels:
+                entry["labels"] = metric.labels
+            data["metrics"][metric.name + format_labels(metric.labels)] = entry
+        return data
+
+    def to_json(self):
+        """
+        导出为JSON文本
+
+        Returns:
+            str: JSON
+        """
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=1, sort_keys=True)
+
+    def to_prometheus(self):
+        """
+        导出为Prometheus文本格式
+
+        Returns:
+            str: 文本
+        """
+        with self._lock:
+            metrics = sorted(self.metrics.values(), key=lambda m: m.name)
+        lines = []
+        described = set()
+        for metric in metrics:
+            if metric.name not in described:
+                described.add(metric.name)
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def to_text(self):
+        """
+        便于阅读的摘要，用于托盘菜单中的查看窗口
+
+        Returns:
+            str: 每个指标一行
+        """
+        data = self.snapshot()
+        uptime = max(data["uptime_seconds"], 1e-9)
+        lines = [f"运行时长: {uptime:.0f} 秒"]
+        for name, entry in sorted(data["metrics"].items()):
+            short = name[len(METRIC_PREFIX):]
+            if entry["type"] == "histogram":
+                lines.append(f"{short}: 次数 {entry['count']}，p50 ≤ {entry['p50'] * 1000:g} ms，"
+                             f"p99 ≤ {entry['p99'] * 1000:g} ms")
+            elif entry["type"] == "counter":
+                lines.append(f"{short}: {entry['value']}（平均 {entry['value'] / uptime:.2f}/秒）")
+            else:
+                lines.append(f"{short}: {entry['value']:g}")
+        return "\n".join(lines)
+
+
+_registry = Registry(enabled=os.environ.get(METRICS_ENV, "1") != "0")
+
+
+def get_registry():
+    """
+    获取全局指标注册表
+
+    设置环境变量 DESKTOP_PET_METRICS=0 时所有指标都是空操作
+
+    Returns:
+        Registry: 指标注册表
+    """
+    return _registry
+
+
+class MetricsExporter(QObject):
+    """
+    指标导出
+
+    - 文件：定期把指标写入文件（.prom为Prometheus文本格式，否则为JSON），由调度器驱动
+    - 本地套接字：客户端连接后发送一行 json 或 prometheus，返回对应格式的指标后断开
+
+    Examples:
+        >>> exporter = MetricsExporter(get_registry(), scheduler, path='/tmp/pet.prom', socket_name='desktop-pet')
+        >>> # socat - UNIX-CONNECT:/tmp/desktop-pet <<< prometheus
+    """
+
+    def __init__(self, registry, scheduler=None, path=None, socket_name=None, parent=None):
+        """
+        初始化指标导出
+
+        Args:
+            registry (Registry): 指标注册表
+            scheduler (Scheduler): 定期写文件使用的调度器
+            path (str): 指标文件路径
+            socket_name (str): 本地套接字名，绝对路径或位于系统临时目录下的名称
+            parent (QObject): 父对象
+        """
+        super(MetricsExporter, self).__init__(parent)
+        self.registry = registry
+        self.scheduler = scheduler
+        self.path = path
+        self.server = None
+        if path and scheduler is not None:
+            scheduler.schedule(f"metrics-export-{id(self)}", self.write, Interval(EXPORT_INTERVAL))
+        if socket_name:
+            # 只有配置了套接字时才导入QtNetwork
+            from PyQt6.QtNetwork import QLocalServer
+            self.server = QLocalServer(self)
+            # 上次异常退出可能留下同名套接字
+            QLocalServer.removeServer(socket_name)
+            self.server.newConnection.connect(self.on_new_connection)
+            if not self.server.listen(socket_name):
+                print(f"指标套接字监听失败: {self.server.errorString()}")
+
+    def render(self, fmt):
+        """
+        按格式导出
+
+        Args:
+            fmt (str): prometheus 或 json
+
+        Returns:
+            str: 文本
+        """
+        if fmt.strip().lower() in ("prometheus", "prom", "text"):
+            return self.registry.to_prometheus()
+        return self.registry.to_json() + "\n"
+
+    def write(self):
+        """
+        把指标写入文件（先写临时文件再替换）
+
+        Returns:
+            bool: 写入成功时返回True
+        """
+        fmt = "prometheus" if self.path.endswith(".prom") else "json"
+        temp = self.path + ".tmp"
+        try:
+            with open(temp, "w", encoding="utf-8") as f:
+                f.write(self.render(fmt))
+            os.replace(temp, self.path)
+            return True
+        except OSError as e:
+            print(f"写入指标文件失败: {e}")
+            return False
+
+    def on_new_connection(self):
+        # 读取一行请求格式，回复后断开
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            connection.readyRead.connect(lambda c=connection: self.on_request(c))
+            connection.disconnected.connect(connection.deleteLater)
+
+    def on_request(self, connection):
+        if not connection.canReadLine():
+            return
+        fmt = bytes(connection.readLine()).decode("utf-8", errors="replace")
+        connection.write(self.render(fmt).encode("utf-8"))
+        connection.flush()
+        connection.disconnectFromServer()
+
+    def close(self):
+        """
+        停止导出
+        """
+        if self.scheduler is not None and self.path:
+            self.scheduler.cancel(f"metrics-export-{id(self)}")
+        if self.server is not None:
+            self.server.close()
+
+
+_exporter = None
+
+
+def start_exporter(scheduler, parent=None):
+    """
+    按环境变量启动全局指标导出，只启动一次
+
+    Args:
+        scheduler (Scheduler): 定期写文件使用的调度器
+        parent (QObject): 父对象
+
+    Returns:
+        MetricsExporter: 导出对象，指标关闭或未配置导出时返回None
+    """
+    global _exporter
+    path = os.environ.get(METRICS_FILE_ENV)
+    socket_name = os.environ.get(METRICS_SOCKET_ENV)
+    if _exporter is None and _registry.enabled and (path or socket_name):
+        _exporter = MetricsExporter(_registry, scheduler, path, socket_name, parent)
+    return _exporter
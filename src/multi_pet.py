@@ -0,0 +1,108 @@
+import os
+import sys
+import argparse
+from PyQt6.QtCore import QPoint
+from PyQt6.QtWidgets import QApplication
+
+# 添加当前目录到Python路径，确保可以导入main模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from animation import AnimationCache, DEFAULT_CACHE_BUDGET
+from atlas import load_animation
+from scheduler import QtScheduler
+from dialog_store import DialogStore
+from assets import get_assets
+from main import DesktopPet, load_idle_animations
+
+# 常量定义
+# 宠物窗口尺寸，用于排列多个宠物
+PET_WINDOW_SIZE = 300
+
+
+class PetHost:
+    """
+    多宠物宿主
+
+    在同一个QApplication中运行多个DesktopPet，所有宠物共用一个调度器、
+    一个动画缓存（及进程内共享的动画时钟）和一份对话语料，
+    每个宠物只保留自己的状态和位置
+
+    Examples:
+        >>> host = PetHost()
+        >>> host.spawn(5)
+    """
+
+    def __init__(self, cache_budget=DEFAULT_CACHE_BUDGET):
+        """
+        初始化宿主并加载共享资源
+
+        Args:
+            cache_budget (int): 共享动画缓存的内存预算（字节）
+        """
+        self.animation_cache = AnimationCache(cache_budget, load_animation)
+        self.scheduler = QtScheduler()
+        self.assets = get_assets()
+        self.idle_animations = load_idle_animations(self.assets)
+        self.dialog = DialogStore(self.assets.path('dialog/dialog.txt'))
+        self.pets = []
+
+    def spawn(self, count=1):
+        """
+        创建宠物，按网格依次排列在屏幕上
+
+        只有第一个宠物创建托盘图标，避免托盘中出现多个相同的图标；
+        托盘的“显示”/“隐藏”作用于宿主的所有宠物，从右键菜单隐藏的宠物也能从托盘恢复
+
+        Args:
+            count (int): 创建的数量
+
+        Returns:
+            list[DesktopPet]: 新创建的宠物
+        """
+        created = []
+        for _ in range(count):
+            pet = DesktopPet(
+                assets=self.assets,
+                animation_cache=self.animation_cache,
+                scheduler=self.scheduler,
+                idle_animations=self.idle_animations,
+                dialog=self.dialog,
+                tray=not self.pets,
+                group=self.pets,
+                position=self.slot(len(self.pets)),
+            )
+            self.pets.append(pet)
+            created.append(pet)
+        return created
+
+    def slot(self, index):
+        """
+        计算第index个宠物的位置
+
+        Args:
+            index (int): 宠物序号
+
+        Returns:
+            QPoint: 窗口左上角坐标
+        """
+        screen_geo = QApplication.primaryScreen().availableGeometry()
+        columns = max(1, screen_geo.width() // PET_WINDOW_SIZE)
+        rows = max(1, screen_geo.height() // PET_WINDOW_SIZE)
+        # 超出一屏后错开半个窗口继续排列
+        page, cell = divmod(index, columns * rows)
+        row, column = divmod(cell, columns)
+        offset = (page * PET_WINDOW_SIZE // 2) % PET_WINDOW_SIZE
+        return QPoint(screen_geo.x() + column * PET_WINDOW_SIZE + offset,
+                      screen_geo.y() + row * PET_WINDOW_SIZE + offset)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="在一个进程中运行多个桌面宠物")
+    parser.add_argument("-n", "--count", type=int, default=3, help="宠物数量")
+    args = parser.parse_args()
+    app = QApplication(sys.argv)
+    host = PetHost()
+    host.spawn(args.count)
+    sys.exit(app.exec())
@@ -0,0 +1,549 @@
+import os
+import sys
+import time
+import weakref
+from PyQt6 import sip
+from PyQt6.QtCore import QEvent, QObject
+
+from metrics import get_registry
+from scheduler import VirtualClock
+
+# 常量定义
+# 窗口被遮挡、最小化或隐藏时的帧率上限（帧/秒）
+DEFAULT_HIDDEN_FPS = 1
+# 用户多久没有操作（秒）后视为空闲
+DEFAULT_IDLE_AFTER = 60
+# 空闲时的帧率上限（帧/秒）
+DEFAULT_IDLE_FPS = 4
+# 进程CPU预算：占一个核心的比例，超出时降低帧率
+DEFAULT_CPU_BUDGET = 0.05
+# CPU预算降帧时的帧率下限（帧/秒）
+DEFAULT_MIN_FPS = 2
+# 用户操作后保持全速的时长（秒），期间不因空闲或CPU预算降帧
+DEFAULT_ACTIVE_SECONDS = 5
+# CPU预算调节的参考帧率：未降帧的动画按这个帧率计算缩放比例
+REFERENCE_FPS = 25
+# CPU占用低于预算的该比例时逐步恢复帧率，避免在预算附近来回切换
+CPU_RECOVER_RATIO = 0.5
+# CPU占用的统计窗口（秒）：每隔这么久按这段时间内的CPU占用调节一次帧率
+CPU_WINDOW = 2.0
+# 播放控件查询帧间隔时，距上次计算不足这么久（秒）直接使用上次的帧预算；
+# 遮挡和用户操作由窗口事件立即触发重新计算，不受此限制
+EVALUATE_INTERVAL = 0.25
+# 视为用户操作的窗口事件
+INPUT_EVENTS = frozenset((
+    QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease, QEvent.Type.MouseButtonDblClick,
+    QEvent.Type.MouseMove, QEvent.Type.Wheel, QEvent.Type.KeyPress, QEvent.Type.Enter,
+    QEvent.Type.ContextMenu, QEvent.Type.TouchBegin,
+))
+# 可能改变窗口可见状态的事件
+VISIBILITY_EVENTS = frozenset((
+    QEvent.Type.Expose, QEvent.Type.WindowStateChange, QEvent.Type.Show, QEvent.Type.Hide,
+))
+
+# 进程内所有的调节器（多宠物时每个宠物一个），帧率指标在它们之间汇总
+_governors = weakref.WeakSet()
+# 系统空闲时长的读取函数，第一次使用时加载；无法获取时为返回None的函数
+_idle_source = None
+
+
+def max_fps_cap():
+    """
+    所有宠物中最宽松的帧率上限，有一个宠物全速或没有宠物时为0（全速）
+
+    Returns:
+        float: 帧/秒
+    """
+    caps = [governor.budget.max_fps for governor in list(_governors)]
+    if not caps or None in caps:
+        return 0
+    return max(caps)
+
+
+def capped_count():
+    """
+    正在降帧播放的宠物数
+
+    Returns:
+        int: 宠物数
+    """
+    return sum(1 for governor in list(_governors) if governor.budget.max_fps is not None)
+
+
+# 帧率指标：每个进程只注册一次，按所有宠物汇总
+get_registry().gauge("playback_max_fps", "所有宠物中最宽松的动画帧率上限，0表示有宠物在全速播放",
+                     function=max_fps_cap)
+get_registry().gauge("playback_capped_pets", "正在降帧播放的宠物数", function=capped_count)
+
+
+def _windows_idle_source():
+    # GetLastInputInfo给出最后一次输入时的开机毫秒数（32位，约49天回绕一次）
+    import ctypes
+    from ctypes import wintypes
+
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+
+    user32 = ctypes.windll.user32
+    kernel32 = ctypes.windll.kernel32
+    info = LASTINPUTINFO()
+    info.cbSize = ctypes.sizeof(info)
+
+    def idle():
+        if not user32.GetLastInputInfo(ctypes.byref(info)):
+            return None
+        return ((kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000.0
+    return idle
+
+
+def _x11_idle_source():
+    # XScreenSaver扩展给出X服务器上的空闲毫秒数，单独建立一个X连接，不与Qt共用
+    if not os.environ.get("DISPLAY"):
+        return None
+    import ctypes
+    import ctypes.util
+    x11_name, xss_name = ctypes.util.find_library("X11"), ctypes.util.find_library("Xss")
+    if not x11_name or not xss_name:
+        return None
+
+    class XScreenSaverInfo(ctypes.Structure):
+        _fields_ = [("window", ctypes.c_ulong), ("state", ctypes.c_int), ("kind", ctypes.c_int),
+                    ("til_or_since", ctypes.c_ulong), ("idle", ctypes.c_ulong), ("eventMask", ctypes.c_ulong)]
+
+    xlib, xss = ctypes.CDLL(x11_name), ctypes.CDLL(xss_name)
+    xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    xlib.XOpenDisplay.restype = ctypes.c_void_p
+    xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+    xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+    xss.XScreenSaverQueryExtension.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int),
+                                               ctypes.POINTER(ctypes.c_int)]
+    xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(XScreenSaverInfo)
+    xss.XScreenSaverQueryInfo.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XScreenSaverInfo)]
+    display = xlib.XOpenDisplay(None)
+    if not display:
+        return None
+    event_base, error_base = ctypes.c_int(), ctypes.c_int()
+    if not xss.XScreenSaverQueryExtension(display, ctypes.byref(event_base), ctypes.byref(error_base)):
+        return None
+    root = xlib.XDefaultRootWindow(display)
+    info = xss.XScreenSaverAllocInfo()
+
+    def idle():
+        if not xss.XScreenSaverQueryInfo(display, root, info):
+            return None
+        return info.contents.idle / 1000.0
+    return idle
+
+
+def system_idle_seconds():
+    """
+    整个系统距离用户上一次操作（任何窗口中的键盘、鼠标输入）的秒数
+
+    Windows使用GetLastInputInfo，X11使用XScreenSaver扩展（libXss）；
+    其他平台（如Wayland、macOS）或无法加载时返回None，由调用方退回按宠物窗口的输入判断
+
+    Returns:
+        float: 秒数，无法获取时返回None
+    """
+    global _idle_source
+    if _idle_source is None:
+        source = None
+        try:
+            source = _windows_idle_source() if sys.platform == "win32" else _x11_idle_source()
+        except (OSError, AttributeError) as e:
+            print(f"无法读取系统空闲时长，按宠物窗口的操作判断空闲: {e}")
+        _idle_source = source or (lambda: None)
+    return _idle_source()
+
+
+class FrameBudget:
+    """
+    帧预算：动画播放的帧率上限及其原因
+    """
+
+    def __init__(self, max_fps=None, reason="full"):
+        """
+        初始化帧预算
+
+        Args:
+            max_fps (float): 帧率上限（帧/秒），None表示按动画自身的帧延时全速播放
+            reason (str): 原因：full、active、hidden、idle 或 cpu
+        """
+        self.max_fps = max_fps
+        self.reason = reason
+
+    def interval(self):
+        """
+        最短帧间隔
+
+        Returns:
+            float: 秒数，全速时为0
+        """
+        return 1.0 / self.max_fps if self.max_fps else 0.0
+
+    def __eq__(self, other):
+        return isinstance(other, FrameBudget) and (self.max_fps, self.reason) == (other.max_fps, other.reason)
+
+    def __repr__(self):
+        return f"FrameBudget({self.max_fps!r}, {self.reason!r})"
+
+
+# 全速播放
+FULL_RATE = FrameBudget()
+
+
+class PlaybackPolicy:
+    """
+    降帧策略
+
+    按窗口是否可见、用户空闲时长和CPU预算给出帧预算，多个条件同时成立时取最低的帧率；
+    用户刚刚操作过宠物且窗口可见时总是全速。空闲按整个系统的空闲时长判断，用户在其他窗口中
+    工作时不算空闲；无法获取系统空闲时长时按宠物窗口的输入判断。子类可以重写frame_budget实现其他策略
+
+    Examples:
+        >>> policy = PlaybackPolicy(idle_after=30, idle_fps=2)
+        >>> policy.frame_budget(hidden=False, idle_seconds=45, cpu_fps=None)
+        FrameBudget(2, 'idle')
+    """
+
+    def __init__(self, hidden_fps=DEFAULT_HIDDEN_FPS, idle_after=DEFAULT_IDLE_AFTER, idle_fps=DEFAULT_IDLE_FPS,
+                 cpu_budget=DEFAULT_CPU_BUDGET, min_fps=DEFAULT_MIN_FPS, active_seconds=DEFAULT_ACTIVE_SECONDS):
+        """
+        初始化降帧策略
+
+        Args:
+            hidden_fps (float): 窗口被遮挡、最小化或隐藏时的帧率上限，None表示不因此降帧
+            idle_after (float): 用户多久没有操作（秒）后视为空闲，None表示不因空闲降帧
+            idle_fps (float): 空闲时的帧率上限
+            cpu_budget (float): 进程CPU预算（占一个核心的比例），None表示不限制
+            min_fps (float): CPU预算降帧时的帧率下限
+            active_seconds (float): 用户操作宠物后保持全速的时长（秒）
+        """
+        self.hidden_fps = hidden_fps
+        self.idle_after = idle_after
+        self.idle_fps = idle_fps
+        self.cpu_budget = cpu_budget
+        self.min_fps = min_fps
+        self.active_seconds = active_seconds
+
+    def frame_budget(self, hidden, idle_seconds, cpu_fps, system_idle_seconds=None):
+        """
+        计算帧预算
+
+        Args:
+            hidden (bool): 窗口是否被遮挡、最小化或隐藏
+            idle_seconds (float): 距离用户上一次操作宠物窗口的秒数
+            cpu_fps (float): CPU预算调节给出的帧率上限，None表示未超预算
+            system_idle_seconds (float): 距离用户上一次操作任何窗口的秒数，None表示无法获取，
+                此时只按宠物窗口的操作判断空闲
+
+        Returns:
+            FrameBudget: 帧预算
+        """
+        if hidden and self.hidden_fps is not None:
+            return FrameBudget(self.hidden_fps, "hidden")
+        if idle_seconds < self.active_seconds:
+            return FrameBudget(None, "active")
+        # 在其他窗口中的操作只推迟空闲，不进入操作期，CPU预算照常生效
+        if system_idle_seconds is not None:
+            idle_seconds = min(idle_seconds, system_idle_seconds)
+        budget = FULL_RATE
+        candidates = [
+            (self.idle_fps if self.idle_after is not None and idle_seconds >= self.idle_after else None, "idle"),
+            (cpu_fps, "cpu"),
+        ]
+        for fps, reason in candidates:
+            if fps is not None and (budget.max_fps is None or fps < budget.max_fps):
+                budget = FrameBudget(fps, reason)
+        return budget
+
+    def adjust_cpu_fps(self, cpu_fps, usage):
+        """
+        根据最近的CPU占用调节CPU预算的帧率上限
+
+        每个统计窗口调用一次：超出预算时按比例降低，低于预算的CPU_RECOVER_RATIO时每次翻倍恢复，
+        恢复到REFERENCE_FPS以上即取消限制
+
+        Args:
+            cpu_fps (float): 当前的帧率上限，None表示未限制
+            usage (float): 最近的CPU占用（占一个核心的比例）
+
+        Returns:
+            float: 新的帧率上限，None表示不限制
+        """
+        if self.cpu_budget is None:
+            return None
+        current = cpu_fps or REFERENCE_FPS
+        if usage > self.cpu_budget:
+            return max(self.min_fps, current * self.cpu_budget / usage)
+        if cpu_fps is not None and usage < self.cpu_budget * CPU_RECOVER_RATIO:
+            current *= 2
+            return None if current >= REFERENCE_FPS else current
+        return cpu_fps
+
+
+class QtPlaybackSignals:
+    """
+    从窗口和进程读取降帧信号
+    """
+
+    def __init__(self, widget):
+        """
+        初始化信号源
+
+        Args:
+            widget (QWidget): 顶层窗口
+        """
+        self.widget = widget
+
+    def now(self):
+        """
+        当前时间
+
+        Returns:
+            float: 单调递增的秒数
+        """
+        return time.monotonic()
+
+    def cpu_seconds(self):
+        """
+        进程累计的CPU时间
+
+        Returns:
+            float: 秒数
+        """
+        return time.process_time()
+
+    def idle_seconds(self):
+        """
+        整个系统的空闲时长，见system_idle_seconds
+
+        Returns:
+            float: 秒数，无法获取时返回None
+        """
+        return system_idle_seconds()
+
+    def hidden(self):
+        """
+        窗口是否看不见：隐藏、最小化，或被完全遮挡（平台报告为未暴露）
+
+        Returns:
+            bool: 看不见时返回True
+        """
+        widget = self.widget
+        # 退出时窗口销毁过程中仍可能收到事件
+        if sip.isdeleted(widget) or not widget.isVisible() or widget.isMinimized():
+            return True
+        handle = widget.windowHandle()
+        return handle is not None and not handle.isExposed()
+
+
+class FakePlaybackSignals:
+    """
+    测试用的信号源
+
+    时间和CPU时间只在调用advance时前进，可见状态直接设置；在其他窗口中的操作用notify_system_input模拟，
+    从未调用时视为无法获取系统空闲时长。与驱动播放控件的调度器共用一个虚拟时钟，时间前进时两边保持一致
+
+    Examples:
+        >>> clock = VirtualClock()
+        >>> signals = FakePlaybackSignals(clock)
+        >>> governor = PlaybackGovernor(signals=signals)
+        >>> signals.advance(120)
+        >>> governor.evaluate().reason
+        'idle'
+    """
+
+    def __init__(self, clock=None):
+        """
+        初始化信号源
+
+        Args:
+            clock (VirtualClock): 虚拟时钟，默认新建一个
+        """
+        self.clock = clock or VirtualClock()
+        self.cpu = 0.0
+        self.is_hidden = False
+        # 最近一次在其他窗口中操作的时间，None表示无法获取系统空闲时长
+        self.system_input = None
+
+    def now(self):
+        return self.clock.now()
+
+    def cpu_seconds(self):
+        return self.cpu
+
+    def idle_seconds(self):
+        return None if self.system_input is None else self.clock.now() - self.system_input
+
+    def hidden(self):
+        return self.is_hidden
+
+    def notify_system_input(self):
+        """
+        模拟用户在其他窗口中的一次操作
+        """
+        self.system_input = self.clock.now()
+
+    def advance(self, seconds, cpu_seconds=0.0):
+        """
+        让时间前进
+
+        Args:
+            seconds (float): 前进的秒数
+            cpu_seconds (float): 这段时间内进程消耗的CPU时间
+        """
+        self.clock.advance(seconds)
+        self.cpu += cpu_seconds
+
+
+class PlaybackGovernor(QObject):
+    """
+    动画播放的帧率调节器
+
+    播放控件每次安排下一帧时向调节器查询帧预算，按预算拉长帧间隔，
+    并按实际经过的时间跳过中间的帧，动画的速度不变，只是画得更少。
+    监听窗口的输入和可见性事件：用户一操作宠物就恢复全速并立即唤醒正在降帧播放的控件；
+    在其他窗口中的操作从系统空闲时长得知，下次计算帧预算时（最多晚EVALUATE_INTERVAL秒加一帧）取消空闲降帧
+
+    Examples:
+        >>> governor = PlaybackGovernor(parent=pet)
+        >>> governor.watch(pet.windowHandle())
+        >>> pet.image.setGovernor(governor)
+    """
+
+    def __init__(self, policy=None, signals=None, parent=None):
+        """
+        初始化调节器
+
+        Args:
+            policy (PlaybackPolicy): 降帧策略，默认使用PlaybackPolicy()
+            signals: 信号源，需提供now()、cpu_seconds()、idle_seconds()和hidden()，
+                默认从parent窗口和系统读取（QtPlaybackSignals）；
+                测试时传入FakePlaybackSignals
+            parent (QWidget): 父对象
+        """
+        super(PlaybackGovernor, self).__init__(parent)
+        self.policy = policy or PlaybackPolicy()
+        self.signals = signals or QtPlaybackSignals(parent)
+        self.players = []
+        now = self.signals.now()
+        self.last_input = now
+        self.cpu_fps = None
+        # 当前统计窗口的起点：(时间, 进程CPU时间)
+        self.cpu_mark = (now, self.signals.cpu_seconds())
+        self.budget = FrameBudget(None, "active")
+        self.evaluated_at = now
+        self.changes = get_registry().counter("playback_budget_changes_total", "动画帧预算的变化次数")
+        _governors.add(self)
+
+    def attach(self, player):
+        """
+        登记播放控件，恢复全速时唤醒它
+
+        Args:
+            player (AnimationPlayer): 播放控件
+        """
+        if player not in self.players:
+            self.players.append(player)
+
+    def detach(self, player):
+        """
+        取消登记播放控件
+
+        Args:
+            player (AnimationPlayer): 播放控件
+        """
+        if player in self.players:
+            self.players.remove(player)
+
+    def watch(self, window):
+        """
+        监听窗口的输入和可见性事件
+
+        Args:
+            window (QObject): 顶层窗口的QWindow（或QWidget）
+        """
+        if window is not None:
+            window.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        kind = event.type()
+        if kind in INPUT_EVENTS:
+            self.notify_input()
+        elif kind in VISIBILITY_EVENTS:
+            self.refresh()
+        return False
+
+    def notify_input(self):
+        """
+        记录一次对宠物窗口的操作，降帧中的播放控件立即恢复全速
+        """
+        self.last_input = self.signals.now()
+        # 已经全速时只记录时间，拖动时的大量移动事件不必每次重新计算
+        if self.budget.max_fps is not None:
+            self.refresh()
+
+    def refresh(self):
+        """
+        重新计算帧预算，帧率上限提高时唤醒播放控件
+        """
+        previous = self.budget
+        budget = self.evaluate()
+        if previous.max_fps is not None and (budget.max_fps is None or budget.max_fps > previous.max_fps):
+            for player in list(self.players):
+                if not sip.isdeleted(player):
+                    player.reschedule()
+
+    def cpu_usage(self):
+        """
+        统计窗口结束时返回这段时间的CPU占用，并开始新的统计窗口
+
+        Returns:
+            float: 占一个核心的比例，统计窗口未满CPU_WINDOW秒时返回None
+        """
+        now = self.signals.now()
+        start, cpu_start = self.cpu_mark
+        if now - start < CPU_WINDOW:
+            return None
+        cpu = self.signals.cpu_seconds()
+        self.cpu_mark = (now, cpu)
+        return (cpu - cpu_start) / (now - start)
+
+    def evaluate(self):
+        """
+        按当前信号计算帧预算
+
+        Returns:
+            FrameBudget: 帧预算
+        """
+        signals = self.signals
+        now = signals.now()
+        self.evaluated_at = now
+        idle_seconds = now - self.last_input
+        if idle_seconds < self.policy.active_seconds:
+            # 用户操作期间不因CPU降帧，之后重新从参考帧率开始统计和调节
+            self.cpu_fps = None
+            self.cpu_mark = (now, signals.cpu_seconds())
+        else:
+            usage = self.cpu_usage()
+            if usage is not None:
+                self.cpu_fps = self.policy.adjust_cpu_fps(self.cpu_fps, usage)
+        budget = self.policy.frame_budget(signals.hidden(), idle_seconds, self.cpu_fps, signals.idle_seconds())
+        if budget != self.budget:
+            self.changes.inc()
+            self.budget = budget
+        return budget
+
+    def frame_interval(self):
+        """
+        当前允许的最短帧间隔，播放控件安排下一帧时调用
+
+        每帧都会调用，距上次计算不足EVALUATE_INTERVAL秒时直接使用上次的帧预算
+
+        Returns:
+            float: 秒数，全速时为0
+        """
+        if self.signals.now() - self.evaluated_at >= EVALUATE_INTERVAL:
+            self.evaluate()
+        return self.budget.interval()
@@ -0,0 +1,237 @@
+import random
+import hashlib
+import threading
+
+# 常量定义
+# Feistel网络的轮数，4轮以上的平衡Feistel网络在伪随机轮函数下即为伪随机置换
+FEISTEL_ROUNDS = 4
+# 轮函数使用64位整数混合的最大半宽，更宽的定义域改用blake2b
+MIX_BITS = 64
+MIX_MASK = (1 << MIX_BITS) - 1
+
+
+class AliasSampler:
+    """
+    加权随机抽样（Walker/Vose别名法）
+
+    构建耗时O(n)，每次抽样O(1)：先均匀选一个桶，再按桶内概率在桶本身和它的别名之间二选一
+
+    Examples:
+        >>> sampler = AliasSampler([1, 1, 8])
+        >>> sampler.sample()
+        2
+    """
+
+    def __init__(self, weights):
+        """
+        构建别名表
+
+        Args:
+            weights (list[float]): 各项的非负权重，至少有一项为正
+        """
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("权重列表为空或总和不为正")
+        self.n = n
+        self.probability = [0.0] * n
+        self.alias = list(range(n))
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.probability[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # 剩余的桶因浮点误差未配对，概率按1处理
+        for i in large + small:
+            self.probability[i] = 1.0
+
+    def __len__(self):
+        return self.n
+
+    def sample(self, rnd=random.random):
+        """
+        抽取一项
+
+        Args:
+            rnd (callable): 返回[0, 1)均匀随机数的函数
+
+        Returns:
+            int: 被抽中项的下标
+        """
+        u = rnd() * self.n
+        i = int(u)
+        return i if u - i < self.probability[i] else self.alias[i]
+
+
+def mix64(x):
+    """
+    64位整数混合函数（splitmix64的终结步骤），输入相差一位时输出约一半的位不同
+
+    Args:
+        x (int): 非负整数，只使用低64位
+
+    Returns:
+        int: 64位整数
+    """
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & MIX_MASK
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EB & MIX_MASK
+    return x ^ (x >> 31)
+
+
+class FeistelPermutation:
+    """
+    [0, n) 上由种子决定的伪随机置换，不保存置换表
+
+    把下标的二进制位平分为左右两半，做FEISTEL_ROUNDS轮Feistel变换，得到 [0, 4^h) 上的双射
+    （4^h 是不小于n的最小的4的幂，不超过4n）；结果落在n之外时继续变换（循环行走），
+    直到回到 [0, n) 之内。双射的每个循环都经过起点，所以循环行走一定结束，
+    结果仍是 [0, n) 上的双射，期望行走次数小于4。内存占用O(1)，每次求值的开销与n无关
+
+    Examples:
+        >>> permutation = FeistelPermutation(10, seed=42)
+        >>> sorted(permutation[i] for i in range(10))
+        [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+    """
+
+    def __init__(self, n, seed=0, rounds=FEISTEL_ROUNDS):
+        """
+        初始化置换
+
+        Args:
+            n (int): 定义域大小，可以是任意大的正整数
+            seed (int): 种子，相同的种子和n得到相同的置换
+            rounds (int): Feistel轮数
+        """
+        if n <= 0:
+            raise ValueError("置换的定义域为空")
+        self.n = n
+        self.half = max(1, ((n - 1).bit_length() + 1) // 2)
+        self.mask = (1 << self.half) - 1
+        # 每轮的密钥由种子派生
+        digest = hashlib.blake2b(repr(seed).encode("utf-8"), digest_size=8 * rounds).digest()
+        self.keys = [int.from_bytes(digest[8 * r:8 * r + 8], "little") for r in range(rounds)]
+
+    def _round(self, key, value):
+        # 轮函数：把半边和本轮密钥混合成同样宽度的伪随机值
+        if self.half <= MIX_BITS:
+            return mix64(value ^ key) & self.mask
+        size = (self.half + 7) // 8
+        digest = hashlib.blake2b(value.to_bytes(size, "little"), key=key.to_bytes(8, "little"),
+                                 digest_size=size).digest()
+        return int.from_bytes(digest, "little") & self.mask
+
+    def _encrypt(self, x):
+        half, mask = self.half, self.mask
+        left, right = x >> half, x & mask
+        for key in self.keys:
+            left, right = right, left ^ self._round(key, right)
+        return (left << half) | right
+
+    def __getitem__(self, i):
+        """
+        第i个位置上的值
+
+        Args:
+            i (int): 位置，0 <= i < n
+
+        Returns:
+            int: 置换后的值
+        """
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        x = self._encrypt(i)
+        while x >= self.n:
+            x = self._encrypt(x)
+        return x
+
+
+class NoRepeatSampler:
+    """
+    不重复抽样：依次取出 [0, n) 的一个伪随机排列
+
+    第k次抽样返回第 k // n 轮置换在 k % n 处的值，每轮的置换由种子和轮次决定，
+    一轮之内不会重复，全部取完后自动进入下一轮。状态只有种子和已抽取的次数，
+    内存占用O(1)，任意位置都可以直接求值（index_at），便于分片并行
+
+    Examples:
+        >>> sampler = NoRepeatSampler(3, seed=7)
+        >>> sorted(sampler.sample() for _ in range(3))
+        [0, 1, 2]
+    """
+
+    def __init__(self, n, seed=None, position=0):
+        """
+        初始化抽样器
+
+        Args:
+            n (int): 候选数量
+            seed (int): 种子，默认随机
+            position (int): 已经抽取的次数，从该位置继续
+        """
+        self.n = n
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.position = position
+        # 最近用到的 (轮次, 置换)，作为一个元组整体替换，多线程读取时不会错配
+        self._current = (None, None)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.n
+
+    def remaining(self):
+        """
+        本轮还没有抽到的数量
+
+        Returns:
+            int: 数量，刚进入新一轮时为n
+        """
+        return self.n - self.position % self.n
+
+    def permutation(self, epoch):
+        """
+        第epoch轮的置换
+
+        Args:
+            epoch (int): 轮次
+
+        Returns:
+            FeistelPermutation: 置换
+        """
+        current_epoch, permutation = self._current
+        if current_epoch != epoch:
+            permutation = FeistelPermutation(self.n, (self.seed, epoch))
+            self._current = (epoch, permutation)
+        return permutation
+
+    def index_at(self, position):
+        """
+        第position次抽样的结果，不改变抽样器的状态
+
+        Args:
+            position (int): 抽样序号
+
+        Returns:
+            int: 下标
+        """
+        epoch, i = divmod(position, self.n)
+        return self.permutation(epoch)[i]
+
+    def sample(self):
+        """
+        抽取下一个下标，可以在多个线程中调用
+
+        Returns:
+            int: 下标
+        """
+        with self._lock:
+            position = self.position
+            self.position += 1
+            return self.index_at(position)
@@ -0,0 +1,388 @@
+import time
+import heapq
+import random
+from PyQt6 import sip
+from PyQt6.QtCore import Qt, QTimer
+
+# 常量定义
+# 默认合并窗口（秒）：到期时间相差不超过该值的任务在同一次唤醒中执行
+DEFAULT_COALESCE_WINDOW = 0.25
+
+
+class MonotonicClock:
+    """
+    单调时钟，调度器的默认时间源
+    """
+
+    def now(self):
+        """
+        当前时间
+
+        Returns:
+            float: 单调递增的秒数
+        """
+        return time.monotonic()
+
+
+class VirtualClock:
+    """
+    虚拟时钟
+
+    时间只在调用advance时前进，用于测试中确定性地驱动调度器
+
+    Examples:
+        >>> clock = VirtualClock()
+        >>> scheduler = Scheduler(clock)
+        >>> scheduler.schedule("talk", pet.talk, Interval(5))
+        >>> clock.advance(5)
+        >>> scheduler.run_due()
+    """
+
+    def __init__(self, start=0.0):
+        """
+        初始化虚拟时钟
+
+        Args:
+            start (float): 起始时间（秒）
+        """
+        self.current = start
+
+    def now(self):
+        """
+        当前虚拟时间
+
+        Returns:
+            float: 秒数
+        """
+        return self.current
+
+    def advance(self, seconds):
+        """
+        让虚拟时间前进
+
+        Args:
+            seconds (float): 前进的秒数
+        """
+        self.current += seconds
+
+
+class Interval:
+    """
+    固定间隔策略
+    """
+
+    def __init__(self, seconds):
+        """
+        初始化固定间隔策略
+
+        Args:
+            seconds (float): 执行间隔（秒）
+        """
+        self.seconds = seconds
+
+    def next_delay(self, succeeded):
+        """
+        计算下一次执行前的等待时间
+
+        Args:
+            succeeded (bool): 本次执行是否成功
+
+        Returns:
+            float: 等待秒数
+        """
+        return self.seconds
+
+
+class Jitter(Interval):
+    """
+    随机抖动策略：在固定间隔上叠加 [-jitter, +jitter] 的随机偏移，
+    避免多个会话的任务在同一时刻集中唤醒
+    """
+
+    def __init__(self, seconds, jitter, rng=None):
+        """
+        初始化抖动策略
+
+        Args:
+            seconds (float): 基础间隔（秒）
+            jitter (float): 最大偏移（秒）
+            rng (random.Random): 随机数生成器，测试时可传入固定种子
+        """
+        super(Jitter, self).__init__(seconds)
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+
+    def next_delay(self, succeeded):
+        return max(0.0, self.seconds + self.rng.uniform(-self.jitter, self.jitter))
+
+
+class Backoff(Interval):
+    """
+    退避策略：执行失败时按倍数拉长间隔，成功后恢复基础间隔
+    """
+
+    def __init__(self, seconds, factor=2.0, maximum=None):
+        """
+        初始化退避策略
+
+        Args:
+            seconds (float): 基础间隔（秒）
+            factor (float): 每次失败后的放大倍数
+            maximum (float): 间隔上限（秒），默认不限制
+        """
+        super(Backoff, self).__init__(seconds)
+        self.factor = factor
+        self.maximum = maximum
+        self.current = seconds
+
+    def next_delay(self, succeeded):
+        if succeeded:
+            self.current = self.seconds
+        else:
+            self.current *= self.factor
+            if self.maximum is not None:
+                self.current = min(self.current, self.maximum)
+        return self.current
+
+
+class Job:
+    """
+    调度任务
+    """
+
+    def __init__(self, name, callback, policy, due):
+        """
+        初始化调度任务
+
+        Args:
+            name (str): 任务名
+            callback (callable): 任务回调，返回False表示执行失败
+            policy (Interval): 间隔策略
+            due (float): 下一次到期时间
+        """
+        self.name = name
+        self.callback = callback
+        self.policy = policy
+        self.due = due
+        self.runs = 0
+        self.failures = 0
+        # 每次重新入队时递增，用于让堆中的旧条目失效
+        self.generation = 0
+
+
+class Scheduler:
+    """
+    合并唤醒的任务调度器
+
+    用优先队列保存命名任务，到期时间相差不超过合并窗口的任务在同一次唤醒中执行，
+    多个周期任务共用一次唤醒，而不是各自的定时器各自唤醒进程。
+    本类不依赖事件循环，由调用方在合适的时机调用run_due；
+    QtScheduler负责用单个QTimer驱动
+
+    Examples:
+        >>> scheduler = Scheduler()
+        >>> scheduler.schedule("action", pet.randomAct, Interval(5))
+        >>> scheduler.schedule("talk", pet.talk, Interval(5))
+    """
+
+    def __init__(self, clock=None, coalesce_window=DEFAULT_COALESCE_WINDOW):
+        """
+        初始化调度器
+
+        Args:
+            clock: 时间源，需提供now()方法，默认为MonotonicClock
+            coalesce_window (float): 合并窗口（秒）
+        """
+        self.clock = clock or MonotonicClock()
+        self.coalesce_window = coalesce_window
+        self.jobs = {}
+        self._queue = []
+        self._sequence = 0
+        self._paused_at = None
+        # 提前量（秒）：驱动的定时器可能略早触发，最早任务在提前量内即视为到期
+        self.tolerance = 0.0
+        # 实际执行了任务的唤醒次数
+        self.wakeups = 0
+        # 任务实际执行时间相对到期时间的偏差（秒）记录到这里，需提供observe方法，如metrics.Histogram
+        self.lateness = None
+
+    def schedule(self, name, callback, policy, delay=None):
+        """
+        添加或替换命名任务
+
+        Args:
+            name (str): 任务名，同名任务会被替换
+            callback (callable): 任务回调，返回False表示执行失败
+            policy (Interval): 间隔策略
+            delay (float): 首次执行前的等待秒数，默认使用策略给出的间隔
+        """
+        if delay is None:
+            delay = policy.next_delay(True)
+        self.cancel(name)
+        job = Job(name, callback, policy, self.clock.now() + delay)
+        self.jobs[name] = job
+        self._push(job)
+        self._changed()
+
+    def cancel(self, name):
+        """
+        取消命名任务
+
+        Args:
+            name (str): 任务名
+
+        Returns:
+            bool: 任务存在并被取消时返回True
+        """
+        job = self.jobs.pop(name, None)
+        if job is None:
+            return False
+        job.generation += 1
+        self._changed()
+        return True
+
+    def pause(self):
+        """
+        暂停调度，暂停期间不再唤醒
+        """
+        if self._paused_at is None:
+            self._paused_at = self.clock.now()
+            self._changed()
+
+    def resume(self):
+        """
+        恢复调度，所有任务的到期时间顺延暂停的时长
+        """
+        if self._paused_at is None:
+            return
+        paused = self.clock.now() - self._paused_at
+        self._paused_at = None
+        self._queue = []
+        for job in self.jobs.values():
+            job.due += paused
+            job.generation += 1
+            self._push(job)
+        self._changed()
+
+    def isPaused(self):
+        """
+        是否处于暂停状态
+
+        Returns:
+            bool: 暂停时返回True
+        """
+        return self._paused_at is not None
+
+    def next_due(self):
+        """
+        下一次需要唤醒的时间
+
+        Returns:
+            float: 最早到期任务的时间，没有任务或已暂停时返回None
+        """
+        if self._paused_at is not None:
+            return None
+        self._discard_stale()
+        return self._queue[0][0] if self._queue else None
+
+    def run_due(self):
+        """
+        执行所有到期任务
+
+        最早到期的任务到期后，到期时间落在合并窗口内的任务一并执行
+
+        Returns:
+            list[str]: 本次执行的任务名
+        """
+        if self._paused_at is not None:
+            return []
+        now = self.clock.now()
+        first = self.next_due()
+        if first is None or first > now + self.tolerance:
+            self._changed()
+            return []
+        horizon = max(now, first) + self.coalesce_window
+        batch = []
+        while self._queue and self._queue[0][0] <= horizon:
+            _, _, generation, job = heapq.heappop(self._queue)
+            if generation == job.generation and self.jobs.get(job.name) is job:
+                batch.append(job)
+        lateness = self.lateness
+        for job in batch:
+            if lateness is not None:
+                lateness.observe(abs(now - job.due))
+            succeeded = self._run(job)
+            # 回调中可能取消或替换了自己
+            if self.jobs.get(job.name) is job:
+                job.due = max(job.due, now) + job.policy.next_delay(succeeded)
+                self._push(job)
+        if batch:
+            self.wakeups += 1
+        self._changed()
+        return [job.name for job in batch]
+
+    def _run(self, job):
+        # 执行单个任务，异常视为失败，不影响同批其他任务
+        job.runs += 1
+        try:
+            succeeded = job.callback() is not False
+        except Exception as e:
+            print(f"调度任务{job.name}执行失败: {e}")
+            succeeded = False
+        if not succeeded:
+            job.failures += 1
+        return succeeded
+
+    def _push(self, job):
+        self._sequence += 1
+        heapq.heappush(self._queue, (job.due, self._sequence, job.generation, job))
+
+    def _discard_stale(self):
+        # 惰性删除：丢弃已取消或已重新入队的旧条目
+        while self._queue:
+            _, _, generation, job = self._queue[0]
+            if generation == job.generation and self.jobs.get(job.name) is job:
+                return
+            heapq.heappop(self._queue)
+
+    def _changed(self):
+        # 任务队列变化时的钩子，由具体的驱动实现重新安排唤醒
+        pass
+
+
+class QtScheduler(Scheduler):
+    """
+    由单个QTimer驱动的调度器
+
+    定时器总是对准最早到期的任务，执行后再对准下一个，
+    整个宠物只有这一个周期性唤醒源
+    """
+
+    def __init__(self, parent=None, clock=None, coalesce_window=DEFAULT_COALESCE_WINDOW):
+        """
+        初始化调度器
+
+        Args:
+            parent (QObject): 定时器的父对象
+            clock: 时间源
+            coalesce_window (float): 合并窗口（秒）
+        """
+        super(QtScheduler, self).__init__(clock, coalesce_window)
+        self.timer = QTimer(parent)
+        self.timer.setSingleShot(True)
+        # 粗粒度定时器允许系统把唤醒与其他定时器对齐
+        self.timer.setTimerType(Qt.TimerType.CoarseTimer)
+        self.timer.timeout.connect(self.run_due)
+        # 粗粒度定时器最多可能提前5%触发
+        self.tolerance = coalesce_window
+
+    def _changed(self):
+        # 程序退出时定时器可能先于调度任务被销毁
+        if sip.isdeleted(self.timer):
+            return
+        due = self.next_due()
+        if due is None:
+            self.timer.stop()
+            return
+        delay = max(0, int((due - self.clock.now()) * 1000))
+        self.timer.start(delay)
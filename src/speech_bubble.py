@@ -0,0 +1,157 @@
+from collections import OrderedDict
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPen, QStaticText, QTransform
+from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+# 常量定义
+# 对话框字体
+BUBBLE_FONT_FAMILY = "楷体"
+# 对话框字号（磅）
+BUBBLE_FONT_SIZE = 15
+# 对话框文字颜色
+BUBBLE_TEXT_COLOR = "white"
+# 对话框预留的行数，超出宽度的对话自动换行
+BUBBLE_LINES = 2
+# 文本排版缓存的最大条目数
+LAYOUT_CACHE_SIZE = 256
+
+
+class BubbleStyle:
+    """
+    对话框样式
+
+    字体、画笔和行高在创建时解析一次，绘制时直接使用，不再经过样式表
+    """
+
+    def __init__(self, family=BUBBLE_FONT_FAMILY, size=BUBBLE_FONT_SIZE, color=BUBBLE_TEXT_COLOR,
+                 bold=True, lines=BUBBLE_LINES):
+        """
+        初始化样式
+
+        Args:
+            family (str): 字体
+            size (int): 字号（磅）
+            color (str): 文字颜色，可以是颜色名或 #RRGGBB
+            bold (bool): 是否加粗
+            lines (int): 预留的行数
+        """
+        self.font = QFont(family, size)
+        self.font.setBold(bold)
+        self.pen = QPen(QColor(color))
+        self.lines = lines
+        self.line_height = QFontMetrics(self.font).lineSpacing()
+
+    def key(self):
+        """
+        样式在排版缓存中的键
+
+        Returns:
+            str: 字体描述
+        """
+        return self.font.key()
+
+
+# 默认样式，所有宠物共用
+_default_style = None
+
+
+def default_style():
+    """
+    获取默认对话框样式
+
+    Returns:
+        BubbleStyle: 默认样式
+    """
+    global _default_style
+    if _default_style is None:
+        _default_style = BubbleStyle()
+    return _default_style
+
+
+class SpeechBubble(QWidget):
+    """
+    对话框控件
+
+    用缓存的QStaticText绘制对话文本，代替每次说话都重新设置样式表并adjustSize的QLabel。
+    控件高度按样式预留的行数固定，更换文本不会改变sizeHint，也就不会触发布局重排，
+    只需要重绘对话框自身。排版结果按 (文本, 字体, 宽度) 缓存，重复出现的对话（例如点击反馈）
+    直接复用已排好的字形。
+    """
+
+    def __init__(self, parent=None, style=None):
+        """
+        初始化对话框
+
+        Args:
+            parent (QWidget): 父窗口部件
+            style (BubbleStyle): 对话框样式，默认使用共享的默认样式
+        """
+        super(SpeechBubble, self).__init__(parent)
+        self.bubble_style = style or default_style()
+        self.layouts = OrderedDict()
+        self.current_text = ""
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+
+    def text(self):
+        """
+        当前显示的文本
+
+        Returns:
+            str: 文本
+        """
+        return self.current_text
+
+    def setText(self, text):
+        """
+        设置显示的文本，只重绘对话框
+
+        Args:
+            text (str): 文本
+        """
+        if text == self.current_text:
+            return
+        self.current_text = text
+        self.update()
+
+    def staticText(self, text):
+        """
+        获取文本的排版结果，未缓存时排版并放入缓存
+
+        Args:
+            text (str): 文本
+
+        Returns:
+            QStaticText: 已排版的文本
+        """
+        key = (text, self.bubble_style.key(), self.width())
+        static = self.layouts.get(key)
+        if static is not None:
+            self.layouts.move_to_end(key)
+            return static
+        static = QStaticText(text)
+        static.setTextFormat(Qt.TextFormat.PlainText)
+        static.setTextWidth(self.width())
+        static.prepare(QTransform(), self.bubble_style.font)
+        self.layouts[key] = static
+        if len(self.layouts) > LAYOUT_CACHE_SIZE:
+            self.layouts.popitem(last=False)
+        return static
+
+    def sizeHint(self):
+        return QSize(0, self.bubble_style.line_height * self.bubble_style.lines)
+
+    def minimumSizeHint(self):
+        return self.sizeHint()
+
+    def paintEvent(self, event):
+        if not self.current_text:
+            return
+        static = self.staticText(self.current_text)
+        painter = QPainter(self)
+        painter.setFont(self.bubble_style.font)
+        painter.setPen(self.bubble_style.pen)
+        # 与QLabel默认对齐方式一致：水平靠左、垂直居中
+        top = max(0, (self.height() - int(static.size().height())) // 2)
+        painter.drawStaticText(0, top, static)
+        painter.end()
@@ -0,0 +1,286 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+from array import array
+from collections.abc import Mapping, Sequence
+
+# 常量定义
+# 语料文件格式（小端）：
+#   文件头   magic(8s) version(I) category_count(I) directory_pos(Q)
+#   记录区   若干条 length(I) + UTF-8文本，各类别的记录可以交错写入
+#   偏移表   每个类别 count 个 Q，依次为该类别每条记录在文件中的位置
+#   目录     每个类别 name_length(H) + 名称 + count(Q) + table_pos(Q)
+CORPUS_MAGIC = b"PETCORPS"
+CORPUS_VERSION = 1
+HEADER = struct.Struct("<8sIIQ")
+RECORD_LENGTH = struct.Struct("<I")
+DIRECTORY_NAME = struct.Struct("<H")
+DIRECTORY_ENTRY = struct.Struct("<QQ")
+OFFSET = struct.Struct("<Q")
+# 模板在语料中作为一个保留类别保存
+TEMPLATES_CATEGORY = "__templates__"
+# 纯文本语料中的类别标题，如 [character]
+SECTION_PREFIX = "["
+SECTION_SUFFIX = "]"
+
+
+class MappedCategory(Sequence):
+    """
+    内存映射语料中的一个类别
+
+    支持len和下标访问，取一条记录只读取偏移表中的一项和对应的一条记录，
+    不会把整个类别读入内存
+    """
+
+    def __init__(self, mapping, count, table_pos):
+        """
+        初始化类别
+
+        Args:
+            mapping (mmap.mmap): 语料文件的内存映射
+            count (int): 记录数
+            table_pos (int): 偏移表在文件中的位置
+        """
+        self.mapping = mapping
+        self.count = count
+        self.table_pos = table_pos
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        pos = OFFSET.unpack_from(self.mapping, self.table_pos + i * OFFSET.size)[0]
+        length = RECORD_LENGTH.unpack_from(self.mapping, pos)[0]
+        start = pos + RECORD_LENGTH.size
+        return self.mapping[start:start + length].decode("utf-8")
+
+
+class MappedCorpus(Mapping):
+    """
+    内存映射的故事语料
+
+    以类别名为键的只读映射，值为MappedCategory；模板通过templates属性访问，
+    不计入类别。打开文件只读取文件头和目录，启动耗时与语料规模无关
+
+    Examples:
+        >>> corpus = MappedCorpus("story/story_corpus.corpus")
+        >>> len(corpus["character"])
+        10
+        >>> generator = LocalStoryGenerator(corpus.templates, corpus)
+    """
+
+    def __init__(self, path):
+        """
+        打开语料文件
+
+        Args:
+            path (str): 语料文件路径
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, category_count, directory_pos = HEADER.unpack_from(self.mapping, 0)
+        if magic != CORPUS_MAGIC or version != CORPUS_VERSION:
+            self.mapping.close()
+            raise ValueError(f"不是有效的语料文件: {path}")
+        self.categories = {}
+        pos = directory_pos
+        for _ in range(category_count):
+            length = DIRECTORY_NAME.unpack_from(self.mapping, pos)[0]
+            pos += DIRECTORY_NAME.size
+            name = self.mapping[pos:pos + length].decode("utf-8")
+            pos += length
+            count, table_pos = DIRECTORY_ENTRY.unpack_from(self.mapping, pos)
+            pos += DIRECTORY_ENTRY.size
+            self.categories[name] = MappedCategory(self.mapping, count, table_pos)
+        self.templates = self.categories.pop(TEMPLATES_CATEGORY, MappedCategory(self.mapping, 0, 0))
+
+    def __getitem__(self, name):
+        return self.categories[name]
+
+    def __iter__(self):
+        return iter(self.categories)
+
+    def __len__(self):
+        return len(self.categories)
+
+    def close(self):
+        """
+        关闭内存映射
+        """
+        self.mapping.close()
+
+
+class CorpusWriter:
+    """
+    语料文件写入器
+
+    记录按到达顺序流式写入文件，每个类别只在内存中保留一个偏移数组，
+    可以转换远大于内存的语料
+
+    Examples:
+        >>> with CorpusWriter("out.corpus") as writer:
+        ...     writer.add("character", "小兔子")
+    """
+
+    def __init__(self, path):
+        """
+        创建语料文件
+
+        Args:
+            path (str): 输出路径
+        """
+        self.path = path
+        self.temp = path + ".tmp"
+        self.file = open(self.temp, "wb")
+        self.file.write(HEADER.pack(CORPUS_MAGIC, CORPUS_VERSION, 0, 0))
+        self.offsets = {}
+
+    def add(self, category, text):
+        """
+        写入一条记录
+
+        Args:
+            category (str): 类别名，模板使用TEMPLATES_CATEGORY
+            text (str): 记录文本
+        """
+        data = text.encode("utf-8")
+        self.offsets.setdefault(category, array("Q")).append(self.file.tell())
+        self.file.write(RECORD_LENGTH.pack(len(data)))
+        self.file.write(data)
+
+    def close(self):
+        """
+        写入偏移表和目录，完成文件
+        """
+        tables = {}
+        for category, offsets in self.offsets.items():
+            if sys.byteorder != "little":
+                offsets.byteswap()
+            tables[category] = self.file.tell()
+            self.file.write(offsets.tobytes())
+        directory_pos = self.file.tell()
+        for category, offsets in self.offsets.items():
+            name = category.encode("utf-8")
+            self.file.write(DIRECTORY_NAME.pack(len(name)))
+            self.file.write(name)
+            self.file.write(DIRECTORY_ENTRY.pack(len(offsets), tables[category]))
+        self.file.seek(0)
+        self.file.write(HEADER.pack(CORPUS_MAGIC, CORPUS_VERSION, len(self.offsets), directory_pos))
+        self.file.close()
+        os.replace(self.temp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            os.remove(self.temp)
+
+
+def load_json_corpus(path):
+    """
+    读取JSON语料
+
+    JSON格式为 {"templates": [...], "elements": {"类别": [...]}}
+
+    Args:
+        path (str): JSON文件路径
+
+    Returns:
+        tuple: (模板列表, 元素字典)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["templates"], data["elements"]
+
+
+def iter_text_corpus(path):
+    """
+    逐行读取纯文本语料
+
+    纯文本格式中 [类别名] 开始一个类别，之后每个非空行是该类别的一条记录，
+    [templates] 类别中是故事模板
+
+    Args:
+        path (str): 文本文件路径
+
+    Yields:
+        tuple: (类别名, 记录文本)
+    """
+    category = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(SECTION_PREFIX) and line.endswith(SECTION_SUFFIX):
+                category = line[1:-1]
+                if category == "templates":
+                    category = TEMPLATES_CATEGORY
+                continue
+            if category is None:
+                raise ValueError(f"记录前缺少类别标题: {line}")
+            yield category, line
+
+
+def convert(source, target):
+    """
+    把JSON或纯文本语料转换为内存映射语料文件
+
+    Args:
+        source (str): 源文件，扩展名为.json时按JSON读取，否则按纯文本读取
+        target (str): 输出路径
+
+    Returns:
+        dict: 各类别的记录数
+    """
+    with CorpusWriter(target) as writer:
+        if source.lower().endswith(".json"):
+            templates, elements = load_json_corpus(source)
+            for template in templates:
+                writer.add(TEMPLATES_CATEGORY, template)
+            for category, texts in elements.items():
+                for text in texts:
+                    writer.add(category, text)
+        else:
+            for category, text in iter_text_corpus(source):
+                writer.add(category, text)
+        return {category: len(offsets) for category, offsets in writer.offsets.items()}
+
+
+def open_corpus(path):
+    """
+    打开语料：.json 读入内存，其他扩展名按内存映射语料打开
+
+    Args:
+        path (str): 语料路径
+
+    Returns:
+        tuple: (模板序列, 元素映射)
+    """
+    if path.lower().endswith(".json"):
+        return load_json_corpus(path)
+    corpus = MappedCorpus(path)
+    return corpus.templates, corpus
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="把JSON或纯文本故事语料转换为内存映射语料文件")
+    parser.add_argument("source", help="源文件（.json 或 [类别] 分段的纯文本）")
+    parser.add_argument("target", help="输出的语料文件")
+    args = parser.parse_args()
+    for category, count in convert(args.source, args.target).items():
+        print(f"{category}: {count}")
@@ -0,0 +1,354 @@
+import os
+import time
+import tempfile
+import threading
+from array import array
+from bisect import bisect_right
+from collections import deque
+
+# 常量定义
+# 历史记录文件路径的环境变量，未设置时使用用户目录下的默认路径
+HISTORY_ENV = "DESKTOP_PET_HISTORY"
+# 默认历史记录文件
+DEFAULT_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".desktop-pet", "story_history.log")
+# 偏移索引文件的扩展名，与日志文件放在一起
+INDEX_SUFFIX = ".idx"
+# 内存中保留的最近条目数，翻页和搜索先查这里
+RING_SIZE = 1000
+# 搜索时每次从日志末尾向前读取的条目数
+SEARCH_ENTRIES = 4096
+# 每条记录的时间戳宽度（秒，十进制定宽），之后是一个制表符和转义后的文本
+TIMESTAMP_WIDTH = 10
+# 偏移索引中每条记录占用的字节数
+OFFSET_SIZE = array("Q").itemsize
+
+
+def escape(text):
+    """
+    转义文本，使每条记录占一行
+
+    Args:
+        text (str): 原文
+
+    Returns:
+        str: 不含换行和制表符的文本
+    """
+    return text.replace("\\", "\\\\").replace("\n", "\\n").replace("\t", "\\t")
+
+
+def unescape(text):
+    """
+    还原escape转义的文本
+
+    Args:
+        text (str): 转义后的文本
+
+    Returns:
+        str: 原文
+    """
+    if "\\" not in text:
+        return text
+    out = []
+    chars = iter(text)
+    for char in chars:
+        if char == "\\":
+            char = next(chars, "")
+            char = {"n": "\n", "t": "\t"}.get(char, char)
+        out.append(char)
+    return "".join(out)
+
+
+class StoryHistory:
+    """
+    故事大会的历史记录
+
+    所有条目按编号顺序追加写入日志文件（每行“时间戳<TAB>文本”），同时在索引文件中追加
+    该行的起始偏移，读取任意编号的条目只需一次定长读取和一次行读取。最近的条目保存在
+    内存环形缓冲区中。追加的开销与已有条目数无关。
+
+    正在生成的故事先作为未完成条目占用编号，可以继续追加文本，完成后才写入日志；
+    日志严格按编号写入，未完成条目之后的条目在内存中等待
+
+    Examples:
+        >>> history = StoryHistory("story_history.log")
+        >>> history.append("用户: 小兔子")
+        0
+        >>> entry = history.append("故事生成器: ", final=False)
+        >>> history.extend(entry, "从前有一只小兔子……")
+        >>> history.finish(entry)
+        >>> history.search("小兔子")
+        [1, 0]
+    """
+
+    def __init__(self, path, ring_size=RING_SIZE):
+        """
+        打开历史记录，文件不存在时创建
+
+        Args:
+            path (str): 日志文件路径，索引文件为同名加.idx
+            ring_size (int): 内存中保留的最近条目数
+        """
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # 最近的条目：(编号, 文本)
+        self.ring = deque(maxlen=ring_size)
+        # 尚未写入日志的条目：编号 -> [文本片段, 是否完成]，按编号排列
+        self.unwritten = {}
+        self.written = self._recover()
+        self.log = open(path, "ab")
+        self.index = open(self.index_path, "ab")
+        self.reader = open(path, "rb")
+        self.index_reader = open(self.index_path, "rb")
+        self.count = self.written
+
+    def __len__(self):
+        return self.count
+
+    def _recover(self):
+        """
+        校验索引与日志是否一致，修复上次异常退出留下的不完整记录
+
+        只检查日志末尾：丢弃指向日志之外的索引项，补上已写入日志但未进入索引的行，
+        截掉没有换行结尾的半行
+
+        Returns:
+            int: 日志中的条目数
+        """
+        open(self.path, "ab").close()
+        open(self.index_path, "ab").close()
+        log_size = os.path.getsize(self.path)
+        with open(self.index_path, "r+b") as index:
+            count = os.path.getsize(self.index_path) // OFFSET_SIZE
+            end = 0
+            with open(self.path, "rb") as log:
+                while count:
+                    index.seek((count - 1) * OFFSET_SIZE)
+                    offset = array("Q", index.read(OFFSET_SIZE))[0]
+                    log.seek(offset)
+                    line = log.readline()
+                    if offset < log_size and line.endswith(b"\n"):
+                        end = offset + len(line)
+                        break
+                    count -= 1
+                # 补上索引之后的完整行
+                index.truncate(count * OFFSET_SIZE)
+                index.seek(count * OFFSET_SIZE)
+                log.seek(end)
+                missing = array("Q")
+                for line in log:
+                    if not line.endswith(b"\n"):
+                        break
+                    missing.append(end)
+                    end += len(line)
+                index.write(missing.tobytes())
+                count += len(missing)
+        if end < log_size:
+            with open(self.path, "r+b") as log:
+                log.truncate(end)
+        return count
+
+    def append(self, text, final=True):
+        """
+        追加一条记录
+
+        Args:
+            text (str): 文本
+            final (bool): 是否已完成；未完成的条目可以继续extend，finish后写入日志
+
+        Returns:
+            int: 条目编号
+        """
+        with self._lock:
+            entry = self.count
+            self.count += 1
+            self.unwritten[entry] = [[text], final]
+            self.ring.append((entry, None))
+            if final:
+                self._flush()
+        return entry
+
+    def extend(self, entry, text):
+        """
+        在未完成的条目末尾追加文本
+
+        Args:
+            entry (int): 条目编号
+            text (str): 追加的文本
+        """
+        with self._lock:
+            pending = self.unwritten.get(entry)
+            if pending is not None and not pending[1]:
+                pending[0].append(text)
+
+    def finish(self, entry):
+        """
+        标记条目已完成，按编号顺序写入日志
+
+        Args:
+            entry (int): 条目编号
+        """
+        with self._lock:
+            pending = self.unwritten.get(entry)
+            if pending is not None:
+                pending[1] = True
+                self._flush()
+
+    def _flush(self):
+        # 从最早的未写入条目开始，连续写入已完成的条目，遇到未完成的条目即停止
+        wrote = False
+        while self.written in self.unwritten and self.unwritten[self.written][1]:
+            text = "".join(self.unwritten.pop(self.written)[0])
+            offset = self.log.tell()
+            line = f"{int(time.time()):0{TIMESTAMP_WIDTH}d}\t{escape(text)}\n".encode("utf-8")
+            self.log.write(line)
+            self.index.write(array("Q", [offset]).tobytes())
+            self._remember(self.written, text)
+            self.written += 1
+            wrote = True
+        if wrote:
+            self.log.flush()
+            self.index.flush()
+
+    def _remember(self, entry, text):
+        # 写入日志后把文本放进环形缓冲区；条目已经滑出缓冲区时忽略
+        if self.ring and self.ring[0][0] <= entry:
+            self.ring[entry - self.ring[0][0]] = (entry, text)
+
+    def get(self, entry):
+        """
+        读取条目文本
+
+        Args:
+            entry (int): 条目编号
+
+        Returns:
+            str: 文本
+        """
+        with self._lock:
+            return self._get(entry)
+
+    def _get(self, entry):
+        if not 0 <= entry < self.count:
+            raise IndexError(entry)
+        pending = self.unwritten.get(entry)
+        if pending is not None:
+            return "".join(pending[0])
+        if self.ring and self.ring[0][0] <= entry:
+            return self.ring[entry - self.ring[0][0]][1]
+        return self._read(entry)
+
+    def _offset(self, entry):
+        # 条目在日志中的起始偏移
+        self.index_reader.seek(entry * OFFSET_SIZE)
+        return array("Q", self.index_reader.read(OFFSET_SIZE))[0]
+
+    def _read(self, entry):
+        # 从日志读取：先在索引中取偏移，再读取那一行
+        self.reader.seek(self._offset(entry))
+        line = self.reader.readline().decode("utf-8")
+        return unescape(line[TIMESTAMP_WIDTH + 1:].rstrip("\n"))
+
+    def page(self, start, stop):
+        """
+        读取一段连续的条目
+
+        Args:
+            start (int): 起始编号（包含）
+            stop (int): 结束编号（不包含）
+
+        Returns:
+            list[str]: 文本
+        """
+        with self._lock:
+            start, stop = max(0, start), min(stop, self.count)
+            return [self._get(entry) for entry in range(start, stop)]
+
+    def search(self, query, limit=50, before=None):
+        """
+        搜索包含关键词的条目，从新到旧返回
+
+        尚未写入日志的条目在内存中查找；日志从最新的条目开始向前，每次读取SEARCH_ENTRIES条
+        （只读取偏移索引中对应的一段和日志中对应的连续几行，关键词不会跨块），在块内从后向前
+        做字节查找，按偏移把命中位置换算为条目编号并跳到上一行，凑满limit个结果即停止。
+        耗时与向前扫描到第limit个命中为止的条目数成正比，常见关键词只需读取日志末尾的一块，
+        与历史总长无关；命中少于limit个的关键词仍要扫描整个日志（O(历史总长)），
+        可以用before分批继续查找
+
+        Args:
+            query (str): 关键词
+            limit (int): 最多返回的条目数
+            before (int): 只返回编号小于该值的条目，用于继续查找更早的结果
+
+        Returns:
+            list[int]: 条目编号
+        """
+        if not query:
+            return []
+        before = self.count if before is None else before
+        with self._lock:
+            hits = [entry for entry, (parts, _) in self.unwritten.items()
+                    if entry < before and query in "".join(parts)]
+            stop = min(self.written, before)
+            end = self._offset(stop) if stop < self.written else self.log.tell()
+        hits.sort(reverse=True)
+        if len(hits) >= limit:
+            return hits[:limit]
+        found = []
+        needle = escape(query).encode("utf-8")
+        # 已写入日志的部分只会追加，不加锁也能读到一致的内容
+        with open(self.path, "rb") as log, open(self.index_path, "rb") as index:
+            # 每次扫描编号在[first, stop)之间的条目，即日志的[offsets[0], end)
+            while stop > 0 and len(hits) + len(found) < limit:
+                first = max(0, stop - SEARCH_ENTRIES)
+                index.seek(first * OFFSET_SIZE)
+                offsets = array("Q", index.read((stop - first) * OFFSET_SIZE))
+                start = offsets[0]
+                log.seek(start)
+                chunk = log.read(end - start)
+                # 从块尾向前查找，命中后直接跳到上一行继续，凑满即停止
+                at = chunk.rfind(needle)
+                while at >= 0 and len(hits) + len(found) < limit:
+                    i = bisect_right(offsets, start + at) - 1
+                    line = offsets[i] - start
+                    if at >= line + TIMESTAMP_WIDTH + 1:
+                        found.append(first + i)
+                        at = chunk.rfind(needle, 0, line)
+                    else:
+                        # 时间戳中的命中不算，继续查找这一行更靠前的位置
+                        at = chunk.rfind(needle, 0, at + len(needle) - 1)
+                stop, end = first, start
+        return (hits + found)[:limit]
+
+    def close(self):
+        """
+        关闭文件，未完成的条目不会写入
+        """
+        for f in (self.log, self.index, self.reader, self.index_reader):
+            f.close()
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_history():
+    """
+    获取全局历史记录，路径可以通过环境变量 DESKTOP_PET_HISTORY 指定
+
+    Returns:
+        StoryHistory: 历史记录；文件无法打开时改用临时目录中本次运行专用的文件
+    """
+    global _history
+    with _history_lock:
+        if _history is None:
+            path = os.environ.get(HISTORY_ENV) or DEFAULT_HISTORY_PATH
+            try:
+                _history = StoryHistory(path)
+            except OSError as e:
+                print(f"无法打开故事历史记录 {path}: {e}")
+                _history = StoryHistory(os.path.join(tempfile.gettempdir(), f"desktop-pet-history-{os.getpid()}.log"))
+    return _history
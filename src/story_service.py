@@ -0,0 +1,282 @@
+import os
+import json
+import random
+import asyncio
+import argparse
+
+from metrics import get_registry
+
+# 常量定义
+# 默认监听地址和端口（只监听本机）
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# 每个连接最多排队的请求数，排满后暂停读取该连接，由TCP流量控制把压力传回客户端
+PIPELINE_DEPTH = 64
+# 单个请求最多生成的故事数
+MAX_STORIES_PER_REQUEST = 1000
+# 单行请求的最大字节数
+MAX_LINE_BYTES = 64 * 1024
+# 监听队列长度，上千个连接同时建立时不被拒绝
+LISTEN_BACKLOG = 1024
+# 连续处理这么多个请求后让出一次事件循环，避免一个流水线很深的连接占满事件循环
+YIELD_EVERY = 32
+
+# 服务指标
+REQUESTS = get_registry().counter("story_service_requests_total", "故事服务处理的请求数")
+ERRORS = get_registry().counter("story_service_errors_total", "故事服务返回错误的请求数")
+CONNECTIONS = get_registry().gauge("story_service_connections", "故事服务当前的连接数")
+
+
+class RequestError(Exception):
+    """
+    请求格式错误，错误信息会返回给客户端
+    """
+
+
+class StoryService:
+    """
+    本地故事生成服务
+
+    在一个进程中保持一个已加载语料的故事生成器，通过本机的TCP或Unix套接字提供给其他工具使用。
+    协议为按行分隔的JSON，每行一个请求，按请求顺序每行返回一个响应：
+
+    - 生成：{"id": 1, "input": "小兔子", "n": 2, "seed": 42}
+      返回 {"id": 1, "stories": ["...", "..."]}；input、n、seed均可省略，
+      指定seed时结果只由seed决定，否则使用连接自己的随机序列
+    - 设置连接种子：{"op": "seed", "seed": 42}，之后该连接未指定seed的请求结果可以复现
+    - 统计：{"op": "stats"}，返回连接数和已处理的请求数
+    - 不是JSON的行视为故事主题，等同于 {"input": "该行内容"}
+
+    出错时返回 {"id": ..., "error": "错误信息"}。客户端可以不等响应连续发送请求（流水线），
+    每个连接最多排队PIPELINE_DEPTH个请求，客户端不读取响应时服务端也停止读取新的请求
+
+    Examples:
+        $ python story_service.py --port 8765
+        $ printf '{"id": 1, "input": "友谊", "seed": 7}\\n' | nc 127.0.0.1 8765
+        {"id": 1, "stories": ["关于'友谊'的故事：\\n\\n..."]}
+    """
+
+    def __init__(self, generator=None, depth=PIPELINE_DEPTH, max_stories=MAX_STORIES_PER_REQUEST):
+        """
+        初始化服务
+
+        Args:
+            generator (LocalStoryGenerator): 故事生成器，默认使用全局实例
+            depth (int): 每个连接最多排队的请求数
+            max_stories (int): 单个请求最多生成的故事数
+        """
+        if generator is None:
+            from talk_show import get_story_generator
+            generator = get_story_generator()
+        self.generator = generator
+        self.depth = depth
+        self.max_stories = max_stories
+        self.connections = 0
+        self.requests = 0
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        """
+        开始监听
+
+        Args:
+            host (str): TCP监听地址
+            port (int): TCP端口，0表示由系统分配
+            path (str): Unix套接字路径，指定时忽略host和port
+
+        Returns:
+            asyncio.Server: 服务器
+        """
+        if path:
+            if os.path.exists(path):
+                os.remove(path)
+            return await asyncio.start_unix_server(self.handle, path, limit=MAX_LINE_BYTES, backlog=LISTEN_BACKLOG)
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_LINE_BYTES, backlog=LISTEN_BACKLOG)
+
+    async def handle(self, reader, writer):
+        """
+        处理一个连接
+
+        读取和处理分在两个任务中：读取任务把请求放入有界队列，处理任务按顺序生成并写回响应。
+        队列满时读取任务等待；队列中积压的请求处理完才等待写缓冲区排空，
+        写缓冲区超过高水位时处理任务等待客户端读取
+
+        Args:
+            reader (asyncio.StreamReader): 读取流
+            writer (asyncio.StreamWriter): 写入流
+        """
+        self.connections += 1
+        CONNECTIONS.set(self.connections)
+        queue = asyncio.Queue(self.depth)
+        rng = random.Random()
+        reading = asyncio.create_task(self._read(reader, queue))
+        try:
+            handled = 0
+            while True:
+                line = await queue.get()
+                if line is None:
+                    break
+                response, rng = self.process(line, rng)
+                writer.write(response)
+                handled += 1
+                if queue.empty() or handled % YIELD_EVERY == 0:
+                    await writer.drain()
+                    await asyncio.sleep(0)
+        except ConnectionError:
+            pass
+        finally:
+            reading.cancel()
+            self.connections -= 1
+            CONNECTIONS.set(self.connections)
+            writer.close()
+
+    async def _read(self, reader, queue):
+        # 逐行读取请求，行过长或连接断开时结束
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                await queue.put(line)
+        except (ValueError, ConnectionError):
+            # 超过MAX_LINE_BYTES的行无法恢复分帧，直接结束连接
+            pass
+        # 被取消时处理任务已经退出，不再放入结束标记：队列满时放入会一直等待
+        await queue.put(None)
+
+    def process(self, line, rng):
+        """
+        处理一行请求
+
+        Args:
+            line (bytes): 请求行
+            rng (random.Random): 连接的随机数生成器
+
+        Returns:
+            tuple: (响应行, 连接之后使用的随机数生成器)
+        """
+        self.requests += 1
+        REQUESTS.inc()
+        request_id = None
+        try:
+            request = self.parse(line)
+            request_id = request.get("id")
+            op = request.get("op", "generate")
+            if op == "seed":
+                rng = random.Random(self.integer(request, "seed", None))
+                response = {"ok": True}
+            elif op == "stats":
+                response = {"connections": self.connections, "requests": self.requests}
+            elif op == "generate":
+                response = {"stories": self.generate(request, rng)}
+            else:
+                raise RequestError(f"未知操作: {op}")
+        except RequestError as e:
+            ERRORS.inc()
+            response = {"error": str(e)}
+        except Exception as e:
+            # 生成器内部出错时只让这个请求失败，连接和服务继续运行
+            print(f"处理故事请求失败: {e}")
+            ERRORS.inc()
+            response = {"error": f"服务内部错误: {e}"}
+        if request_id is not None:
+            response = dict(id=request_id, **response)
+        return (json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"), rng
+
+    @staticmethod
+    def parse(line):
+        """
+        解析请求行
+
+        Args:
+            line (bytes): 请求行
+
+        Returns:
+            dict: 请求
+        """
+        try:
+            text = line.decode("utf-8").strip()
+        except UnicodeDecodeError:
+            raise RequestError("请求不是UTF-8编码")
+        if not text.startswith("{"):
+            return {"input": text}
+        try:
+            request = json.loads(text)
+        except ValueError as e:
+            raise RequestError(f"JSON格式错误: {e}")
+        if not isinstance(request, dict):
+            raise RequestError("请求必须是JSON对象")
+        return request
+
+    @staticmethod
+    def integer(request, key, default):
+        """
+        读取请求中的整数字段
+
+        Args:
+            request (dict): 请求
+            key (str): 字段名
+            default (int): 缺省值
+
+        Returns:
+            int: 字段值
+        """
+        value = request.get(key, default)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            raise RequestError(f"{key} 必须是整数")
+        return value
+
+    def generate(self, request, rng):
+        """
+        按请求生成故事
+
+        Args:
+            request (dict): 请求
+            rng (random.Random): 连接的随机数生成器，请求指定seed时不使用
+
+        Returns:
+            list[str]: 故事
+        """
+        user_input = request.get("input", "")
+        if not isinstance(user_input, str):
+            raise RequestError("input 必须是字符串")
+        n = self.integer(request, "n", 1)
+        if not 1 <= n <= self.max_stories:
+            raise RequestError(f"n 必须在1到{self.max_stories}之间")
+        seed = self.integer(request, "seed", None)
+        if seed is not None:
+            rng = random.Random(seed)
+        return self.generator.generate_stories(n, user_input=user_input, rng=rng)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, path=None, depth=PIPELINE_DEPTH):
+    """
+    启动服务并一直运行
+
+    Args:
+        host (str): TCP监听地址
+        port (int): TCP端口，0表示由系统分配
+        path (str): Unix套接字路径，指定时使用Unix套接字
+        depth (int): 每个连接最多排队的请求数
+    """
+    service = StoryService(depth=depth)
+    server = await service.start(host, port, path)
+    address = path or "{}:{}".format(*server.sockets[0].getsockname()[:2])
+    # 第一行输出监听地址，便于脚本读取系统分配的端口
+    print(f"故事服务已启动: {address}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="在本机套接字上提供故事生成服务（按行分隔的JSON协议）")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="TCP监听地址")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP端口，0表示由系统分配")
+    parser.add_argument("--unix", help="改用Unix套接字，指定套接字路径（仅Linux/macOS）")
+    parser.add_argument("--depth", type=int, default=PIPELINE_DEPTH, help="每个连接最多排队的请求数")
+    args = parser.parse_args()
+    if args.unix and not hasattr(asyncio, "start_unix_server"):
+        parser.error("当前平台不支持Unix套接字，请使用TCP")
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.depth))
+    except KeyboardInterrupt:
+        pass
@@ -1,13 +1,27 @@
 from PyQt6 import QtGui
 from PyQt6.QtGui import QFont
-from PyQt6.QtWidgets import *
-from PyQt6 import QtWidgets
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QLabel, QLineEdit, QPushButton, QTextBrowser, QWidget
 import sys
 import os
-import socket
+import re
+import gzip
+import json
 import random
 import time
-from threading import Thread
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from bisect import bisect_right
+from itertools import count
+
+from sampling import AliasSampler, NoRepeatSampler
+from story_corpus import open_corpus
+from assets import get_assets
+from metrics import get_registry
+from story_history import get_history
 
 # 常量定义
 # 窗口参数
@@ -40,76 +54,706 @@ BUTTON_HEIGHT = 30
 BUTTON_FONT_NAME = "微软雅黑"
 BUTTON_FONT_SIZE = 10
 
+STATUS_X = 30
+STATUS_Y = 270
+STATUS_WIDTH = 480
+STATUS_HEIGHT = 30
+
+# 故事生成参数
+# 响应节奏（毫秒）：generate_story至少耗时这么久才返回，使响应更自然
+STORY_PACE_MS = 500
+# 生成线程数
+STORY_WORKERS = 2
+# 同时排队（含正在生成）的请求上限，超出时丢弃最早的请求
+MAX_PENDING_REQUESTS = 4
+# 工作线程合并片段的时间窗口（秒），避免每个片段一次跨线程信号
+STREAM_BATCH_SECONDS = 0.008
+# 界面渲染片段的间隔（毫秒），约等于一帧
+STREAM_FLUSH_MS = 16
+
+# 历史记录显示参数
+# 文本框中保留的条目数，超出一页后移除最早的条目，更早的条目滚动到顶部时再按页载入
+HISTORY_VIEW_LIMIT = 200
+# 每次载入的条目数，打开窗口时也先显示最近这么多条
+HISTORY_PAGE = 50
+# 搜索命令前缀：输入“?关键词”查找包含关键词的历史记录，重复输入继续查找更早的结果
+SEARCH_PREFIXES = ("?", "？")
+# 条目内换行的显示方式，保证每个条目在文本框中只占一个段落
+LINE_SEPARATOR = "\u2028"
+
+# 批量导出参数
+# 每个分片的故事数：分片是生成和随机种子的单位，输出与进程数无关
+EXPORT_SHARD_SIZE = 5000
+# 每个进程最多同时持有的分片数，限制等待写出的结果占用的内存
+EXPORT_WINDOW = 2
+# 默认输出文件，扩展名为.gz时按gzip压缩
+EXPORT_OUTPUT = "stories.jsonl"
+
 # 退出命令
 EXIT_COMMAND = "Q"
 
-# 故事生成模板
-STORY_TEMPLATES = [
-    "从前有{character}，{character}非常{adjective}。有一天，{character}遇到了{event}，于是{character}决定{action}。最后，{character}学会了{lesson}。",
-    "在{place}，住着一位{character}。{character}每天都会{activity}。有一天，{character}发现{discovery}，这改变了{character}的生活。",
-    "很久以前，{character}在{place}过着{adjective}的生活。突然，{event}发生了，{character}必须{action}。经过努力，{character}终于{outcome}。",
-    "{character}是一个{adjective}的人，总是喜欢{activity}。有一天，{character}遇到了{challenge}，通过{action}，{character}获得了{reward}。",
-    "在{place}，{character}和{friend}是最好的朋友。他们一起{activity}，直到有一天{event}改变了他们的关系。"
+# 故事语料：模板和元素库保存在外部文件中，首次生成故事时才加载
+# JSON语料，可直接编辑
+STORY_CORPUS_PATH = "story/story_corpus.json"
+# 由story_corpus.py转换得到的内存映射语料，存在且不旧于JSON语料时优先使用
+MAPPED_CORPUS_PATH = "story/story_corpus.corpus"
+
+# 主题同义词：输入其中任意一个词时，同组的其他词也参与匹配
+STORY_SYNONYMS = [
+    ["友谊", "友情", "朋友", "伙伴", "友好", "交朋友"],
+    ["勇敢", "勇气", "无畏", "面对", "冒险", "探险"],
+    ["学习", "读书", "知识", "技能", "努力学习", "道理"],
+    ["快乐", "开心", "幸福", "高兴", "乐观"],
+    ["坚持", "毅力", "不放弃", "坚持不懈", "耐心"],
+    ["帮助", "互助", "合作", "团结", "分享"],
+    ["自然", "森林", "河", "山", "草原", "海", "花园", "植物", "星星"],
+    ["梦想", "愿望", "理想", "实现"],
+    ["感恩", "感谢", "珍惜"],
+    ["诚实", "真诚", "美德"],
 ]
 
-# 故事元素库
-STORY_ELEMENTS = {
-    "character": ["小兔子", "小猫咪", "小狗", "小松鼠", "小鸟", "小熊", "小狐狸", "小鹿", "小猴子", "小企鹅"],
-    "adjective": ["勇敢", "聪明", "善良", "快乐", "好奇", "勤奋", "友好", "乐观", "诚实", "有爱心"],
-    "place": ["森林里", "小河边", "山坡上", "花园中", "村庄里", "城市中", "海边", "山谷里", "草原上", "雪山上"],
-    "activity": ["唱歌", "跳舞", "画画", "读书", "探险", "帮助别人", "学习新技能", "交朋友", "照顾植物", "观察星星"],
-    "event": ["一场大雨", "一阵大风", "一个神秘的礼物", "一次意外的相遇", "一个重要的决定", "一个美丽的梦境", "一次难忘的旅行", "一个特别的节日"],
-    "action": ["勇敢面对", "寻求帮助", "努力学习", "坚持不懈", "团结合作", "发挥创意", "保持耐心", "分享快乐"],
-    "lesson": ["友谊的重要性", "勇敢面对困难", "分享的快乐", "坚持的力量", "诚实的美德", "帮助他人的意义", "珍惜时间", "感恩的心"],
-    "friend": ["小兔子", "小猫咪", "小狗", "小松鼠", "小鸟", "小熊", "小狐狸", "小鹿"],
-    "challenge": ["一道难题", "一次考验", "一个困难的选择", "一次失败的经历", "一个误解", "一次意外"],
-    "discovery": ["一个秘密花园", "一本神奇的书", "一个古老的传说", "一个隐藏的宝藏", "一个特别的才能"],
-    "outcome": ["实现了梦想", "找到了真正的朋友", "学会了重要的道理", "获得了大家的认可", "变得更加快乐"],
-    "reward": ["大家的喜爱", "内心的满足", "新的朋友", "宝贵的经验", "美好的回忆"]
-}
-
-def resource_path(relative_path):
+# 关键词索引参数
+# 索引中关键词的最大长度（字符），元素和输入都按2到该长度切分
+KEYWORD_MAX_LEN = 4
+# 有主题匹配时，每个槽位从匹配元素中抽取的概率
+THEME_BIAS = 0.7
+# 同义词匹配的权重系数（相对于输入中直接出现的关键词）
+SYNONYM_WEIGHT = 0.5
+# 索引中代表模板本身的目标名
+TEMPLATE_TARGET = ""
+
+# 模板占位符，如 {character}
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+# 元素库中不存在的占位符使用的默认值
+UNKNOWN_ELEMENT = "未知"
+# 主题缓存的最大条目数：按用户输入缓存匹配到的主题
+THEME_CACHE_SIZE = 256
+# 故事大会中没有主题的故事是否默认使用不重复模式（本次运行中全部组合用完之前不会重复）。
+# 不重复模式下所有组合等概率出现，占位符多的模板出现得更频繁，会改变模板的比例，因此默认关闭
+NO_REPEAT_STORIES = False
+# 故事大会中同名占位符是否默认取相同的值，一个故事里的 {character} 始终是同一个角色
+CONSISTENT_BINDINGS = False
+
+def compile_template(template, elements):
     """
-    获取资源文件的绝对路径，支持PyInstaller打包
-    
+    把故事模板编译成格式串和槽位列表
+
+    模板在编译时被切分为文字片段和占位符槽位：文字片段合并为一个只含 {} 的格式串，
+    每个槽位预先绑定到元素库中对应的候选列表；元素库中不存在的占位符直接替换为默认值。
+    填充时只需为每个槽位选出一个元素，再调用一次 str.format
+
     Args:
-        relative_path (str): 相对路径
-    
+        template (str): 故事模板
+        elements (dict): 故事元素库
+
     Returns:
-        str: 绝对路径
-    
+        tuple: (格式串, 槽位元组, 文字片段元组, 槽位名元组)，每个槽位为 (候选列表, 候选数量)，
+            文字片段比槽位多一个，供流式输出使用；槽位名用于按主题抽取元素
+
+    Examples:
+        >>> compile_template("{character}在{place}", {"character": ["小兔子"]})[0]
+        '{}在{}'
+    """
+    parts = PLACEHOLDER_PATTERN.split(template)
+    # 切分结果中偶数位是文字片段，奇数位是占位符名
+    literals = [parts[0]]
+    slots = []
+    names = []
+    for i in range(1, len(parts), 2):
+        name = parts[i]
+        candidates = elements.get(name)
+        if candidates:
+            slots.append((candidates, len(candidates)))
+            names.append(name)
+            literals.append(parts[i + 1])
+        else:
+            literals[-1] += UNKNOWN_ELEMENT + parts[i + 1]
+    escaped = [literal.replace("{", "{{").replace("}", "}}") for literal in literals]
+    return "{}".join(escaped), tuple(slots), tuple(literals), tuple(names)
+
+def keywords(text, max_len=KEYWORD_MAX_LEN):
+    """
+    把文本切分为2到max_len个字符的关键词（n-gram）
+
+    中文没有天然的分词边界，直接取所有短子串作为关键词
+
+    Args:
+        text (str): 文本
+        max_len (int): 关键词最大长度
+
+    Returns:
+        set[str]: 关键词集合
+
+    Examples:
+        >>> sorted(keywords("友谊的", 3))
+        ['友谊', '友谊的', '谊的']
+    """
+    grams = set()
+    for n in range(2, max_len + 1):
+        for i in range(len(text) - n + 1):
+            grams.add(text[i:i + n])
+    return grams
+
+
+class Theme:
+    """
+    一次请求匹配到的主题
+
+    按目标（元素类别或模板）保存匹配到的关键词，抽样时先按关键词权重选出一个关键词，
+    再从该关键词的倒排表中按权重抽取元素，两步都是O(1)
+    """
+
+    def __init__(self, index, matches):
+        """
+        初始化主题
+
+        Args:
+            index (StoryIndex): 关键词索引
+            matches (dict): 关键词 -> 权重系数
+        """
+        self.index = index
+        self.keywords = matches
+        self.by_target = {}
+        targets = {}
+        for keyword, factor in matches.items():
+            for target in index.postings[keyword]:
+                targets.setdefault(target, ([], []))
+                targets[target][0].append(keyword)
+                targets[target][1].append(factor)
+        for target, (words, factors) in targets.items():
+            self.by_target[target] = (words, AliasSampler(factors))
+
+    def pick(self, target, rnd):
+        """
+        从目标中抽取一个与主题相关的元素下标
+
+        Args:
+            target (str): 元素类别名，TEMPLATE_TARGET表示模板
+            rnd (callable): 返回[0, 1)均匀随机数的函数
+
+        Returns:
+            int: 元素下标，该目标没有匹配时返回None
+        """
+        entry = self.by_target.get(target)
+        if entry is None:
+            return None
+        words, sampler = entry
+        indices, element_sampler = self.index.sampler(words[sampler.sample(rnd)], target)
+        return indices[element_sampler.sample(rnd)]
+
+
+class StoryIndex:
+    """
+    故事关键词倒排索引
+
+    生成器启动时一次性构建：把模板文字和每个元素切分为关键词，记录关键词到
+    (目标, 元素下标, 权重) 的倒排表；同义词组在查询时展开。
+    查询只切分输入本身，与语料规模无关；每个 (关键词, 目标) 的别名表在首次用到时构建并缓存，
+    之后每次抽样都是O(1)，不会在请求时扫描语料
+
+    Examples:
+        >>> index = StoryIndex(templates, elements, STORY_SYNONYMS)
+        >>> theme = index.match("友谊")
+        >>> elements["lesson"][theme.pick("lesson", random.random)]
+        '友谊的重要性'
+    """
+
+    def __init__(self, templates, elements, synonyms=(), max_len=KEYWORD_MAX_LEN):
+        """
+        构建索引
+
+        Args:
+            templates (list[str]): 故事模板
+            elements (dict): 故事元素库
+            synonyms (list[list[str]]): 同义词组
+            max_len (int): 关键词最大长度
+        """
+        self.max_len = max_len
+        # 关键词 -> 目标 -> ([元素下标], [权重])
+        self.postings = {}
+        self._samplers = {}
+        for i, template in enumerate(templates):
+            self.add(TEMPLATE_TARGET, i, PLACEHOLDER_PATTERN.sub(" ", template))
+        for target, candidates in elements.items():
+            for i, text in enumerate(candidates):
+                self.add(target, i, text)
+        # 词 -> 同组的其他词
+        self.synonyms = {}
+        for group in synonyms:
+            for word in group:
+                self.synonyms.setdefault(word, set()).update(w for w in group if w != word)
+
+    def add(self, target, i, text):
+        """
+        把一段文本加入倒排表，较长的关键词权重更高
+
+        Args:
+            target (str): 目标名
+            i (int): 元素下标
+            text (str): 元素文本
+        """
+        for keyword in keywords(text, self.max_len):
+            indices, weights = self.postings.setdefault(keyword, {}).setdefault(target, ([], []))
+            indices.append(i)
+            weights.append(len(keyword))
+
+    def match(self, user_input):
+        """
+        查询与输入相关的主题
+
+        Args:
+            user_input (str): 故事主题或关键词
+
+        Returns:
+            Theme: 匹配到的主题，没有任何匹配时返回None
+        """
+        if not user_input:
+            return None
+        matches = {}
+        for keyword in keywords(user_input, self.max_len):
+            if keyword in self.postings:
+                matches[keyword] = 1.0
+            for synonym in self.synonyms.get(keyword, ()):
+                if synonym in self.postings:
+                    matches.setdefault(synonym, SYNONYM_WEIGHT)
+        return Theme(self, matches) if matches else None
+
+    def sampler(self, keyword, target):
+        """
+        获取 (关键词, 目标) 的别名表，首次使用时构建
+
+        Args:
+            keyword (str): 关键词
+            target (str): 目标名
+
+        Returns:
+            tuple: (元素下标列表, AliasSampler)
+        """
+        key = (keyword, target)
+        entry = self._samplers.get(key)
+        if entry is None:
+            indices, weights = self.postings[keyword][target]
+            entry = self._samplers[key] = (indices, AliasSampler(weights))
+        return entry
+
+
+class StorySpace:
+    """
+    全部可能故事组成的组合空间：每个模板 × 它各个槽位的候选元素
+
+    编号与故事一一对应：先在各模板空间大小的前缀和上二分确定模板，再把模板内的编号
+    按混合进制（每个槽位的候选数量为一位）拆成各槽位的元素下标。解码只与模板数和
+    槽位数有关，与元素库的大小无关；空间本身只保存前缀和，不枚举故事
+
+    consistent为True时同一模板中的同名占位符只占一个槽位，取相同的值，
+    例如模板中的几个 {character} 都是同一个角色
+
     Examples:
-        >>> resource_path('images/talk_background.jpg')
-        'e://desktop-pet/src/images/talk_background.jpg'
+        >>> space = StorySpace([compile_template("{a}和{a}", {"a": ["甲", "乙"]})], consistent=True)
+        >>> space.size, space.story(1)
+        (2, '乙和乙')
     """
-    try:
-        # PyInstaller创建临时文件夹，将路径存储在_MEIPASS中
-        base_path = sys._MEIPASS
-    except Exception:
-        # 如果不是打包后的exe，使用当前文件所在目录
-        base_path = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(base_path, relative_path)
+
+    def __init__(self, compiled, consistent=False):
+        """
+        初始化组合空间
+
+        Args:
+            compiled (list[tuple]): compile_template的返回值
+            consistent (bool): 同名占位符是否取相同的值
+        """
+        self.consistent = consistent
+        # 每个模板：(格式串, 文字片段, 槽位元组, 每个占位符对应的槽位下标)
+        self.templates = []
+        self.starts = []
+        total = 0
+        for template, slots, literals, names in compiled:
+            if consistent:
+                positions = {}
+                for slot, name in zip(slots, names):
+                    positions.setdefault(name, (len(positions), slot))
+                fields = tuple(positions[name][0] for name in names)
+                slots = tuple(slot for _, slot in positions.values())
+            else:
+                fields = tuple(range(len(slots)))
+            size = 1
+            for _, k in slots:
+                size *= k
+            self.templates.append((template, literals, slots, fields))
+            self.starts.append(total)
+            total += size
+        # 组合数可能超出len()能返回的范围，直接用size属性
+        self.size = total
+
+    def decode(self, index):
+        """
+        把编号拆成模板和各占位符的取值
+
+        Args:
+            index (int): 故事编号，0 <= index < size
+
+        Returns:
+            tuple: (格式串, 文字片段, 各占位符的取值)
+        """
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        t = bisect_right(self.starts, index) - 1
+        template, literals, slots, fields = self.templates[t]
+        index -= self.starts[t]
+        chosen = []
+        for candidates, k in slots:
+            index, i = divmod(index, k)
+            chosen.append(candidates[i])
+        return template, literals, [chosen[field] for field in fields]
+
+    def story(self, index):
+        """
+        编号对应的故事
+
+        Args:
+            index (int): 故事编号
+
+        Returns:
+            str: 故事
+        """
+        template, _, values = self.decode(index)
+        return template.format(*values)
+
+
+def default_corpus_path():
+    """
+    默认语料路径
+
+    内存映射语料存在且不旧于JSON语料时使用内存映射语料，否则使用JSON语料
+
+    Returns:
+        str: 语料路径
+    """
+    assets = get_assets()
+    mapped = assets.mtime(MAPPED_CORPUS_PATH)
+    source = assets.mtime(STORY_CORPUS_PATH)
+    if mapped is not None and (source is None or mapped >= source):
+        return assets.path(MAPPED_CORPUS_PATH)
+    return assets.path(STORY_CORPUS_PATH)
+
 
 class LocalStoryGenerator:
     """
     本地故事生成器
     
-    使用预定义的故事模板和元素库生成随机故事，无需网络连接，完全离线运行
+    使用故事模板和元素库生成随机故事，无需网络连接，完全离线运行。
+    元素库可以是内存中的字典，也可以是内存映射的语料（MappedCorpus），
+    后者抽取元素时只读取一条记录
     """
     
-    def __init__(self):
+    def __init__(self, templates=None, elements=None):
         """
         初始化本地故事生成器
+
+        Args:
+            templates (Sequence[str]): 故事模板，默认从默认语料加载
+            elements (Mapping): 故事元素库，类别名到元素序列的映射，默认从默认语料加载
+        """
+        if templates is None or elements is None:
+            default_templates, default_elements = open_corpus(default_corpus_path())
+            templates = default_templates if templates is None else templates
+            elements = default_elements if elements is None else elements
+        self.templates = templates
+        self.elements = elements
+        self._index = None
+        # 索引、主题缓存、组合空间和不重复抽样器都在第一次用到时创建，生成线程池会并发调用，创建时加锁
+        self._lock = threading.RLock()
+        self.compile()
+
+    def compile(self):
+        """
+        编译全部模板
+
+        模板或元素库变化后需要重新编译，set_templates和set_elements会自动调用
+        """
+        self.compiled = [compile_template(template, self.elements) for template in self.templates]
+        self._index = None
+        self._themes = {}
+        # 不重复模式用到的组合空间和本次运行的抽样器，按consistent区分
+        self._spaces = {}
+        self._sessions = {}
+
+    @property
+    def index(self):
+        """
+        关键词索引
+
+        第一次用到时才构建，只有带主题的请求会触发；
+        大型语料在构建时需要读取全部元素，之后的请求不再扫描语料
+
+        Returns:
+            StoryIndex: 关键词索引
+        """
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = StoryIndex(self.templates, self.elements, STORY_SYNONYMS)
+                index = self._index
+        return index
+
+    def space(self, consistent=False):
+        """
+        全部模板和元素组成的组合空间，第一次用到时创建
+
+        Args:
+            consistent (bool): 同名占位符是否取相同的值
+
+        Returns:
+            StorySpace: 组合空间
+        """
+        space = self._spaces.get(consistent)
+        if space is None:
+            with self._lock:
+                space = self._spaces.get(consistent)
+                if space is None:
+                    space = self._spaces[consistent] = StorySpace(self.compiled, consistent)
+        return space
+
+    def session_sampler(self, consistent=False):
+        """
+        本次运行共用的不重复抽样器，generate_story和iter_story的不重复模式从这里取故事
+
+        Args:
+            consistent (bool): 同名占位符是否取相同的值
+
+        Returns:
+            NoRepeatSampler: 抽样器
+        """
+        with self._lock:
+            sampler = self._sessions.get(consistent)
+            if sampler is None:
+                sampler = self._sessions[consistent] = NoRepeatSampler(self.space(consistent).size)
+            return sampler
+
+    def next_unique(self, consistent=False):
+        """
+        从本次运行的不重复序列中取出下一个故事
+
+        组合空间中的每个故事在全部取完之前只出现一次，之后换一个排列继续。
+        所有故事等概率出现，因此占位符多的模板出现得更频繁；不重复模式不使用主题偏向
+
+        Args:
+            consistent (bool): 同名占位符是否取相同的值
+
+        Returns:
+            tuple: StorySpace.decode的返回值
         """
-        self.templates = STORY_TEMPLATES
-        self.elements = STORY_ELEMENTS
+        space = self.space(consistent)
+        return space.decode(self.session_sampler(consistent).sample())
+
+    def match(self, user_input):
+        """
+        按用户输入匹配主题，没有输入时不构建索引
+
+        Args:
+            user_input (str): 故事主题或关键词
+
+        Returns:
+            Theme: 匹配到的主题，没有输入或没有匹配时返回None
+        """
+        if not user_input:
+            return None
+        # 同一主题重复请求时复用已建好的抽样表，命中时不加锁；缓存满时整体清空
+        themes = self._themes
+        try:
+            return themes[user_input]
+        except KeyError:
+            pass
+        with self._lock:
+            # 等锁期间其他线程可能已经建好
+            if user_input in themes:
+                return themes[user_input]
+            if len(themes) >= THEME_CACHE_SIZE:
+                themes.clear()
+            theme = themes[user_input] = self.index.match(user_input)
+        return theme
+
+    def pick_template(self, theme=None, rng=random):
+        """
+        选择一个已编译的模板，有主题时偏向与主题相关的模板
+
+        Args:
+            theme (Theme): 主题
+            rng (random.Random): 随机数生成器
+
+        Returns:
+            tuple: compile_template的返回值
+        """
+        rnd = rng.random
+        if theme is not None and rnd() < THEME_BIAS:
+            i = theme.pick(TEMPLATE_TARGET, rnd)
+            if i is not None:
+                return self.compiled[i]
+        return self.compiled[int(rnd() * len(self.compiled))]
+
+    def pick(self, compiled, theme=None, rng=random, consistent=False):
+        """
+        为已编译模板的每个槽位选出元素
+
+        没有主题时均匀抽取；有主题时每个槽位以THEME_BIAS的概率从匹配的元素中抽取
+
+        Args:
+            compiled (tuple): compile_template的返回值
+            theme (Theme): 主题
+            rng (random.Random): 随机数生成器
+            consistent (bool): 同名占位符是否取相同的值，为True时只在第一次出现时抽取
+
+        Returns:
+            list[str]: 各槽位的取值
+        """
+        rnd = rng.random
+        slots, names = compiled[1], compiled[3]
+        if theme is None and not consistent:
+            return [candidates[int(rnd() * n)] for candidates, n in slots]
+        values = []
+        chosen = {}
+        for (candidates, n), name in zip(slots, names):
+            if consistent and name in chosen:
+                values.append(chosen[name])
+                continue
+            i = theme.pick(name, rnd) if theme is not None and rnd() < THEME_BIAS else None
+            value = chosen[name] = candidates[int(rnd() * n) if i is None else i]
+            values.append(value)
+        return values
+
+    def set_templates(self, templates):
+        """
+        替换故事模板并重新编译
+
+        Args:
+            templates (list[str]): 故事模板
+        """
+        self.templates = templates
+        self.compile()
+
+    def set_elements(self, elements):
+        """
+        替换故事元素库并重新编译
+
+        Args:
+            elements (dict): 故事元素库
+        """
+        self.elements = elements
+        self.compile()
+
+    def fill(self, compiled, rng=random, theme=None, consistent=False):
+        """
+        用随机元素填充一个已编译的模板
+
+        Args:
+            compiled (tuple): compile_template的返回值
+            rng (random.Random): 随机数生成器
+            theme (Theme): 主题，有主题时偏向与主题相关的元素
+            consistent (bool): 同名占位符是否取相同的值
+
+        Returns:
+            str: 填充后的故事
+        """
+        return compiled[0].format(*self.pick(compiled, theme, rng, consistent))
+
+    def generate_stories(self, n, seed=None, user_input="", rng=None, unique=False, consistent=False, start=0):
+        """
+        批量生成故事
+
+        不做响应时间控制，适合批量生成内容；相同的seed总是生成相同的故事序列
+
+        Args:
+            n (int): 生成数量
+            seed (int): 随机种子，默认不固定
+            user_input (str): 故事主题或关键词
+            rng (random.Random): 随机数生成器，指定时忽略seed，用于在多次调用之间延续同一个随机序列
+            unique (bool): 不重复模式：按seed决定的排列遍历组合空间，全部用完之前不会重复，不使用主题偏向
+            consistent (bool): 同名占位符是否取相同的值
+            start (int): 不重复模式下从排列的第几个故事开始，分片生成时各分片接续同一个排列
+
+        Returns:
+            list[str]: 生成的故事
+
+        Examples:
+            >>> generator = LocalStoryGenerator()
+            >>> len(generator.generate_stories(1000, seed=42))
+            1000
+        """
+        if unique:
+            if seed is None:
+                seed = (rng or random).getrandbits(64)
+            space = self.space(consistent)
+            sampler = NoRepeatSampler(space.size, seed)
+            stories = [space.story(sampler.index_at(start + i)) for i in range(n)]
+        else:
+            stories = self._random_stories(n, user_input, rng or random.Random(seed), consistent)
+        if user_input:
+            header = f"关于'{user_input}'的故事：\n\n"
+            stories = [header + story for story in stories]
+        return stories
+
+    def _random_stories(self, n, user_input, rng, consistent=False):
+        # 每个故事独立抽取模板和元素
+        theme = self.match(user_input)
+        if theme is not None or consistent:
+            stories = [self.fill(self.pick_template(theme, rng), rng, theme, consistent) for _ in range(n)]
+        else:
+            rnd = rng.random
+            compiled = self.compiled
+            count = len(compiled)
+            stories = [None] * n
+            # 循环体内联了fill，避免每个故事一次方法调用
+            for i in range(n):
+                template, slots = compiled[int(rnd() * count)][:2]
+                stories[i] = template.format(*[candidates[int(rnd() * k)] for candidates, k in slots])
+        return stories
     
-    def generate_story(self, user_input=""):
+    def iter_story(self, user_input="", rng=random, unique=False, consistent=False):
+        """
+        流式生成故事，每填充一个槽位就产出一段文本
+
+        依次产出标题（有输入时）、文字片段和槽位取值，拼接起来就是完整的故事
+
+        Args:
+            user_input (str): 故事主题或关键词
+            rng (random.Random): 随机数生成器
+            unique (bool): 不重复模式，故事取自本次运行的不重复序列（见next_unique）
+            consistent (bool): 同名占位符是否取相同的值
+
+        Yields:
+            str: 故事片段
+
+        Examples:
+            >>> generator = LocalStoryGenerator()
+            >>> "".join(generator.iter_story("友谊")).startswith("关于'友谊'的故事")
+            True
+        """
+        if unique:
+            _, literals, values = self.next_unique(consistent)
+        else:
+            theme = self.match(user_input)
+            compiled = self.pick_template(theme, rng)
+            literals, values = compiled[2], self.pick(compiled, theme, rng, consistent)
+        if user_input:
+            yield f"关于'{user_input}'的故事：\n\n"
+        for literal, value in zip(literals, values):
+            if literal:
+                yield literal
+            yield value
+        if literals[-1]:
+            yield literals[-1]
+
+    def generate_story(self, user_input="", pace=True, unique=False, consistent=False):
         """
         生成随机故事，响应时间控制在500ms以内
         
         Args:
             user_input (str): 故事主题或关键词
+            pace (bool): 是否用sleep把响应时间补足到STORY_PACE_MS；
+                批量或后台调用时应传入False
+            unique (bool): 不重复模式，本次运行中全部组合用完之前不会生成重复的故事
+            consistent (bool): 同名占位符是否取相同的值
         
         Returns:
             str: 生成的故事文本
@@ -124,22 +768,13 @@ class LocalStoryGenerator:
         """
         start_time = time.time()
         
-        # 选择随机模板
-        template = random.choice(self.templates)
-        
-        # 填充模板中的占位符
-        story = template
-        while "{" in story and "}" in story:
-            start = story.find("{")
-            end = story.find("}")
-            if start != -1 and end != -1:
-                placeholder = story[start+1:end]
-                if placeholder in self.elements:
-                    replacement = random.choice(self.elements[placeholder])
-                    story = story[:start] + replacement + story[end+1:]
-                else:
-                    # 如果占位符不在元素库中，使用默认值
-                    story = story[:start] + "未知" + story[end+1:]
+        # 不重复模式取序列中的下一个故事；否则按用户输入匹配主题，选择模板并填充占位符
+        if unique:
+            template, _, values = self.next_unique(consistent)
+            story = template.format(*values)
+        else:
+            theme = self.match(user_input)
+            story = self.fill(self.pick_template(theme), theme=theme, consistent=consistent)
         
         # 添加用户输入的影响（如果提供了输入）
         if user_input and len(user_input) > 0:
@@ -147,21 +782,243 @@ class LocalStoryGenerator:
         
         # 确保响应时间不超过500ms
         elapsed_time = (time.time() - start_time) * 1000
-        if elapsed_time < 500:
+        if pace and elapsed_time < STORY_PACE_MS:
             # 添加一点随机延迟，使响应更自然
-            remaining_time = 500 - elapsed_time
+            remaining_time = STORY_PACE_MS - elapsed_time
             time.sleep(remaining_time / 1000)
         
         return story
 
-# 创建全局故事生成器实例
-story_generator = LocalStoryGenerator()
+# 全局故事生成器实例，第一次使用时创建；宠物会在后台线程中预热，创建时加锁
+_story_generator = None
+_story_generator_lock = threading.Lock()
+
+def get_story_generator():
+    """
+    获取全局故事生成器，第一次调用时加载语料
+
+    Returns:
+        LocalStoryGenerator: 故事生成器
+    """
+    global _story_generator
+    with _story_generator_lock:
+        if _story_generator is None:
+            _story_generator = LocalStoryGenerator()
+    return _story_generator
+
+_client = None
+
+
+def shard_seed(seed, shard):
+    """
+    分片的随机种子，只由总种子和分片序号决定
+
+    Args:
+        seed (int): 总种子
+        shard (int): 分片序号
+
+    Returns:
+        int: 分片种子
+    """
+    digest = hashlib.sha256(f"{seed}:{shard}".encode("ascii")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def export_shard(shard, start, n, seed, user_input="", compress=False, unique=False, consistent=False):
+    """
+    生成一个分片并编码为JSONL，在导出进程池中执行
+
+    每行一个故事：{"id": 全局序号, "story": 故事}。压缩时每个分片是一个独立的gzip成员，
+    多个成员直接拼接仍是合法的gzip文件，压缩也因此在工作进程中并行完成
+
+    Args:
+        shard (int): 分片序号
+        start (int): 分片第一个故事的全局序号
+        n (int): 分片中的故事数
+        seed (int): 总种子
+        user_input (str): 故事主题或关键词
+        compress (bool): 是否压缩
+        unique (bool): 不重复模式，各分片取同一个排列中从start开始的一段
+        consistent (bool): 同名占位符是否取相同的值
+
+    Returns:
+        bytes: 编码后的分片
+    """
+    generator = get_story_generator()
+    if unique:
+        stories = generator.generate_stories(n, seed, user_input, unique=True, consistent=consistent, start=start)
+    else:
+        rng = random.Random(shard_seed(seed, shard))
+        stories = generator.generate_stories(n, user_input=user_input, rng=rng, consistent=consistent)
+    data = "".join(json.dumps({"id": start + i, "story": story}, ensure_ascii=False) + "\n"
+                   for i, story in enumerate(stories)).encode("utf-8")
+    # mtime固定为0，相同的种子得到逐字节相同的文件
+    return gzip.compress(data, compresslevel=6, mtime=0) if compress else data
+
+
+def export_stories(n, path, workers=None, seed=0, user_input="", shard_size=EXPORT_SHARD_SIZE,
+                   unique=False, consistent=False):
+    """
+    批量生成故事并流式写入文件
+
+    按shard_size把n个故事分片，每个分片使用由seed和分片序号决定的种子，
+    因此同样的seed无论用多少个进程都得到完全相同的文件；不重复模式下整个文件是同一个排列的前n项，
+    n不超过组合空间大小时没有重复的故事。分片按顺序写出，
+    同时在途的分片不超过 进程数 * EXPORT_WINDOW，内存占用与n无关
+
+    Args:
+        n (int): 故事数
+        path (str): 输出文件，扩展名为.gz时压缩
+        workers (int): 进程数，默认为CPU核数；为1时在当前进程中生成
+        seed (int): 总种子
+        user_input (str): 故事主题或关键词
+        shard_size (int): 每个分片的故事数
+        unique (bool): 不重复模式
+        consistent (bool): 同名占位符是否取相同的值
+
+    Returns:
+        int: 写入的字节数
+
+    Examples:
+        >>> export_stories(100000, "stories.jsonl.gz", workers=4, seed=42)
+        9420512
+    """
+    workers = workers or os.cpu_count() or 1
+    compress = path.endswith(".gz")
+    shards = [(i, start, min(shard_size, n - start), seed, user_input, compress, unique, consistent)
+              for i, start in enumerate(range(0, n, shard_size))]
+    written = 0
+    with open(path, "wb") as f:
+        if workers == 1:
+            for shard in shards:
+                written += f.write(export_shard(*shard))
+            return written
+        with ProcessPoolExecutor(workers) as pool:
+            pending = []
+            shards = iter(shards)
+            while True:
+                # 补满提交窗口，再按顺序等待最早的分片
+                while len(pending) < workers * EXPORT_WINDOW:
+                    shard = next(shards, None)
+                    if shard is None:
+                        break
+                    pending.append(pool.submit(export_shard, *shard))
+                if not pending:
+                    break
+                written += f.write(pending.pop(0).result())
+    return written
+
+
+def get_client():
+    """
+    获取全局故事大会窗口，第一次调用时创建
+
+    窗口关闭后保留，再次打开时直接显示同一个实例；所有宠物共用这一个窗口
+
+    Returns:
+        Client: 故事大会窗口
+    """
+    global _client
+    if _client is None:
+        _client = Client()
+        # 窗口被显式销毁时，下次调用重新创建
+        _client.destroyed.connect(_forget_client)
+    return _client
+
+
+def _forget_client():
+    global _client
+    _client = None
+
+
+class StorySignals(QObject):
+    """
+    故事生成任务的信号
+
+    由工作线程发出，经队列连接回到GUI线程
+    """
+
+    # 生成出一批片段：请求编号、片段文本
+    fragment = pyqtSignal(int, str)
+    # 生成完成：请求编号
+    finished = pyqtSignal(int)
+    # 生成失败：请求编号、错误信息
+    failed = pyqtSignal(int, str)
+
+
+# 故事生成耗时（从开始生成到最后一个片段）
+STORY_LATENCY = get_registry().histogram("story_generation_seconds", "故事生成耗时")
+
+
+class StoryTask(QRunnable):
+    """
+    故事生成任务
+
+    在线程池中流式调用故事生成器，按STREAM_BATCH_SECONDS合并片段后发出；
+    被取消的任务在下一个片段前停止
+    """
+
+    def __init__(self, request_id, user_input, generator, unique=False, consistent=False):
+        """
+        初始化任务
+
+        Args:
+            request_id (int): 请求编号
+            user_input (str): 故事主题或关键词
+            generator (LocalStoryGenerator): 故事生成器
+            unique (bool): 没有主题时是否使用不重复模式
+            consistent (bool): 同名占位符是否取相同的值
+        """
+        super(StoryTask, self).__init__()
+        # 任务对象由Client持有，避免线程池删除Python仍在使用的对象
+        self.setAutoDelete(False)
+        self.request_id = request_id
+        self.user_input = user_input
+        self.generator = generator
+        self.unique = unique and not user_input
+        self.consistent = consistent
+        self.signals = StorySignals()
+        self.cancelled = threading.Event()
+        # 以下由GUI线程维护：已收到但尚未渲染的片段、是否已开始渲染、对应的历史记录条目、是否生成完毕
+        self.buffer = []
+        self.rendered = False
+        self.entry = None
+        self.done = False
+
+    def cancel(self):
+        """
+        取消任务，已经生成的结果也不再显示
+        """
+        self.cancelled.set()
+
+    def run(self):
+        batch = []
+        started = time.monotonic()
+        deadline = started + STREAM_BATCH_SECONDS
+        try:
+            for fragment in self.generator.iter_story(self.user_input, unique=self.unique, consistent=self.consistent):
+                if self.cancelled.is_set():
+                    return
+                batch.append(fragment)
+                if time.monotonic() >= deadline:
+                    self.signals.fragment.emit(self.request_id, "".join(batch))
+                    batch = []
+                    deadline = time.monotonic() + STREAM_BATCH_SECONDS
+        except Exception as e:
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        if batch:
+            self.signals.fragment.emit(self.request_id, "".join(batch))
+        STORY_LATENCY.observe(time.monotonic() - started)
+        self.signals.finished.emit(self.request_id)
+
 
 class Client(QWidget):
     """
     故事大会客户端界面
     
-    提供用户输入故事主题，生成并展示故事的界面
+    提供用户输入故事主题，生成并展示故事的界面。
+    故事在线程池中流式生成，片段通过信号送回界面，按帧间隔分批追加到文本框，GUI线程从不阻塞
     """
     
     def __init__(self, parent=None, **kwargs):
@@ -171,22 +1028,51 @@ class Client(QWidget):
         Args:
             parent (QWidget): 父窗口部件
             kwargs (dict): 额外参数
+                - generator (LocalStoryGenerator): 故事生成器，默认使用全局实例
+                - history (StoryHistory): 历史记录，默认使用全局实例
+                - unique (bool): 没有主题的故事是否使用不重复模式，默认为NO_REPEAT_STORIES
+                - consistent (bool): 同名占位符是否取相同的值，默认为CONSISTENT_BINDINGS
         """
         # QWidget.__init__(self)
         super(Client, self).__init__(parent)
+        # 故事生成器与生成线程池
+        self.generator = kwargs.get('generator') or get_story_generator()
+        self.unique = kwargs.get('unique', NO_REPEAT_STORIES)
+        self.consistent = kwargs.get('consistent', CONSISTENT_BINDINGS)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(STORY_WORKERS)
+        # 尚未显示结果的请求，按提交顺序排列
+        self.pending = OrderedDict()
+        self.request_ids = count(1)
+        # 片段渲染定时器，把一帧内到达的片段合并为一次追加
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+        # 历史记录：文本框只显示编号在[view_first, view_end)之间的条目，每个条目一个段落
+        # 空的历史记录长度为0，不能用or判断
+        self.history = kwargs.get('history')
+        if self.history is None:
+            self.history = get_history()
+        self.view_first = self.view_end = len(self.history)
+        self.paging = False
+        # 上一次搜索的关键词和结果，重复搜索时从这里继续
+        self.search_query = None
+        self.search_hit = None
         # 设置窗口的大小和位置
         self.setGeometry(WINDOW_X, WINDOW_Y, WINDOW_WIDTH, WINDOW_HEIGHT)
         # 设置标题
         self.setWindowTitle(WINDOW_TITLE)
         # 添加背景
         palette = QtGui.QPalette()
-        bg = QtGui.QPixmap(resource_path(BACKGROUND_IMAGE_PATH))
+        # 背景图片在进程内只解码一次，所有窗口共用
+        bg = get_assets().pixmap(BACKGROUND_IMAGE_PATH)
         palette.setBrush(self.backgroundRole(), QtGui.QBrush(bg))
         self.setPalette(palette)
         self.add_ui()
+        self.show_latest()
  
-        # 启动线程
-        self.work_thread()
+        # 绑定按钮事件
+        self.btn_generate()
 
         # # 展示
         # self.show()
@@ -198,16 +1084,22 @@ class Client(QWidget):
         初始化并布局以下UI组件：
         - 多行文本显示框：显示聊天信息和生成的故事
         - 单行文本输入框：输入故事主题或关键词
+        - 状态标签：显示正在生成的请求数
         - 生成按钮：触发故事生成
         """
         # 多行文本显示，显示所有的聊天信息
         self.content = QTextBrowser(self)
         self.content.setGeometry(CONTENT_X, CONTENT_Y, CONTENT_WIDTH, CONTENT_HEIGHT)
+        self.content.verticalScrollBar().valueChanged.connect(self.on_scroll)
  
         # 单行文本，消息发送框
         self.message = QLineEdit(self)
         self.message.setGeometry(MESSAGE_X, MESSAGE_Y, MESSAGE_WIDTH, MESSAGE_HEIGHT)
         self.message.setPlaceholderText(MESSAGE_PLACEHOLDER)
+
+        # 状态标签，显示正在生成的请求
+        self.status = QLabel(self)
+        self.status.setGeometry(STATUS_X, STATUS_Y, STATUS_WIDTH, STATUS_HEIGHT)
  
         # 发送按钮
         self.button = QPushButton(BUTTON_TEXT, self)
@@ -218,34 +1110,357 @@ class Client(QWidget):
         """
         生成故事
         
-        从输入框获取用户输入，调用故事生成器生成故事，并在界面上显示结果
+        从输入框获取用户输入，提交到生成线程池，结果由on_story_finished显示
         - 如果输入"Q"或"q"，则关闭窗口
+        - 如果以"?"开头，则在历史记录中搜索其后的关键词
         - 如果有输入内容，则基于该内容生成故事
         - 如果没有输入内容，则生成随机故事
         """
         user_input = self.message.text()
+        if user_input.startswith(SEARCH_PREFIXES):
+            self.search(user_input[1:].strip())
+            self.message.clear()
+            return
         if user_input:
-            self.content.append(f"用户: {user_input}")
+            self.add_line(f"用户: {user_input}")
             if user_input.upper() == EXIT_COMMAND:
                 self.close()
                 return
             
             # 显示生成中提示
-            self.content.append("故事生成器: 正在为您生成故事...")
+            self.add_line("故事生成器: 正在为您生成故事...")
             
-            # 生成故事
-            story = story_generator.generate_story(user_input)
-            
-            # 显示生成的故事
-            self.content.append(f"故事生成器: {story}")
+            # 提交生成请求
+            self.submit(user_input)
             
             # 清空输入框
             self.message.clear()
         else:
             # 如果没有输入，生成随机故事
-            self.content.append("故事生成器: 正在为您生成随机故事...")
-            story = story_generator.generate_story()
-            self.content.append(f"故事生成器: {story}")
+            self.add_line("故事生成器: 正在为您生成随机故事...")
+            self.submit("")
+
+    def submit(self, user_input):
+        """
+        提交生成请求
+
+        结果按提交顺序显示：只有最早的未完成请求会流式渲染，之后的请求先缓存片段
+        - 相同主题且尚未显示结果的旧请求视为被新请求取代，直接取消
+        - 排队的请求超过MAX_PENDING_REQUESTS时，取消最早的请求
+
+        Args:
+            user_input (str): 故事主题或关键词
+
+        Returns:
+            int: 请求编号
+        """
+        for task in list(self.pending.values()):
+            if task.user_input == user_input:
+                self.cancel(task.request_id)
+        while len(self.pending) >= MAX_PENDING_REQUESTS:
+            self.cancel(next(iter(self.pending)))
+        task = StoryTask(next(self.request_ids), user_input, self.generator, self.unique, self.consistent)
+        task.signals.fragment.connect(self.on_story_fragment)
+        task.signals.finished.connect(self.on_story_finished)
+        task.signals.failed.connect(self.on_story_failed)
+        self.pending[task.request_id] = task
+        self.pool.start(task)
+        self.update_status()
+        return task.request_id
+
+    def cancel(self, request_id):
+        """
+        取消请求：尚未开始的任务从线程池中移除，正在执行的任务结果将被丢弃
+
+        Args:
+            request_id (int): 请求编号
+        """
+        task = self.pending.pop(request_id, None)
+        if task is None:
+            return
+        task.cancel()
+        self.pool.tryTake(task)
+        if task.rendered:
+            # 已经显示了一部分的故事，补上取消标记
+            self.append_fragment(task.entry, task.buffer + ["……（已取消）"])
+            self.history.finish(task.entry)
+        self.update_status()
+        self.schedule_flush()
+
+    def on_story_fragment(self, request_id, fragment):
+        """
+        收到一批故事片段，缓存到下一帧再渲染
+
+        Args:
+            request_id (int): 请求编号
+            fragment (str): 片段文本
+        """
+        task = self.pending.get(request_id)
+        if task is None:
+            return
+        task.buffer.append(fragment)
+        self.schedule_flush()
+
+    def on_story_finished(self, request_id):
+        """
+        生成完成
+
+        Args:
+            request_id (int): 请求编号
+        """
+        task = self.pending.get(request_id)
+        if task is None:
+            return
+        task.done = True
+        self.schedule_flush()
+
+    def on_story_failed(self, request_id, error):
+        """
+        生成失败
+
+        Args:
+            request_id (int): 请求编号
+            error (str): 错误信息
+        """
+        task = self.pending.pop(request_id, None)
+        if task is None:
+            return
+        if task.rendered:
+            self.history.finish(task.entry)
+        self.add_line(f"故事生成器: 生成失败（{error}）")
+        self.update_status()
+
+    def schedule_flush(self):
+        """
+        安排在下一帧渲染缓存的片段
+        """
+        if not self.flush_timer.isActive():
+            self.flush_timer.start(STREAM_FLUSH_MS)
+
+    def flush(self):
+        """
+        渲染缓存的片段
+
+        按提交顺序处理：最早的请求把缓存的片段一次性追加到文本框，
+        生成完毕后出队，再处理下一个请求
+        """
+        while self.pending:
+            task = next(iter(self.pending.values()))
+            if task.buffer:
+                if not task.rendered:
+                    task.rendered = True
+                    task.entry = self.add_line("故事生成器: ", final=False)
+                self.append_fragment(task.entry, task.buffer)
+                task.buffer = []
+            if not task.done:
+                break
+            self.pending.pop(task.request_id)
+            if task.rendered:
+                self.history.finish(task.entry)
+        self.update_status()
+
+    def append_fragment(self, entry, fragments):
+        """
+        在条目末尾追加片段，不新起段落；条目不在当前显示范围内时只写入历史记录
+
+        Args:
+            entry (int): 条目编号
+            fragments (list[str]): 片段
+        """
+        text = "".join(fragments)
+        self.history.extend(entry, text)
+        if not self.view_first <= entry < self.view_end:
+            return
+        bar = self.content.verticalScrollBar()
+        follow = bar.value() == bar.maximum()
+        block = self.content.document().findBlockByNumber(entry - self.view_first)
+        cursor = QtGui.QTextCursor(block)
+        cursor.movePosition(QtGui.QTextCursor.MoveOperation.EndOfBlock)
+        cursor.insertText(text.replace("\n", LINE_SEPARATOR))
+        # 原本停在底部时继续跟随新内容
+        if follow:
+            bar.setValue(bar.maximum())
+
+    def add_line(self, text, final=True):
+        """
+        追加一个条目：写入历史记录，正在显示最新内容时同时追加到文本框末尾
+
+        文本框中的条目超过HISTORY_VIEW_LIMIT一页以上时，一次移除最早的多余条目，
+        把移除段落引起的重新排版分摊到一页的追加中；追加的开销与历史长度无关
+
+        Args:
+            text (str): 文本
+            final (bool): 是否已完成，未完成的条目可以继续append_fragment
+
+        Returns:
+            int: 条目编号
+        """
+        following = self.view_end == len(self.history)
+        entry = self.history.append(text, final=final)
+        if not following:
+            # 正在查看较早的记录，回到最新内容
+            self.show_latest()
+            return entry
+        bar = self.content.verticalScrollBar()
+        follow = bar.value() == bar.maximum()
+        self.insert_lines(self.view_end, [text])
+        self.view_end += 1
+        if self.view_end - self.view_first > HISTORY_VIEW_LIMIT + HISTORY_PAGE:
+            self.trim(keep_end=True)
+        if follow:
+            bar.setValue(bar.maximum())
+        return entry
+
+    def insert_lines(self, at, texts):
+        """
+        在文本框中插入条目，每个条目一个段落
+
+        Args:
+            at (int): 插入位置的条目编号，只能是view_first或view_end
+            texts (list[str]): 条目文本
+        """
+        document = self.content.document()
+        texts = [text.replace("\n", LINE_SEPARATOR) for text in texts]
+        cursor = QtGui.QTextCursor(document)
+        if self.view_first == self.view_end:
+            cursor.insertText("\n".join(texts))
+        elif at == self.view_first:
+            cursor.insertText("\n".join(texts) + "\n")
+        else:
+            cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
+            cursor.insertText("\n" + "\n".join(texts))
+
+    def trim(self, keep_end):
+        """
+        文本框中的条目超过HISTORY_VIEW_LIMIT时移除多出的条目
+
+        Args:
+            keep_end (bool): True时移除最早的条目，False时移除最新的条目
+        """
+        extra = self.view_end - self.view_first - HISTORY_VIEW_LIMIT
+        if extra <= 0:
+            return
+        document = self.content.document()
+        cursor = QtGui.QTextCursor(document)
+        if keep_end:
+            cursor.setPosition(document.findBlockByNumber(extra).position(), QtGui.QTextCursor.MoveMode.KeepAnchor)
+            self.view_first += extra
+        else:
+            block = document.findBlockByNumber(HISTORY_VIEW_LIMIT - 1)
+            cursor.setPosition(block.position() + block.length() - 1)
+            cursor.movePosition(QtGui.QTextCursor.MoveOperation.End, QtGui.QTextCursor.MoveMode.KeepAnchor)
+            self.view_end -= extra
+        cursor.removeSelectedText()
+
+    def show_range(self, first, end):
+        """
+        重新填充文本框，显示编号在[first, end)之间的条目
+
+        Args:
+            first (int): 起始编号
+            end (int): 结束编号（不包含）
+        """
+        self.paging = True
+        self.content.clear()
+        self.view_first = self.view_end = first
+        self.insert_lines(first, self.history.page(first, end))
+        self.view_end = end
+        self.paging = False
+
+    def show_latest(self):
+        """
+        显示最近的HISTORY_PAGE个条目并滚动到底部
+        """
+        end = len(self.history)
+        self.show_range(max(0, end - HISTORY_PAGE), end)
+        bar = self.content.verticalScrollBar()
+        bar.setValue(bar.maximum())
+
+    def on_scroll(self, value):
+        """
+        滚动到顶部时载入更早的一页，滚动到底部时载入更新的一页
+
+        Args:
+            value (int): 滚动条位置
+        """
+        if self.paging:
+            return
+        bar = self.content.verticalScrollBar()
+        if value == bar.minimum() and self.view_first > 0:
+            self.page_older()
+        elif value == bar.maximum() and self.view_end < len(self.history):
+            self.page_newer()
+
+    def page_older(self):
+        """
+        在文本框顶部载入更早的一页，保持当前可见的内容不动
+        """
+        self.paging = True
+        first = max(0, self.view_first - HISTORY_PAGE)
+        added = self.view_first - first
+        self.insert_lines(self.view_first, self.history.page(first, self.view_first))
+        self.view_first = first
+        self.trim(keep_end=False)
+        layout = self.content.document().documentLayout()
+        top = layout.blockBoundingRect(self.content.document().findBlockByNumber(added)).top()
+        self.content.verticalScrollBar().setValue(int(top))
+        self.paging = False
+
+    def page_newer(self):
+        """
+        在文本框底部载入更新的一页，保持当前可见的内容不动
+        """
+        self.paging = True
+        end = min(len(self.history), self.view_end + HISTORY_PAGE)
+        self.insert_lines(self.view_end, self.history.page(self.view_end, end))
+        self.view_end = end
+        bar = self.content.verticalScrollBar()
+        value = bar.value()
+        extra = self.view_end - self.view_first - HISTORY_VIEW_LIMIT
+        if extra > 0:
+            document = self.content.document()
+            removed = document.documentLayout().blockBoundingRect(document.findBlockByNumber(extra)).top()
+            self.trim(keep_end=True)
+            bar.setValue(value - int(removed))
+        self.paging = False
+
+    def search(self, query):
+        """
+        在历史记录中搜索关键词，显示最近一条命中的条目；重复搜索同一关键词时继续查找更早的结果
+
+        Args:
+            query (str): 关键词
+        """
+        if not query:
+            return
+        before = self.search_hit if query == self.search_query else None
+        hits = self.history.search(query, limit=1, before=before)
+        self.search_query = query
+        if not hits:
+            self.search_hit = None
+            self.status.setText(f"没有{'更早的' if before is not None else ''}包含“{query}”的记录")
+            return
+        entry = self.search_hit = hits[0]
+        first = max(0, entry - HISTORY_PAGE // 2)
+        self.show_range(first, min(len(self.history), first + HISTORY_PAGE))
+        # 选中命中的条目并滚动到可见位置
+        block = self.content.document().findBlockByNumber(entry - self.view_first)
+        cursor = QtGui.QTextCursor(block)
+        cursor.movePosition(QtGui.QTextCursor.MoveOperation.EndOfBlock, QtGui.QTextCursor.MoveMode.KeepAnchor)
+        self.paging = True
+        self.content.setTextCursor(cursor)
+        self.content.ensureCursorVisible()
+        self.paging = False
+        self.status.setText(f"搜索“{query}”：第 {entry + 1} 条记录，再次输入继续查找更早的结果")
+
+    def update_status(self):
+        """
+        刷新状态标签，显示正在生成的请求数
+        """
+        if self.pending:
+            self.status.setText(f"正在生成 {len(self.pending)} 个故事...")
+        else:
+            self.status.clear()
 
     def btn_generate(self):
         """
@@ -254,29 +1469,53 @@ class Client(QWidget):
         为生成按钮绑定点击事件，触发故事生成
         """
         self.button.clicked.connect(self.generate_story)
- 
-    def work_thread(self):
+
+    def present(self):
         """
-        线程处理
-        
-        在新线程中执行btn_generate方法，为生成按钮绑定点击事件
+        显示窗口并置于前台，输入框获得焦点
+
+        关闭后的窗口只是隐藏，再次调用即可重新打开，不需要重建控件
         """
-        Thread(target=self.btn_generate).start()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.message.setFocus()
 
     def closeEvent(self, event):
         """
-        推出销毁对话窗口
-        
-        处理窗口关闭事件
+        关闭对话窗口
+
+        处理窗口关闭事件，取消所有未完成的请求。窗口只是隐藏，
+        控件和已显示的内容保留，供get_client下次直接复用
         
         Args:
             event (QCloseEvent): 关闭事件对象
         """
-        self.close()
+        for request_id in list(self.pending):
+            self.cancel(request_id)
         event.accept()
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="故事大会；指定 --export 时批量导出故事，不打开窗口")
+    parser.add_argument("--export", type=int, metavar="N", help="批量生成N个故事并写入文件")
+    parser.add_argument("--output", default=EXPORT_OUTPUT, help="输出文件（JSONL），扩展名为.gz时压缩")
+    parser.add_argument("--workers", type=int, help="进程数，默认为CPU核数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子，相同种子的输出与进程数无关")
+    parser.add_argument("--input", default="", help="故事主题或关键词")
+    parser.add_argument("--shard-size", type=int, default=EXPORT_SHARD_SIZE, help="每个分片的故事数")
+    parser.add_argument("--unique", action="store_true", help="不重复模式：全部组合用完之前不输出重复的故事")
+    parser.add_argument("--consistent", action="store_true", help="同一个故事中的同名占位符取相同的值")
+    args = parser.parse_args()
+    if args.export is not None:
+        start = time.perf_counter()
+        size = export_stories(args.export, args.output, args.workers, args.seed, args.input, args.shard_size,
+                              args.unique, args.consistent)
+        elapsed = time.perf_counter() - start
+        print(f"已生成 {args.export} 个故事到 {args.output}（{size / 2 ** 20:.1f} MB），"
+              f"耗时 {elapsed:.2f} 秒，每秒 {args.export / elapsed:.0f} 个")
+        sys.exit(0)
+
     # 创建了一个QApplication对象，对象名为app，带两个参数argc,argv
     # 所有的PyQt5应用必须创建一个应用（Application）对象。sys.argv参数是一个来自命令行的参数列表。
     app = QApplication(sys.argv)
@@ -287,4 +1526,4 @@ if __name__ == '__main__':
     # 2. wait，直到响应app可能的输入；
     # 3. QT接收和处理用户及系统交代的事件（消息），并传递到各个窗口；
     # 4. 程序遇到exit()退出时，机会返回exec()的值。
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec())
\ No newline at end of file